@@ -1,19 +1,20 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm  # Dieser Import fehlte
 from django.contrib.auth.models import User
+from veranstaltungen import form_styles
+from veranstaltungen.form_styles import StyledFormMixin
+from veranstaltungen.tracing import TracedFormMixin
 
 from .models import Organization, OrganizationAccessRequest, UserProfile
 
 
-class UserProfileForm(UserCreationForm):
+class UserProfileForm(TracedFormMixin, StyledFormMixin, UserCreationForm):
+    widget_class = form_styles.INPUT_LARGE
 
     phone = forms.CharField(
         max_length=15, 
         required=False,
         label="Telefonnummer",
-        widget=forms.TextInput(attrs={
-            'class': 'w-full px-4 py-2 border-2 border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 transition-all'
-        })
     )
     vereine = forms.ModelMultipleChoiceField(
         queryset=Organization.objects.all(),
@@ -31,58 +32,20 @@ class UserProfileForm(UserCreationForm):
             'last_name': 'Nachname',
             'email': 'E-Mail',
         }
-        widgets = {
-            'username': forms.TextInput(attrs={
-                'class': 'w-full px-4 py-2 border-2 border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 transition-all'
-            }),
-            'first_name': forms.TextInput(attrs={
-                'class': 'w-full px-4 py-2 border-2 border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 transition-all'
-            }),
-            'last_name': forms.TextInput(attrs={
-                'class': 'w-full px-4 py-2 border-2 border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 transition-all'
-            }),
-            'email': forms.EmailInput(attrs={
-                'class': 'w-full px-4 py-2 border-2 border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 transition-all'
-            }),
-        }
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # Styling für Passwortfelder
-        self.fields['password1'].widget.attrs.update({
-            'class': 'w-full px-4 py-2 border-2 border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 transition-all'
-        })
-        self.fields['password2'].widget.attrs.update({
-            'class': 'w-full px-4 py-2 border-2 border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 transition-all'
-        })
 
 
+class OrganizationForm(StyledFormMixin, forms.ModelForm):
+    widget_class = form_styles.INPUT
 
-class OrganizationForm(forms.ModelForm):
     class Meta:
         model = Organization
         fields = ['name', 'organization_url', 'street', 'post_code', 'city']
         widgets = {
-            'name': forms.TextInput(attrs={
-                'placeholder': 'Name der Organisation',
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500'
-            }),
-            'organization_url': forms.URLInput(attrs={
-                'placeholder': 'https://...',
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500'
-            }),
-            'street': forms.TextInput(attrs={
-                'placeholder': 'Straße und Hausnummer (optional)',
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500'
-            }),
-            'post_code': forms.TextInput(attrs={
-                'placeholder': '12345',
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500'
-            }),
-            'city': forms.TextInput(attrs={
-                'placeholder': 'Stadt (optional)',
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500'
-            }),
+            'name': forms.TextInput(attrs={'placeholder': 'Name der Organisation'}),
+            'organization_url': forms.URLInput(attrs={'placeholder': 'https://...'}),
+            'street': forms.TextInput(attrs={'placeholder': 'Straße und Hausnummer (optional)'}),
+            'post_code': forms.TextInput(attrs={'placeholder': '12345'}),
+            'city': forms.TextInput(attrs={'placeholder': 'Stadt (optional)'}),
         }
     
     def __init__(self, *args, **kwargs):
@@ -91,15 +54,12 @@ class OrganizationForm(forms.ModelForm):
         self.fields['city'].required = False
 
 
-class OrganizationAccessRequestForm(forms.ModelForm):
+class OrganizationAccessRequestForm(StyledFormMixin, forms.ModelForm):
+    widget_classes = {'organization': form_styles.INPUT}
+
     class Meta:
         model = OrganizationAccessRequest
         fields = ['organization', 'data_consent']
-        widgets = {
-            'organization': forms.Select(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500'
-            }),
-        }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -113,12 +73,9 @@ class OrganizationAccessRequestForm(forms.ModelForm):
                 id__in=existing_requests
             )
 
-class OrganizationAccessReviewForm(forms.ModelForm):
+class OrganizationAccessReviewForm(StyledFormMixin, forms.ModelForm):
+    widget_class = form_styles.INPUT
+
     class Meta:
         model = OrganizationAccessRequest
-        fields = ['status']
-        widgets = {
-            'status': forms.Select(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500'
-            }),
-        }
\ No newline at end of file
+        fields = ['status']
\ No newline at end of file
@@ -0,0 +1,117 @@
+# authapp/membership.py - Zentrale Abfrage der Organisations-Mitgliedschaften
+"""
+Liefert die IDs der Organisationen, für die ein User freigeschaltet ist,
+als frozenset. Das Ergebnis wird pro Request am User-Objekt gemerkt und
+über Requests hinweg im Cache gehalten. Änderungen an
+UserProfile.organizations invalidieren den Cache (siehe authapp.models).
+
+version() ist ein Zähler für alles, was Event-Seiten außer den Events selbst
+anzeigen: Mitgliedschaften, Organisationen (Name, Auswahlliste) und Namen von
+Benutzern. Er ist Teil der Cache-Keys der Event-Karten und der ETags.
+"""
+import time
+
+from django.core.cache import cache
+
+# Sicherheitsnetz, falls eine Invalidierung einen anderen Worker-Prozess nicht erreicht
+CACHE_TIMEOUT = 5 * 60
+_MEMO_ATTR = '_organization_ids'
+
+
+VERSION_KEY = 'authapp:directory_version'
+
+
+def _cache_key(user_id):
+    return f'authapp:membership:{user_id}'
+
+
+def _load(user_ids):
+    """Eine Abfrage über die M2M-Tabelle für alle übergebenen User"""
+    from .models import UserProfile
+
+    result = {user_id: set() for user_id in user_ids}
+    rows = UserProfile.organizations.through.objects.filter(
+        userprofile__user_id__in=user_ids,
+    ).values_list('userprofile__user_id', 'organization_id')
+    for user_id, organization_id in rows:
+        result[user_id].add(organization_id)
+    return {user_id: frozenset(ids) for user_id, ids in result.items()}
+
+
+def organization_ids_for(user):
+    """frozenset der Organisations-IDs des Users (leer für anonyme User)"""
+    if user is None or not user.is_authenticated:
+        return frozenset()
+    memo = getattr(user, _MEMO_ATTR, None)
+    if memo is not None:
+        return memo
+
+    ids = cache.get(_cache_key(user.pk))
+    if ids is None:
+        ids = _load([user.pk])[user.pk]
+        cache.set(_cache_key(user.pk), ids, CACHE_TIMEOUT)
+    setattr(user, _MEMO_ATTR, ids)
+    return ids
+
+
+def organization_ids_for_users(user_ids):
+    """Wie organization_ids_for, aber für viele User: ein cache.get_many plus eine Abfrage für Fehlende"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return {}
+    keys = {_cache_key(user_id): user_id for user_id in user_ids}
+    cached = cache.get_many(keys.keys())
+    result = {keys[key]: ids for key, ids in cached.items()}
+
+    missing = user_ids - result.keys()
+    if missing:
+        loaded = _load(missing)
+        cache.set_many({_cache_key(user_id): ids for user_id, ids in loaded.items()}, CACHE_TIMEOUT)
+        result.update(loaded)
+    return result
+
+
+def is_member(user, organization):
+    """Prüft ob der User für die Organisation (Objekt oder ID) freigeschaltet ist"""
+    if organization is None:
+        return False
+    organization_id = getattr(organization, 'pk', organization)
+    return organization_id in organization_ids_for(user)
+
+
+def organizations_for(user):
+    """Queryset der freigeschalteten Organisationen, z.B. für Formularfelder"""
+    from .models import Organization
+
+    return Organization.objects.filter(pk__in=organization_ids_for(user))
+
+
+def invalidate(user_ids):
+    """Verwirft die gecachten Mitgliedschaften der User"""
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def version():
+    """Aktueller Stand von Mitgliedschaften, Organisationen und Benutzernamen"""
+    value = cache.get(VERSION_KEY)
+    if value is None:
+        # Startwert aus der Uhrzeit, damit nach einer Verdrängung aus dem Cache kein alter Stand wiederkehrt
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        value = cache.get(VERSION_KEY)
+    return value
+
+
+async def aversion():
+    """Async-Variante von version()"""
+    value = await cache.aget(VERSION_KEY)
+    if value is None:
+        await cache.aadd(VERSION_KEY, time.time_ns(), None)
+        value = await cache.aget(VERSION_KEY)
+    return value
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
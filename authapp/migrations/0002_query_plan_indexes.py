@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Funktionaler Index für die case-insensitive Benutzernamen-Prüfung (check_username).
+# Das User-Model gehört nicht zu dieser App, daher kein Meta.indexes.
+CREATE_USERNAME_INDEX = 'CREATE INDEX IF NOT EXISTS auth_user_username_lower_idx ON auth_user (LOWER(username))'
+DROP_USERNAME_INDEX = 'DROP INDEX IF EXISTS auth_user_username_lower_idx'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='organizationaccessrequest',
+            index=models.Index(fields=['status', 'requested_at'], name='accessrequest_status_idx'),
+        ),
+        migrations.RunSQL(CREATE_USERNAME_INDEX, DROP_USERNAME_INDEX),
+    ]
@@ -1,9 +1,11 @@
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
 from django.dispatch import receiver
 
+from . import membership, usernames
+
 
 class Organization(models.Model):
     name = models.CharField(max_length=150)
@@ -59,6 +61,10 @@ class OrganizationAccessRequest(models.Model):
     
     class Meta:
         unique_together = ['user', 'organization']
+        indexes = [
+            # Admin-Übersicht der offenen Anträge
+            models.Index(fields=['status', 'requested_at'], name='accessrequest_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.organization.name} ({self.status})"
@@ -73,4 +79,77 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
     """
     if created:
         # Nur bei neuen Usern ein UserProfile erstellen
-        UserProfile.objects.get_or_create(user=instance)
\ No newline at end of file
+        UserProfile.objects.get_or_create(user=instance)
+
+
+# Angezeigte Namen eines Users (Event-Karten: "Erstellt von")
+DISPLAY_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(post_init, sender=User)
+def remember_display_names(sender, instance, **kwargs):
+    """Merkt sich die geladenen Namen, um Umbenennungen beim Speichern zu erkennen (ohne Abfrage)"""
+    # __dict__ statt getattr: zurückgestellte Felder (only/defer) nicht nachladen
+    instance._loaded_names = tuple(instance.__dict__.get(field) for field in DISPLAY_NAME_FIELDS)
+
+
+@receiver(post_save, sender=User)
+def handle_rename(sender, instance, created, **kwargs):
+    """
+    Nur echte Namensänderungen - nicht z.B. last_login bei jedem Login.
+    Bei neuem oder umbenanntem User die gecachte Verfügbarkeit des alten und des neuen Namens verwerfen.
+    """
+    loaded = getattr(instance, '_loaded_names', None) or (None,) * len(DISPLAY_NAME_FIELDS)
+    names = tuple(instance.__dict__.get(field) for field in DISPLAY_NAME_FIELDS)
+    instance._loaded_names = names
+    if created:
+        usernames.invalidate(instance.username)
+        return
+    if names != loaded:
+        membership.bump_version()
+    old_username = loaded[0]
+    if old_username != names[0]:
+        usernames.invalidate(instance.username)
+        if old_username:
+            usernames.invalidate(old_username)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def bump_version_on_organization_change(sender, instance, **kwargs):
+    """Name und Auswahlliste der Organisationen stehen auf den Event-Seiten"""
+    membership.bump_version()
+
+
+@receiver(post_delete, sender=User)
+def invalidate_username_cache(sender, instance, **kwargs):
+    """Gelöschter User: Name ist wieder frei"""
+    usernames.invalidate(instance.username)
+
+
+@receiver(m2m_changed, sender=UserProfile.organizations.through)
+def invalidate_membership_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Verwirft gecachte Mitgliedschaften, sobald sich UserProfile.organizations ändert.
+    reverse=True heißt: Änderung über Organization.members (instance ist die Organisation).
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        membership.bump_version()
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            membership.invalidate([instance.user_id])
+        return
+    if action in ('post_add', 'post_remove'):
+        user_ids = UserProfile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True)
+    elif action == 'pre_clear':
+        # Nach dem Leeren sind die Mitglieder nicht mehr ermittelbar
+        user_ids = instance.members.values_list('user_id', flat=True)
+    else:
+        return
+    membership.invalidate(list(user_ids))
+
+
+@receiver(pre_delete, sender=Organization)
+def invalidate_membership_cache_on_delete(sender, instance, **kwargs):
+    """Beim Löschen einer Organisation entfallen die M2M-Zeilen ohne m2m_changed-Signal"""
+    membership.invalidate(list(instance.members.values_list('user_id', flat=True)))
@@ -1,5 +1,6 @@
 from django import template
 from django.forms import BoundField
+from veranstaltungen.form_styles import merge_classes
 
 register = template.Library()
 
@@ -28,12 +29,13 @@ def add_class(field, css_class):
     
     Wartungshinweise:
         - Filter funktioniert mit allen Django Formularfeldern
-        - Existierende Klassen des Feldes bleiben erhalten
-        - Bei Problemen: print(field.field.widget.attrs) zur Debugging
+        - Existierende Klassen des Widgets bleiben erhalten
+        - Die kombinierten Klassen werden gecacht (merge_classes), das Feld wird
+          genau einmal gerendert
+        - Bei Problemen: field.field.widget.attrs prüfen
     """
     if isinstance(field, BoundField):
-        existing_classes = field.css_classes()
-        combined_classes = f"{existing_classes} {css_class}".strip()
-        return field.as_widget(attrs={"class": combined_classes}) # type: ignore #
-        
+        combined_classes = merge_classes(field.field.widget.attrs.get('class', ''), css_class)
+        return field.as_widget(attrs={'class': combined_classes})
+
     return field
\ No newline at end of file
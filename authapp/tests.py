@@ -1,3 +1,148 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django import forms
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.template import Context, Template
+from django.urls import reverse
+from django.test import SimpleTestCase
+from django.utils import timezone
+from veranstaltungen.form_styles import merge_classes
+from veranstaltungen.testing import BudgetTestCase
+
+from . import membership, usernames
+from .models import Organization
+from .usernames import username_exists
+
+
+class UsernameCacheTests(BudgetTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_new_renamed_and_deleted_user(self):
+        self.assertFalse(username_exists('anna'))
+        user = User.objects.create_user('Anna', 'anna@example.com', 'geheim')
+        self.assertTrue(username_exists('anna'))
+
+        self.assertFalse(username_exists('berta'))
+        user = User.objects.get(pk=user.pk)
+        user.username = 'Berta'
+        user.save()
+        self.assertFalse(username_exists('anna'))
+        self.assertTrue(username_exists('berta'))
+
+        user.delete()
+        self.assertFalse(username_exists('berta'))
+
+    def test_save_without_rename_keeps_cache(self):
+        user = User.objects.create_user('Anna', 'anna@example.com', 'geheim')
+        user = User.objects.get(pk=user.pk)
+        with mock.patch.object(usernames, 'invalidate') as invalidate:
+            user.last_login = timezone.now()
+            user.save(update_fields=['last_login'])
+        invalidate.assert_not_called()
+
+
+class MembershipCacheTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('anna', 'anna@example.com', 'geheim')
+        cls.other = User.objects.create_user('bernd', 'bernd@example.com', 'geheim')
+        cls.verein = Organization.objects.create(name='Sportverein', city='Berlin')
+        cls.chor = Organization.objects.create(name='Chor', city='Berlin')
+
+    def setUp(self):
+        cache.clear()
+
+    def ids(self, user):
+        # Frisches User-Objekt, damit nicht nur das Memo am Objekt gelesen wird
+        return membership.organization_ids_for(User.objects.get(pk=user.pk))
+
+    def test_cached_across_requests(self):
+        self.user.profile.organizations.add(self.verein)
+        self.assertEqual(self.ids(self.user), {self.verein.pk})
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(membership.organization_ids_for(user), {self.verein.pk})
+            self.assertTrue(membership.is_member(user, self.verein))
+            self.assertEqual(membership.organization_ids_for_users([self.user.pk]), {self.user.pk: {self.verein.pk}})
+
+    def test_forward_changes(self):
+        profile = self.user.profile
+        self.assertEqual(self.ids(self.user), set())
+        profile.organizations.add(self.verein, self.chor)
+        self.assertEqual(self.ids(self.user), {self.verein.pk, self.chor.pk})
+        profile.organizations.remove(self.chor)
+        self.assertEqual(self.ids(self.user), {self.verein.pk})
+        profile.organizations.clear()
+        self.assertEqual(self.ids(self.user), set())
+
+    def test_reverse_changes(self):
+        self.assertEqual(self.ids(self.user), set())
+        self.verein.members.add(self.user.profile, self.other.profile)
+        self.assertEqual(self.ids(self.user), {self.verein.pk})
+        self.assertEqual(self.ids(self.other), {self.verein.pk})
+        self.verein.members.remove(self.other.profile)
+        self.assertEqual(self.ids(self.other), set())
+        self.assertEqual(self.ids(self.user), {self.verein.pk})
+        self.verein.members.clear()
+        self.assertEqual(self.ids(self.user), set())
+
+    def test_organization_delete(self):
+        self.user.profile.organizations.add(self.verein, self.chor)
+        self.assertEqual(self.ids(self.user), {self.verein.pk, self.chor.pk})
+        self.chor.delete()
+        self.assertEqual(self.ids(self.user), {self.verein.pk})
+
+    def test_membership_change_bumps_version(self):
+        before = membership.version()
+        self.user.profile.organizations.add(self.verein)
+        self.assertNotEqual(membership.version(), before)
+
+
+class LoginRateLimitTests(BudgetTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_login_limited_per_ip_and_username(self):
+        url = reverse('authapp:login')
+        for _ in range(10):
+            self.client.post(url, {'username': 'Anna', 'password': 'falsch'}, REMOTE_ADDR='10.0.0.1')
+        with mock.patch('authapp.views.authenticate', return_value=None) as authenticate:
+            response = self.client.post(url, {'username': 'anna ', 'password': 'falsch'}, REMOTE_ADDR='10.0.0.1')
+            self.assertEqual(response.status_code, 429)
+            authenticate.assert_not_called()
+
+            # Fehlversuche von einer IP sperren das Konto nicht für alle anderen
+            response = self.client.post(url, {'username': 'Anna', 'password': 'falsch'}, REMOTE_ADDR='10.0.1.1')
+        self.assertEqual(response.status_code, 200)
+        authenticate.assert_called_once()
+
+
+class AddClassFilterTests(SimpleTestCase):
+
+    class LoginForm(forms.Form):
+        username = forms.CharField(widget=forms.TextInput(attrs={'class': 'border rounded'}))
+
+    def render(self, value):
+        return Template('{% load form_filters %}{{ value|add_class:"w-full border" }}').render(Context({'value': value}))
+
+    def test_merges_with_widget_classes(self):
+        form = self.LoginForm()
+        html = self.render(form['username'])
+        self.assertIn('class="border rounded w-full"', html)
+        self.assertIn('name="username"', html)
+        # Das Widget des Formulars selbst bleibt unverändert
+        self.assertEqual(form.fields['username'].widget.attrs['class'], 'border rounded')
+
+    def test_combined_classes_are_memoized(self):
+        self.render(self.LoginForm()['username'])
+        before = merge_classes.cache_info().hits
+        self.assertIn('class="border rounded w-full"', self.render(self.LoginForm()['username']))
+        self.assertEqual(merge_classes.cache_info().hits, before + 1)
+
+    def test_other_values_unchanged(self):
+        self.assertEqual(self.render('kein Feld'), 'kein Feld')
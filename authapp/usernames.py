@@ -0,0 +1,101 @@
+# authapp/usernames.py - Schnelle Verfügbarkeitsprüfung von Benutzernamen (Live-Prüfung im Formular)
+"""
+Die Registrierung fragt bei jedem Tastendruck nach, ob ein Benutzername schon
+vergeben ist. Das Ergebnis wird kurz im Cache gehalten (gemeinsam für alle
+Worker) und zusätzlich für eine Sekunde im Prozess, sodass gleiche Anfragen
+in schneller Folge weder Cache noch Datenbank erreichen. Laufen mehrere
+Threads gleichzeitig in denselben Cache-Miss, fragt nur einer die Datenbank.
+Neue, umbenannte (alter und neuer Name) und gelöschte User invalidieren den Cache
+(siehe authapp.models).
+"""
+import hashlib
+import re
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.cache import cache
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+
+# Vergebene Namen bleiben länger gültig als freie - die werden häufiger neu vergeben
+TAKEN_TIMEOUT = 5 * 60
+FREE_TIMEOUT = 30
+LOCAL_TIMEOUT = 1.0
+_LOCAL_MAX_SIZE = 10000
+
+_MAX_LENGTH = User._meta.get_field('username').max_length
+_VALID = re.compile(UnicodeUsernameValidator.regex)
+
+_local = {}  # Schlüssel -> (Ablaufzeit, Ergebnis)
+_inflight = {}  # Schlüssel -> Event der laufenden Abfrage
+_lock = threading.Lock()
+
+
+def _key(username):
+    return username.lower()
+
+
+def _cache_key(key):
+    # Gehasht, da die Eingabe beliebige Zeichen enthalten kann (z.B. für Memcached)
+    return 'authapp:username:' + hashlib.md5(key.encode()).hexdigest()
+
+
+def matching_users(username):
+    """Entspricht username__iexact, nutzt aber den Index auf LOWER(username)"""
+    return User.objects.filter(Exact(Lower('username'), Lower(Value(username))))
+
+
+def username_exists(username):
+    """True, wenn der Benutzername (ohne Beachtung der Groß-/Kleinschreibung) vergeben ist"""
+    # Namen, die der Username-Validator ablehnt, können nicht vergeben sein
+    if not username or len(username) > _MAX_LENGTH or not _VALID.match(username):
+        return False
+    key = _key(username)
+
+    entry = _local.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+
+    exists = cache.get(_cache_key(key))
+    if exists is None:
+        exists = _single_flight(key, username)
+    _remember(key, exists)
+    return exists
+
+
+def _single_flight(key, username):
+    """Nur ein Thread pro Schlüssel fragt die Datenbank, die anderen warten auf sein Ergebnis"""
+    with _lock:
+        event = _inflight.get(key)
+        leader = event is None
+        if leader:
+            event = _inflight[key] = threading.Event()
+    if not leader:
+        event.wait(timeout=1.0)
+        exists = cache.get(_cache_key(key))
+        return matching_users(username).exists() if exists is None else exists
+
+    try:
+        exists = matching_users(username).exists()
+        cache.set(_cache_key(key), exists, TAKEN_TIMEOUT if exists else FREE_TIMEOUT)
+        return exists
+    finally:
+        with _lock:
+            del _inflight[key]
+        event.set()
+
+
+def _remember(key, exists):
+    if len(_local) >= _LOCAL_MAX_SIZE:
+        _local.clear()
+    _local[key] = (time.monotonic() + LOCAL_TIMEOUT, exists)
+
+
+def invalidate(username):
+    """Verwirft das gecachte Ergebnis für den Benutzernamen"""
+    key = _key(username)
+    cache.delete(_cache_key(key))
+    _local.pop(key, None)
@@ -7,17 +7,21 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import default_token_generator
 from django.core.exceptions import ValidationError
-from django.core.mail import send_mail
 from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.views import View
 from django.views.generic import TemplateView
+from mailapp.outbox import enqueue_mail
+from veranstaltungen.ratelimit import client_ip, ratelimit
 
+from . import usernames
 from .forms import (
     OrganizationAccessRequestForm,
     OrganizationAccessReviewForm,
@@ -28,6 +32,12 @@ from .models import Organization, OrganizationAccessRequest, UserProfile
 
 logger = logging.getLogger(__name__)
 
+
+def ip_and_username(request):
+    """Schlüssel für Login-Versuche - nur nach Benutzername würde jeder fremde Konten sperren können"""
+    return f"{client_ip(request)}:{request.POST.get('username', '').strip().lower()}"
+
+
 class IndexView(TemplateView):
     template_name = 'authapp/index.html'
 
@@ -36,6 +46,9 @@ class LoginSeiteView(View):
     def get(self, request):
         return render(request, "authapp/login.html")
 
+    # authenticate() hasht das Passwort bei jedem Versuch - vorher begrenzen (pro IP und pro IP + Konto)
+    @method_decorator(ratelimit('ip', '20/m'))
+    @method_decorator(ratelimit(ip_and_username, '10/h'))
     def post(self, request):
         username = request.POST.get("username")
         password = request.POST.get("password")
@@ -85,10 +98,13 @@ def user_registrieren(request):
     
     return render(request, "./authapp/registrieren.html", {"form": form})
 
+@ratelimit('ip', '60/m')
 def check_username(request):
-    username = request.GET.get('username', '')
-    exists = User.objects.filter(username__iexact=username).exists()
-    return JsonResponse({'exists': exists})
+    username = request.GET.get('username', '').strip()
+    response = JsonResponse({'exists': usernames.username_exists(username)})
+    # Der Browser darf identische Anfragen kurz selbst beantworten
+    patch_cache_control(response, private=True, max_age=5)
+    return response
 
 def sende_bestaetigungs_email(request, user):
     try:
@@ -99,12 +115,11 @@ def sende_bestaetigungs_email(request, user):
             reverse("authapp:konto_bestaetigen", kwargs={"uidb64": uid, "token": token})
         )
         
-        send_mail(
+        enqueue_mail(
             subject="Kontobestätigung",
             message=f"Bitte bestätigen Sie Ihren Account: {aktivierungs_link}",
             from_email=None,
             recipient_list=[user.email],
-            fail_silently=False
         )
         return True
     except Exception as e:
@@ -160,7 +175,6 @@ def request_organization_access(request):
         if form.is_valid():
             access_request = form.save(commit=False)
             access_request.user = request.user
-            access_request.save()
             
             # E-Mail an Admin senden
             subject = f'Neuer Freischaltungsantrag für {access_request.organization.name}'
@@ -171,13 +185,14 @@ def request_organization_access(request):
             
             Bitte prüfen Sie den Antrag im Admin-Bereich.'''
             
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [admin[1] for admin in settings.ADMINS],
-                fail_silently=False,
-            )
+            with transaction.atomic():
+                access_request.save()
+                enqueue_mail(
+                    subject,
+                    message,
+                    settings.DEFAULT_FROM_EMAIL,
+                    [admin[1] for admin in settings.ADMINS],
+                )
             
             messages.success(request, "Ihr Antrag wurde eingereicht und wird geprüft.")
             return redirect('authapp:organization_list')
@@ -202,7 +217,9 @@ def is_admin(user):
 
 @user_passes_test(is_admin)
 def review_access_requests(request):
-    pending_requests = OrganizationAccessRequest.objects.filter(status='pending')
+    pending_requests = (OrganizationAccessRequest.objects.filter(status='pending')
+                        .select_related('user', 'organization')
+                        .order_by('requested_at'))
     return render(request, 'authapp/review_access_requests.html', {
         'pending_requests': pending_requests,
         'title': 'Freischaltungsanträge prüfen'
@@ -218,25 +235,26 @@ def review_access_request_detail(request, request_id):
             reviewed_request = form.save(commit=False)
             reviewed_request.reviewed_by = request.user
             reviewed_request.reviewed_at = timezone.now()
-            reviewed_request.save()
             
-            # Wenn genehmigt, User zur Organisation hinzufügen
-            if reviewed_request.status == 'approved':
-                user_profile, created = UserProfile.objects.get_or_create(user=reviewed_request.user)
-                user_profile.organizations.add(reviewed_request.organization)
+            with transaction.atomic():
+                reviewed_request.save()
                 
-                # Bestätigungsmail an User
-                subject = f'Freischaltung für {reviewed_request.organization.name}'
-                message = f'''Ihr Freischaltungsantrag für {reviewed_request.organization.name} wurde genehmigt.
-                Sie können jetzt die Registrierungen für Events dieser Organisation einsehen.'''
-                
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [reviewed_request.user.email],
-                    fail_silently=False,
-                )
+                # Wenn genehmigt, User zur Organisation hinzufügen
+                if reviewed_request.status == 'approved':
+                    user_profile, created = UserProfile.objects.get_or_create(user=reviewed_request.user)
+                    user_profile.organizations.add(reviewed_request.organization)
+                    
+                    # Bestätigungsmail an User
+                    subject = f'Freischaltung für {reviewed_request.organization.name}'
+                    message = f'''Ihr Freischaltungsantrag für {reviewed_request.organization.name} wurde genehmigt.
+                    Sie können jetzt die Registrierungen für Events dieser Organisation einsehen.'''
+                    
+                    enqueue_mail(
+                        subject,
+                        message,
+                        settings.DEFAULT_FROM_EMAIL,
+                        [reviewed_request.user.email],
+                    )
             
             messages.success(request, f"Antrag von {reviewed_request.user.username} wurde {reviewed_request.get_status_display()}.")
             return redirect('authapp:review_access_requests')
@@ -1,7 +1,8 @@
 from django.contrib import admin
 
-from .models import EventModel, Organization
+from .models import EventModel, Organization, WaitlistEntry
 
 # Register your models here.
 admin.site.register(Organization)
-admin.site.register(EventModel)
\ No newline at end of file
+admin.site.register(EventModel)
+admin.site.register(WaitlistEntry)
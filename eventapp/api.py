@@ -0,0 +1,147 @@
+# eventapp/api.py - Lesende JSON-API für öffentliche Events (v1)
+import hashlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+
+from .conditional import conditional_response, set_validators
+from .forms import EventFilterForm
+from .models import EventModel
+from .pagination import PAGE_SIZE, paginate_keyset
+
+MAX_PAGE_SIZE = 100
+
+# Öffentlicher Feldname -> Spalte(n) für values_list()
+FIELDS = {
+    'id': ('id',),
+    'title': ('title',),
+    'description': ('description',),
+    'location': ('location',),
+    'target_group': ('target_group',),
+    'start_date': ('start_date',),
+    'end_date': ('end_date',),
+    'event_url': ('event_url',),
+    'registration_required': ('registration_required',),
+    'max_participants': ('max_participants',),
+    'available_spots': ('max_participants', 'reserved_seats'),
+    'organization': ('organization_id', 'organization__name', 'organization__organization_url'),
+    'created_at': ('created_at',),
+    'updated_at': ('updated_at',),
+}
+DEFAULT_FIELDS = ['id', 'title', 'start_date', 'end_date', 'location', 'organization']
+
+
+def _serialize_field(name, values):
+    """Baut den Wert eines öffentlichen Feldes aus den zugehörigen Spaltenwerten"""
+    if name == 'available_spots':
+        max_participants, reserved_seats = values
+        return None if max_participants is None else max(0, max_participants - reserved_seats)
+    if name == 'organization':
+        organization_id, organization_name, organization_url = values
+        if organization_id is None:
+            return None
+        return {'id': organization_id, 'name': organization_name, 'url': organization_url}
+    return values[0]
+
+
+class EventSerializer:
+    """
+    Serialisiert Events direkt aus values_list()-Tupeln, ohne Model-Instanzen.
+    Es werden nur die Spalten der angeforderten Felder abgefragt.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.columns = ['id', 'created_at', 'updated_at']  # immer nötig für Cursor und Last-Modified
+        self.slices = []
+        for name in fields:
+            start = len(self.columns)
+            self.columns.extend(FIELDS[name])
+            self.slices.append((name, start, len(self.columns)))
+
+    def rows(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def serialize(self, row):
+        return {name: _serialize_field(name, row[start:end]) for name, start, end in self.slices}
+
+
+def _parse_fields(request):
+    requested = request.GET.get('fields')
+    if not requested:
+        return DEFAULT_FIELDS, None
+    fields = list(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown:
+        return None, f"Unbekannte Felder: {', '.join(unknown)}"
+    return fields, None
+
+
+def _page_size(request):
+    try:
+        return max(1, min(int(request.GET.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE))
+    except ValueError:
+        return PAGE_SIZE
+
+
+def _error(message, status=400, **extra):
+    return JsonResponse({'error': message, **extra}, status=status)
+
+
+def _respond(request, payload, rows):
+    """
+    JSON-Antwort mit ETag über den Inhalt (wie die iCal-Feeds) - die API ist
+    öffentlich und hängt weder vom Benutzer noch von Mitgliedschaften ab
+    """
+    response = JsonResponse(payload, encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False})
+    etag = '"%s"' % hashlib.md5(response.content).hexdigest()
+    # Spalte 2 ist immer updated_at (siehe EventSerializer)
+    last_modified = max((row[2] for row in rows), default=None)
+    not_modified = conditional_response(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+    return set_validators(response, request, etag, last_modified)
+
+
+def event_list_api(request):
+    fields, error = _parse_fields(request)
+    if error:
+        return _error(error)
+
+    filter_form = EventFilterForm(request.GET)
+    if not filter_form.is_valid():
+        return _error('Ungültige Filter', errors=filter_form.errors.get_json_data())
+    # Die API liefert ausschließlich öffentliche Events
+    events = filter_form.filter_queryset(EventModel.objects.filter(is_public=True))
+
+    serializer = EventSerializer(fields)
+    # Spalten 0 und 1 sind immer id und created_at (siehe EventSerializer)
+    page = paginate_keyset(
+        serializer.rows(events), request.GET.get('after'), request.GET.get('before'), _page_size(request),
+        position=lambda row: (row[1], row[0]),
+    )
+
+    def page_url(**cursor):
+        params = request.GET.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params.update(cursor)
+        return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+    return _respond(request, {
+        'data': [serializer.serialize(row) for row in page],
+        'next': page_url(after=page.next_cursor) if page.has_next else None,
+        'previous': page_url(before=page.previous_cursor) if page.has_previous else None,
+    }, page)
+
+
+def event_detail_api(request, event_id):
+    fields, error = _parse_fields(request)
+    if error:
+        return _error(error)
+
+    serializer = EventSerializer(fields)
+    row = serializer.rows(EventModel.objects.filter(id=event_id, is_public=True)).first()
+    if row is None:
+        return _error('Event nicht gefunden', status=404)
+    return _respond(request, {'data': serializer.serialize(row)}, [row])
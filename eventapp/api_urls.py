@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('events/', api.event_list_api, name='event_list'),
+    path('events/<int:event_id>/', api.event_detail_api, name='event_detail'),
+]
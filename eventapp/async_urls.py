@@ -0,0 +1,21 @@
+# eventapp/async_urls.py - Wie eventapp.urls, die öffentlichen Seiten aber als async Views
+from django.urls import path
+
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+app_name = 'eventapp'
+
+ASYNC_VIEWS = {
+    'event_list': async_views.event_list,
+    'event_detail': async_views.event_detail,
+    'event_registration': async_views.event_registration,
+    'my_registrations': async_views.my_registrations,
+}
+
+# Gleiche Routen und Namen, damit reverse(), SQL_BUDGETS und REPLICA_VIEWS weiter passen
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in sync_urlpatterns
+]
@@ -0,0 +1,154 @@
+# eventapp/async_views.py - Async-Varianten der öffentlichen Event-Seiten (ASGI-Profil)
+"""
+Gleiches Verhalten wie die gleichnamigen Views in eventapp.views, aber die
+Abfragen laufen über die async ORM-API (aget, aaggregate, acount, aiterator), damit ein
+ASGI-Worker in der Wartezeit andere Requests bedienen kann.
+Was synchron bleibt - Session/Messages, Templates, Transaktionen, E-Mail-Ausgang -
+läuft per sync_to_async im Thread des Requests, nie direkt im Event-Loop.
+Eingebunden über eventapp.async_urls (siehe veranstaltungen.asgi).
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.shortcuts import aget_object_or_404, redirect, render
+
+from . import digests, waitlist
+from .conditional import acompute_validators, conditional_response, set_validators
+from .forms import EventFilterForm
+from .forms_old import EmailLookupForm, EventRegistrationForm
+from .fragments import prefetch_event_cards
+from .models import AlreadyRegistered, AlreadyWaiting, EventFull, EventModel, EventRegistration, WaitlistEntry
+from .pagination import apaginate_keyset, keyset_window
+from .views import event_list_queryset, waitlist_message
+
+
+@sync_to_async
+def _not_modified(request, etag, last_modified):
+    # Liest für die Messages ggf. die Session
+    return conditional_response(request, etag, last_modified)
+
+
+@sync_to_async
+def _render(request, template_name, context, etag=None, last_modified=None):
+    # Templates lesen request.user und lazy Relationen - das geht nur synchron
+    response = render(request, template_name, context)
+    if etag:
+        response = set_validators(response, request, etag, last_modified)
+    return response
+
+
+@sync_to_async
+def _filter_events(filter_form):
+    # is_valid() lädt eine gewählte Organisation aus der Datenbank
+    return event_list_queryset(filter_form)
+
+
+@sync_to_async
+def _prepare_cards(events):
+    events = EventModel.resolve_organization_access(events)
+    return prefetch_event_cards(events)
+
+
+async def event_list(request):
+    # Ohne abgeschickten Filter gelten die Voreinstellungen des Formulars (nur öffentliche Events)
+    filter_submitted = any(name in request.GET for name in EventFilterForm.base_fields)
+    filter_form = EventFilterForm(request.GET if filter_submitted else {'only_public': True})
+
+    events = await _filter_events(filter_form)
+    after, before = request.GET.get('after'), request.GET.get('before')
+
+    window, _, _ = keyset_window(events, after, before)
+    etag, last_modified = await acompute_validators(request, window)
+    not_modified = await _not_modified(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    page = await apaginate_keyset(events, after=after, before=before)
+    events = await _prepare_cards(page.object_list)
+    return await _render(request, 'eventapp/event_list.html', {
+        'events': events,
+        'page': page,
+        'filter_form': filter_form,
+    }, etag, last_modified)
+
+
+async def event_detail(request, event_id):
+    validators = EventModel.objects.filter(id=event_id)
+    etag, last_modified = await acompute_validators(request, validators)
+    not_modified = await _not_modified(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    event = await aget_object_or_404(
+        EventModel.objects.select_related('created_by', 'organization').with_registration_stats(),
+        id=event_id,
+    )
+    return await _render(request, 'eventapp/event_detail.html', {'event': event}, etag, last_modified)
+
+
+async def event_registration(request, event_id):
+    event = await aget_object_or_404(EventModel, id=event_id, is_public=True)
+
+    if not event.registration_required:
+        messages.error(request, "Für dieses Event ist keine Anmeldung erforderlich.")
+        return redirect('eventapp:event_detail', event_id=event.id)
+
+    if request.method == 'POST':
+        form = EventRegistrationForm(request.POST)
+        # ModelForm-Validierung prüft ggf. Unique-Constraints per Abfrage
+        if await sync_to_async(form.is_valid)():
+            try:
+                await sync_to_async(event.reserve_seat)(form.save(commit=False))
+            except EventFull:
+                return await join_waitlist(request, event, form.cleaned_data)
+            except AlreadyRegistered:
+                messages.error(request, "Diese E-Mail ist bereits für dieses Event registriert.")
+            else:
+                messages.success(request, "Sie haben sich erfolgreich für das Event angemeldet!")
+                return redirect('eventapp:event_detail', event_id=event.id)
+    else:
+        form = EventRegistrationForm()
+
+    return await _render(request, 'eventapp/event_registration.html', {
+        'form': form,
+        'event': event
+    })
+
+
+async def join_waitlist(request, event, data):
+    entry = WaitlistEntry(first_name=data['first_name'], last_name=data['last_name'], email=data['email'])
+    try:
+        entry = await sync_to_async(waitlist.join)(event, entry, request.build_absolute_uri('/'))
+    except AlreadyRegistered:
+        messages.error(request, "Diese E-Mail ist bereits für dieses Event registriert.")
+    except AlreadyWaiting:
+        messages.info(request, "Diese E-Mail steht bereits auf der Warteliste für dieses Event.")
+    else:
+        if isinstance(entry, EventRegistration):
+            messages.success(request, "Gerade ist ein Platz frei geworden - Sie sind angemeldet!")
+        else:
+            position = await waitlist.waiting_before(entry).acount() + 1
+            messages.success(request, waitlist_message(position))
+    return redirect('eventapp:event_detail', event_id=event.id)
+
+
+async def my_registrations(request):
+    if request.method == 'POST':
+        form = EmailLookupForm(request.POST)
+        if form.is_valid():
+            email = form.cleaned_data['email']
+            try:
+                outcome = await digests.alookup(email, request.build_absolute_uri('/'))
+            except digests.Throttled:
+                messages.error(request, "Zu viele Anfragen. Bitte versuchen Sie es später erneut.")
+                return redirect('eventapp:my_registrations')
+
+            if outcome == digests.NOT_FOUND:
+                messages.info(request, "Für diese E-Mail-Adresse wurden keine Registrierungen gefunden.")
+            else:
+                messages.success(request, "Eine E-Mail mit Ihren Registrierungen wurde an Ihre E-Mail-Adresse gesendet.")
+
+            return redirect('eventapp:event_list')
+    else:
+        form = EmailLookupForm()
+
+    return await _render(request, 'eventapp/my_registrations.html', {'form': form})
@@ -0,0 +1,476 @@
+# eventapp/benchmark.py - Testdaten in realistischer Menge und Latenz-Messung der Lesepfade
+import asyncio
+import io
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from authapp import membership
+from authapp.forms import OrganizationForm, UserProfileForm
+from authapp.templatetags.form_filters import add_class
+from authapp.models import Organization, OrganizationAccessRequest, UserProfile
+from django.conf import settings
+from django.contrib.auth.forms import PasswordChangeForm
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import ical, search
+from .forms import EventForm
+from .forms_old import EventRegistrationForm
+from .models import EventModel, EventRegistration
+
+PREFIX = 'bench'
+ADMIN_USERNAME = f'{PREFIX}_admin'
+ADMIN_PASSWORD = 'benchmark'
+BATCH_SIZE = 1000
+# URLconf des ASGI-Profils (async Views), siehe veranstaltungen.asgi
+ASGI_URLCONF = 'veranstaltungen.asgi_urls'
+
+# Vergleichsprofil für stress_registrations: Djangos SQLite-Standard (Rollback-Journal,
+# synchronous=FULL, BEGIN DEFERRED). journal_mode wird ausdrücklich zurückgesetzt,
+# da WAL in der Datenbankdatei erhalten bleibt.
+BASELINE_SQLITE_OPTIONS = {'init_command': 'PRAGMA journal_mode=DELETE;PRAGMA synchronous=FULL'}
+
+CITIES = ['Berlin', 'Hamburg', 'München', 'Köln', 'Leipzig', 'Dresden', 'Bremen', 'Essen']
+TOPICS = ['Sommerfest', 'Jahreshauptversammlung', 'Fußballturnier', 'Lesung', 'Workshop',
+          'Flohmarkt', 'Konzert', 'Wanderung', 'Vortrag', 'Kinderfest']
+
+
+def _users():
+    return User.objects.filter(username__startswith=f'{PREFIX}_')
+
+
+def is_seeded():
+    return User.objects.filter(username=ADMIN_USERNAME).exists()
+
+
+def clear():
+    """Löscht alle vom Seeder angelegten Daten (erkennbar am Präfix der Benutzernamen)"""
+    users = _users()
+    organizations = Organization.objects.filter(name__startswith='Benchmark-Verein ')
+    with transaction.atomic():
+        EventModel.objects.filter(created_by__in=users).delete()
+        EventModel.objects.filter(organization__in=organizations).delete()
+        user_ids = list(users.values_list('id', flat=True))
+        users.delete()
+        organizations.delete()
+    membership.invalidate(user_ids)
+    search.rebuild_index()
+    ical.invalidate_feeds()
+
+
+def seed(organizations=20, users=500, events=2000, registrations=20, seed=42):
+    """
+    Legt Organisationen, User (mit Profil und Mitgliedschaften), Freischaltungsanträge,
+    Events und Anmeldungen per bulk_create an. Gleicher Seed -> gleiche Daten.
+    registrations ist die maximale Anzahl Anmeldungen pro Event.
+    Gibt die Anzahl der angelegten Zeilen pro Model zurück.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    # bulk_create umgeht save(), daher einmal hashen und für alle User verwenden
+    password = make_password(ADMIN_PASSWORD)
+
+    with transaction.atomic():
+        orgs = Organization.objects.bulk_create(
+            Organization(
+                name=f'Benchmark-Verein {i}',
+                organization_url=f'https://verein{i}.example.com',
+                post_code=f'{rng.randint(10000, 99999)}',
+                city=rng.choice(CITIES),
+                authenticity_checked=rng.random() < 0.8,
+            )
+            for i in range(organizations)
+        )
+
+        admin = User.objects.create_user(ADMIN_USERNAME, f'{ADMIN_USERNAME}@example.com', ADMIN_PASSWORD,
+                                         is_staff=True)
+        admin.profile.organizations.add(orgs[0])
+
+        # bulk_create löst kein post_save aus - Profile selbst anlegen
+        new_users = User.objects.bulk_create(
+            (User(username=f'{PREFIX}_user{i}', email=f'{PREFIX}_user{i}@example.com', password=password)
+             for i in range(users)),
+            batch_size=BATCH_SIZE,
+        )
+        profiles = UserProfile.objects.bulk_create(
+            (UserProfile(user=user) for user in new_users), batch_size=BATCH_SIZE
+        )
+
+        Membership = UserProfile.organizations.through
+        memberships = []
+        access_requests = []
+        for profile in profiles:
+            member_of = rng.sample(orgs, k=min(len(orgs), rng.choice([0, 1, 1, 2])))
+            memberships.extend(Membership(userprofile=profile, organization=org) for org in member_of)
+            candidates = [org for org in orgs if org not in member_of]
+            if candidates and rng.random() < 0.3:
+                access_requests.append(OrganizationAccessRequest(
+                    user_id=profile.user_id,
+                    organization=rng.choice(candidates),
+                    status=rng.choice(['pending', 'pending', 'approved', 'rejected']),
+                    data_consent=True,
+                ))
+        Membership.objects.bulk_create(memberships, batch_size=BATCH_SIZE)
+        OrganizationAccessRequest.objects.bulk_create(access_requests, batch_size=BATCH_SIZE)
+
+        creators = [admin, *new_users]
+        new_events = EventModel.objects.bulk_create(
+            (EventModel(
+                title=f'{rng.choice(TOPICS)} {i}',
+                description=f'{rng.choice(TOPICS)} für alle Mitglieder und Gäste.',
+                location=rng.choice(CITIES),
+                start_date=now + timedelta(days=rng.randint(-60, 365), hours=rng.randint(8, 20)),
+                organization=rng.choice(orgs) if rng.random() < 0.8 else None,
+                created_by=rng.choice(creators),
+                is_public=rng.random() < 0.85,
+                registration_required=rng.random() < 0.6,
+                max_participants=rng.choice([None, 20, 50, 100]),
+            ) for i in range(events)),
+            batch_size=BATCH_SIZE,
+        )
+
+        new_registrations = []
+        for event in new_events:
+            limit = event.max_participants or registrations
+            for j in range(rng.randint(0, min(limit, registrations))):
+                new_registrations.append(EventRegistration(
+                    event=event,
+                    first_name='Teilnehmer',
+                    last_name=str(j),
+                    email=f'{PREFIX}_teilnehmer{rng.randint(0, users * 5)}@example.com',
+                ))
+        # Doppelte (event, email)-Paare aus dem Zufall überspringen
+        EventRegistration.objects.bulk_create(new_registrations, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+        EventModel.objects.filter(created_by__in=_users()).sync_seat_counters()
+
+    # Signale von Suche und Feeds wurden durch bulk_create umgangen
+    search.rebuild_index()
+    ical.invalidate_feeds()
+    return {
+        'organizations': len(orgs),
+        'users': len(new_users) + 1,
+        'memberships': len(memberships) + 1,
+        'access_requests': len(access_requests),
+        'events': len(new_events),
+        'registrations': EventRegistration.objects.filter(event__created_by__in=_users()).count(),
+    }
+
+
+def benchmark_urls():
+    """Die gemessenen Lesepfade: Name -> Liste von URLs (werden reihum abgerufen)"""
+    admin = User.objects.get(username=ADMIN_USERNAME)
+    organization_id = admin.profile.organizations.values_list('id', flat=True).first()
+    event_ids = list(EventModel.objects.filter(is_public=True).order_by('id').values_list('id', flat=True)[:50])
+    return {
+        'eventapp:event_list': [reverse('eventapp:event_list')],
+        'eventapp:event_detail': [reverse('eventapp:event_detail', args=[pk]) for pk in event_ids],
+        'eventapp:organization_registrations': [
+            reverse('eventapp:organization_registrations', args=[organization_id])
+        ],
+        'authapp:organization_list': [reverse('authapp:organization_list')],
+        'authapp:review_access_requests': [reverse('authapp:review_access_requests')],
+    }
+
+
+def _percentile(quantiles, p):
+    return round(quantiles[p - 1], 2)
+
+
+def _host():
+    return (settings.ALLOWED_HOSTS or ['localhost'])[0].lstrip('.')
+
+
+def run(iterations=50, warmup=5):
+    """
+    Ruft jede URL mit dem Django-Testclient (als Benchmark-Admin angemeldet) auf
+    und liefert Latenz-Perzentile und Abfragen pro Request als dict (JSON-fähig).
+    """
+    client = Client(SERVER_NAME=_host())
+    client.force_login(User.objects.get(username=ADMIN_USERNAME))
+
+    results = {}
+    for name, urls in benchmark_urls().items():
+        for i in range(warmup):
+            client.get(urls[i % len(urls)])
+
+        timings = []
+        query_counts = []
+        statuses = set()
+        for i in range(iterations):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(urls[i % len(urls)])
+                timings.append((time.perf_counter() - start) * 1000)
+            query_counts.append(len(queries))
+            statuses.add(response.status_code)
+
+        quantiles = statistics.quantiles(timings, n=100, method='inclusive')
+        results[name] = {
+            'urls': len(urls),
+            'status': sorted(statuses),
+            'p50_ms': _percentile(quantiles, 50),
+            'p95_ms': _percentile(quantiles, 95),
+            'p99_ms': _percentile(quantiles, 99),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'queries_min': min(query_counts),
+            'queries_max': max(query_counts),
+            'queries_mean': round(statistics.fmean(query_counts), 2),
+        }
+
+    return {
+        'timestamp': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'iterations': iterations,
+        'data': {
+            'organizations': Organization.objects.count(),
+            'users': User.objects.count(),
+            'events': EventModel.objects.count(),
+            'registrations': EventRegistration.objects.count(),
+        },
+        'results': results,
+    }
+
+
+def stress_registrations(threads=8, seconds=5.0, options=None):
+    """
+    Meldet aus mehreren Threads (je eine eigene Verbindung) so schnell wie möglich
+    Teilnehmer über EventModel.reserve_seat an einem Wegwerf-Event an.
+    options ersetzt für den Lauf DATABASES['default']['OPTIONS'] (None = wie konfiguriert).
+    Liefert Anmeldungen pro Sekunde und die Zahl der "database is locked"-Fehler.
+    """
+    settings_dict = connections[DEFAULT_DB_ALIAS].settings_dict
+    configured = settings_dict.get('OPTIONS', {})
+    connections.close_all()
+    if options is not None:
+        # Neue Verbindungen (auch die der Threads) übernehmen die Optionen beim Öffnen
+        settings_dict['OPTIONS'] = options
+
+    event = EventModel.objects.create(
+        title='Stresstest', start_date=timezone.now(), is_public=False, registration_required=True,
+    )
+    journal_mode = connection.cursor().execute('PRAGMA journal_mode').fetchone()[0]
+    counts = {'registrations': 0, 'locked': 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(number):
+        created = locked = 0
+        barrier.wait()
+        deadline = time.monotonic() + seconds
+        try:
+            while time.monotonic() < deadline:
+                registration = EventRegistration(
+                    first_name='Stress', last_name=str(created),
+                    email=f'stress-{number}-{created}-{locked}@example.com',
+                )
+                try:
+                    EventModel.objects.get(pk=event.pk).reserve_seat(registration)
+                    created += 1
+                except OperationalError:
+                    locked += 1
+        finally:
+            connection.close()
+        with lock:
+            counts['registrations'] += created
+            counts['locked'] += locked
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.monotonic()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    try:
+        event.delete()
+    finally:
+        connections.close_all()
+        settings_dict['OPTIONS'] = configured
+    return {
+        'journal_mode': journal_mode,
+        'threads': threads,
+        'seconds': round(elapsed, 2),
+        'registrations': counts['registrations'],
+        'per_second': round(counts['registrations'] / elapsed, 1),
+        'locked_errors': counts['locked'],
+    }
+
+
+def _render_fields(form):
+    return ''.join(str(field) for field in form)
+
+
+def _render_with_add_class(form):
+    return ''.join(add_class(field, 'w-full px-3 py-2 border border-gray-300 rounded-md') for field in form)
+
+
+def form_render_timings(iterations=500):
+    """
+    Micro-Benchmark: mittlere Zeit pro Formular in Mikrosekunden für Aufbau (init)
+    und Rendern aller Felder (render), so wie die Templates sie einzeln ausgeben.
+    """
+    user = User(username='benchmark')
+    cases = {
+        'UserProfileForm': (UserProfileForm, _render_fields),
+        'EventForm': (lambda: EventForm(user=None), _render_fields),
+        'EventRegistrationForm': (EventRegistrationForm, _render_fields),
+        'OrganizationForm': (OrganizationForm, _render_fields),
+        'PasswordChangeForm|add_class': (lambda: PasswordChangeForm(user), _render_with_add_class),
+    }
+    results = {}
+    for name, (build, render) in cases.items():
+        render(build())  # Aufwärmen (Template-Loader, Caches)
+        init_time = render_time = 0.0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            form = build()
+            built = time.perf_counter()
+            render(form)
+            init_time += built - start
+            render_time += time.perf_counter() - built
+        results[name] = {
+            'init_us': round(init_time / iterations * 1e6, 1),
+            'render_us': round(render_time / iterations * 1e6, 1),
+        }
+    return results
+
+
+def throughput_urls():
+    """Die öffentlichen Seiten, die es auch als async Views gibt (ohne Anmeldung abrufbar)"""
+    events = EventModel.objects.filter(is_public=True).order_by('id')
+    event_ids = list(events.values_list('id', flat=True)[:20])
+    registration_ids = list(events.filter(registration_required=True).values_list('id', flat=True)[:5])
+    return [
+        reverse('eventapp:event_list'),
+        reverse('eventapp:my_registrations'),
+        *(reverse('eventapp:event_detail', args=[pk]) for pk in event_ids),
+        *(reverse('eventapp:event_registration', args=[pk]) for pk in registration_ids),
+    ]
+
+
+def _throughput_result(timings, statuses, elapsed):
+    quantiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'requests': len(timings),
+        'seconds': round(elapsed, 2),
+        'per_second': round(len(timings) / elapsed, 1),
+        'p50_ms': _percentile(quantiles, 50),
+        'p95_ms': _percentile(quantiles, 95),
+        'status': sorted(set(statuses)),
+    }
+
+
+def wsgi_throughput(urls, concurrency=16, requests=400):
+    """
+    Ruft die URLs über den WSGI-Handler aus concurrency Threads auf,
+    wie ein Thread-basierter WSGI-Server (z.B. gunicorn --threads).
+    """
+    application = get_wsgi_application()
+    host = _host()
+
+    def request(path):
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+            'SERVER_NAME': host, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.input': io.BytesIO(), 'wsgi.errors': io.StringIO(), 'wsgi.url_scheme': 'http',
+        }
+        status = []
+        start = time.perf_counter()
+        response = application(environ, lambda s, headers, exc_info=None: status.append(int(s[:3])))
+        try:
+            b''.join(response)
+        finally:
+            # Löst request_finished aus (schließt u.a. die DB-Verbindung)
+            response.close()
+        return (time.perf_counter() - start) * 1000, status[0]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(request, (urls[i % len(urls)] for i in range(requests))))
+    elapsed = time.perf_counter() - start
+    connections.close_all()
+    return _throughput_result([r[0] for r in results], [r[1] for r in results], elapsed)
+
+
+async def _asgi_requests(application, urls, concurrency, requests):
+    host = _host().encode()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(path):
+        async with semaphore:
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+                'root_path': '', 'query_string': b'', 'headers': [(b'host', host)],
+                'server': (host.decode(), 80), 'client': ('127.0.0.1', 50000),
+            }
+            done = asyncio.Event()
+            status = []
+            body_received = False
+
+            async def receive():
+                nonlocal body_received
+                if not body_received:
+                    body_received = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # Der Handler wartet parallel auf einen Verbindungsabbruch
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif not message.get('more_body'):
+                    done.set()
+
+            start = time.perf_counter()
+            await application(scope, receive, send)
+            return (time.perf_counter() - start) * 1000, status[0]
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(request(urls[i % len(urls)]) for i in range(requests)))
+    return results, time.perf_counter() - start
+
+
+def asgi_throughput(urls, concurrency=16, requests=400):
+    """
+    Ruft dieselben URLs über den ASGI-Handler mit den async Views auf,
+    höchstens concurrency Requests gleichzeitig in einem Event-Loop
+    (wie ein uvicorn-Worker).
+    """
+    with override_settings(ROOT_URLCONF=ASGI_URLCONF):
+        application = get_asgi_application()
+        results, elapsed = asyncio.run(_asgi_requests(application, urls, concurrency, requests))
+    connections.close_all()
+    return _throughput_result([r[0] for r in results], [r[1] for r in results], elapsed)
+
+
+def server_throughput(concurrency=16, requests=400, warmup=20):
+    """
+    Vergleicht Requests pro Sekunde unter gleichzeitiger Last: WSGI (sync Views, Threads)
+    gegen ASGI (async Views, Event-Loop). Gemessen wird die Anwendung im Prozess,
+    ohne Netzwerk und ohne den eigentlichen Server.
+    """
+    urls = throughput_urls()
+    wsgi_throughput(urls, concurrency, warmup)
+    asgi_throughput(urls, concurrency, warmup)
+    return {
+        'timestamp': timezone.now().isoformat(),
+        'concurrency': concurrency,
+        'urls': len(urls),
+        'wsgi': wsgi_throughput(urls, concurrency, requests),
+        'asgi': asgi_throughput(urls, concurrency, requests),
+    }
@@ -0,0 +1,73 @@
+# eventapp/conditional.py - ETag/Last-Modified für Event-Liste und -Detail
+import hashlib
+
+from authapp import membership
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+# Bei Änderungen an den Templates erhöhen, damit alte ETags ungültig werden
+VALIDATOR_VERSION = 2
+
+
+def _validator_queryset(queryset):
+    return queryset.model.objects.filter(pk__in=queryset.values('pk'))
+
+
+def _validator_aggregates():
+    return {
+        'count': Count('pk'),
+        'id_sum': Sum('pk'),
+        'last_modified': Max('updated_at'),
+        'version_sum': Sum('registration_version'),
+    }
+
+
+def _etag(request, user, stats, directory_version):
+    # Die Seite hängt auch von URL (Filterwerte im Formular), Benutzer (Navigation) und
+    # membership.version() ab (Berechtigungs-Badges, Organisationsnamen, Organisationsauswahl im Filter)
+    raw = (
+        f"{VALIDATOR_VERSION}:{request.get_full_path()}:{user.pk}:{directory_version}:"
+        f"{stats['count']}:{stats['id_sum']}:{stats['last_modified']}:{stats['version_sum']}"
+    )
+    return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def compute_validators(request, queryset):
+    """
+    Berechnet (etag, last_modified) für die Events im Queryset mit einer
+    einzigen Aggregat-Abfrage über die Primärschlüssel - ohne zu rendern.
+    """
+    stats = _validator_queryset(queryset).aggregate(**_validator_aggregates())
+    return _etag(request, request.user, stats, membership.version()), stats['last_modified']
+
+
+async def acompute_validators(request, queryset):
+    """Async-Variante von compute_validators() für die ASGI-Views"""
+    stats = await _validator_queryset(queryset).aaggregate(**_validator_aggregates())
+    return _etag(request, await request.auser(), stats, await membership.aversion()), stats['last_modified']
+
+
+def conditional_response(request, etag, last_modified):
+    """
+    Gibt eine 304-Antwort zurück, wenn der Client die aktuelle Version hat.
+    Stehen noch Messages an, wird immer gerendert, damit sie nicht verloren gehen.
+    """
+    if get_messages(request):
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, request, etag, last_modified):
+    """Setzt ETag/Last-Modified; Clients müssen vor jeder Wiederverwendung nachfragen"""
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        if request.user.is_authenticated:
+            patch_cache_control(response, no_cache=True, private=True)
+        else:
+            patch_cache_control(response, no_cache=True)
+    return response
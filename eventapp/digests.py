@@ -0,0 +1,186 @@
+# eventapp/digests.py - "Meine Registrierungen": gedrosselte, zusammengefasste Übersichts-Mails
+"""
+Jede Abfrage einer Adresse kostet eine Datenbankabfrage und eine E-Mail. Wurde
+die Übersicht für diese Adresse innerhalb von REGISTRATION_DIGEST_WINDOW schon
+angefordert, bekommt die Anfrage dasselbe Ergebnis ohne neue Abfrage und Mail.
+Wie oft das Formular pro IP abgeschickt werden darf, begrenzt settings.RATELIMITS.
+Pro Adresse zählen nur Abfragen, die wirklich die Datenbank erreichen
+(LOOKUP_RATE_PER_ADDRESS) - zusammengefasste Anfragen kosten nichts, so kann
+niemand mit ein paar Anfragen die Adresse eines anderen sperren.
+Für die async View gibt es jeweils eine Variante mit a-Präfix.
+"""
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from mailapp.outbox import enqueue_mail
+from veranstaltungen import ratelimit
+
+from . import waitlist
+from .importers import normalize_email
+from .models import EventRegistration, WaitlistEntry
+
+# Ergebnis einer Abfrage, solange das Fenster läuft
+PENDING = 'pending'  # Abfrage läuft gerade (gleichzeitige Anfrage)
+SENT = 'sent'
+NOT_FOUND = 'not_found'
+
+DEFAULT_WINDOW = 10 * 60
+# Höchstens eine Abfrage pro Fenster und Adresse, darüber hinaus 24 am Stück, dann eine pro Stunde
+LOOKUP_RATE_PER_ADDRESS = '24/d'
+
+
+class Throttled(Exception):
+    """Zu viele Abfragen für diese Adresse"""
+
+
+def _hash(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def _window():
+    return getattr(settings, 'REGISTRATION_DIGEST_WINDOW', DEFAULT_WINDOW)
+
+
+def _digest_key(email):
+    return f'eventapp:lookup:digest:{_hash(email)}'
+
+
+def lookup(email, base_url):
+    """
+    Verschickt die Übersicht für email, höchstens einmal pro Fenster.
+    Gibt SENT bzw. NOT_FOUND zurück (auch für zusammengefasste Anfragen), wirft Throttled.
+    """
+    # Einmal normalisieren - Cache-Key und Abfrage verwenden dieselbe Adresse
+    email = normalize_email(email)
+    outcome = claim(email)
+    if outcome:
+        return outcome
+    if ratelimit.take('eventapp:my_registrations', 'email', email, LOOKUP_RATE_PER_ADDRESS):
+        release(email)
+        raise Throttled()
+    try:
+        outcome = send(email, base_url)
+    except Exception:
+        release(email)
+        raise
+    finish(email, outcome)
+    return outcome
+
+
+async def alookup(email, base_url):
+    """Async-Variante von lookup()"""
+    email = normalize_email(email)
+    outcome = await aclaim(email)
+    if outcome:
+        return outcome
+    if await sync_to_async(ratelimit.take)('eventapp:my_registrations', 'email', email, LOOKUP_RATE_PER_ADDRESS):
+        await arelease(email)
+        raise Throttled()
+    try:
+        outcome = await asend(email, base_url)
+    except Exception:
+        await arelease(email)
+        raise
+    await afinish(email, outcome)
+    return outcome
+
+
+def claim(email):
+    """
+    Vor der Datenbankabfrage aufrufen. Gibt das Ergebnis einer laufenden oder
+    kürzlichen Abfrage derselben Adresse zurück (dann nichts weiter tun) oder
+    None - dann abfragen und finish() aufrufen.
+    """
+    outcome = cache.get(_digest_key(email))
+    if outcome:
+        return outcome
+    # Zwei gleichzeitige Anfragen: nur eine fragt ab
+    if not cache.add(_digest_key(email), PENDING, _window()):
+        return cache.get(_digest_key(email)) or PENDING
+    return None
+
+
+async def aclaim(email):
+    """Async-Variante von claim()"""
+    outcome = await cache.aget(_digest_key(email))
+    if outcome:
+        return outcome
+    if not await cache.aadd(_digest_key(email), PENDING, _window()):
+        return await cache.aget(_digest_key(email)) or PENDING
+    return None
+
+
+def finish(email, outcome):
+    """Merkt sich das Ergebnis (SENT oder NOT_FOUND) für den Rest des Fensters"""
+    cache.set(_digest_key(email), outcome, _window())
+
+
+async def afinish(email, outcome):
+    await cache.aset(_digest_key(email), outcome, _window())
+
+
+def release(email):
+    """Gibt die Adresse wieder frei, wenn die Abfrage fehlgeschlagen ist"""
+    cache.delete(_digest_key(email))
+
+
+async def arelease(email):
+    await cache.adelete(_digest_key(email))
+
+
+def forget(email):
+    """
+    Verwirft das gemerkte Ergebnis einer Adresse (siehe eventapp.models), sonst
+    hieße es nach einer neuen Anmeldung bis zum Ende des Fensters weiter "nichts gefunden"
+    """
+    cache.delete(_digest_key(normalize_email(email)))
+
+
+def registrations_mail(registrations, waiting, base_url):
+    """Betreff und Text der E-Mail mit allen Registrierungen und Wartelistenplätzen einer Adresse"""
+    sections = []
+    if registrations:
+        event_list = "\n".join([
+            f"- {reg.event.title} am {reg.event.start_date.strftime('%d.%m.%Y %H:%M')}\n"
+            f"  Abmelden: {waitlist.cancel_url(reg, base_url)}"
+            for reg in registrations
+        ])
+        sections.append(f"Sie haben sich für folgende Events registriert:\n\n{event_list}")
+    if waiting:
+        waiting_list = "\n".join([
+            f"- {entry.event.title} am {entry.event.start_date.strftime('%d.%m.%Y %H:%M')}\n"
+            f"  Von der Warteliste austragen: {waitlist.cancel_url(entry, base_url)}"
+            for entry in waiting
+        ])
+        sections.append(f"Auf der Warteliste stehen Sie für:\n\n{waiting_list}")
+
+    subject = 'Ihre Event-Registrierungen'
+    body = "\n\n".join(sections)
+    message = f'''Hallo,\n\n{body}\n\nMit freundlichen Grüßen\nIhr Veranstaltungsteam'''
+    return subject, message
+
+
+def send(email, base_url):
+    """Fragt Anmeldungen und Wartelistenplätze ab und legt die Übersicht in den E-Mail-Ausgang"""
+    registrations = list(EventRegistration.objects.filter(email=email).select_related('event'))
+    waiting = list(WaitlistEntry.objects.filter(email=email).select_related('event'))
+    if not (registrations or waiting):
+        return NOT_FOUND
+    subject, message = registrations_mail(registrations, waiting, base_url)
+    enqueue_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [email])
+    return SENT
+
+
+async def asend(email, base_url):
+    registrations = EventRegistration.objects.filter(email=email).select_related('event')
+    registrations = [reg async for reg in registrations.aiterator()]
+    waiting = WaitlistEntry.objects.filter(email=email).select_related('event')
+    waiting = [entry async for entry in waiting.aiterator()]
+    if not (registrations or waiting):
+        return NOT_FOUND
+    subject, message = registrations_mail(registrations, waiting, base_url)
+    # Der Eintrag im E-Mail-Ausgang ist ein INSERT - nicht im Event-Loop ausführen
+    await sync_to_async(enqueue_mail)(subject, message, settings.DEFAULT_FROM_EMAIL, [email])
+    return SENT
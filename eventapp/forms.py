@@ -1,12 +1,21 @@
 # eventapp/forms.py - Korrigierte Version
-from authapp.models import Organization, UserProfile
+from datetime import datetime, time, timedelta
+
+from authapp import membership
+from authapp.models import Organization
 from django import forms
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from veranstaltungen import form_styles
+from veranstaltungen.form_styles import StyledFormMixin
+from veranstaltungen.tracing import TracedFormMixin, annotate
 
 from .models import EventModel, EventRegistration
 
 
-class EventForm(forms.ModelForm):
+class EventForm(TracedFormMixin, StyledFormMixin, forms.ModelForm):
+    widget_class = 'form-control'
+
     class Meta:
         model = EventModel
         fields = ['title', 'description', 'location', 'target_group', 'start_date',
@@ -14,20 +23,15 @@ class EventForm(forms.ModelForm):
                   'registration_required', 'max_participants']
         widgets = {
             'start_date': forms.DateTimeInput(
-                attrs={'type': 'datetime-local', 'class': 'form-control'}
+                attrs={'type': 'datetime-local'}
             ),
             'end_date': forms.DateTimeInput(
-                attrs={'type': 'datetime-local', 'class': 'form-control'}
+                attrs={'type': 'datetime-local'}
             ),
             'description': forms.Textarea(
-                attrs={'rows': 4, 'class': 'form-control'}
+                attrs={'rows': 4}
             ),
-            'title': forms.TextInput(attrs={'class': 'form-control'}),
-            'location': forms.TextInput(attrs={'class': 'form-control'}),
-            'target_group': forms.TextInput(attrs={'class': 'form-control'}),
-            'event_url': forms.URLInput(attrs={'class': 'form-control'}),
-            'organization': forms.Select(attrs={'class': 'form-control'}),
-            'max_participants': forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
+            'max_participants': forms.NumberInput(attrs={'min': '1'}),
         }
         labels = {
             'title': 'Veranstaltungstitel',
@@ -47,9 +51,7 @@ class EventForm(forms.ModelForm):
         # User aus kwargs extrahieren
         self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
-        
-        # DEBUG: Temporär hinzufügen
-        print(f"DEBUG FORM: User = {self.user}")
+        annotate(user=self.user.pk if self.user else None)
         
         # Felder optional machen
         self.fields['event_url'].required = False
@@ -62,25 +64,18 @@ class EventForm(forms.ModelForm):
         
         # Wenn User vorhanden ist, Organization-Queryset filtern
         if self.user and self.user.is_authenticated:
-            try:
-                user_profile, created = UserProfile.objects.get_or_create(user=self.user)
-                # DEBUG
-                print(f"DEBUG FORM: UserProfile gefunden/erstellt, Organizations: {user_profile.organizations.all()}")
-                
-                # Nur Organisationen anzeigen, für die der User freigeschaltet ist
-                if user_profile.organizations.exists():
-                    self.fields['organization'].queryset = user_profile.organizations.all()
-                    self.fields['organization'].empty_label = "-- Wählen Sie eine Organisation --"
-                else:
-                    # Wenn keine Organisationen freigeschaltet sind, feld deaktivieren
-                    self.fields['organization'].queryset = Organization.objects.none()
-                    self.fields['organization'].empty_label = "-- Keine Organisationen verfügbar --"
-                    self.fields['organization'].help_text = "Sie sind für keine Organisation freigeschaltet."
-                    
-            except Exception as e:
-                print(f"DEBUG FORM: Fehler beim Abrufen des UserProfiles: {e}")
+            organization_ids = membership.organization_ids_for(self.user)
+            annotate(organizations=sorted(organization_ids))
+            
+            # Nur Organisationen anzeigen, für die der User freigeschaltet ist
+            if organization_ids:
+                self.fields['organization'].queryset = membership.organizations_for(self.user)
+                self.fields['organization'].empty_label = "-- Wählen Sie eine Organisation --"
+            else:
+                # Wenn keine Organisationen freigeschaltet sind, feld deaktivieren
                 self.fields['organization'].queryset = Organization.objects.none()
                 self.fields['organization'].empty_label = "-- Keine Organisationen verfügbar --"
+                self.fields['organization'].help_text = "Sie sind für keine Organisation freigeschaltet."
         else:
             # Wenn kein User, alle Organisationen deaktivieren
             self.fields['organization'].queryset = Organization.objects.none()
@@ -113,48 +108,34 @@ class EventForm(forms.ModelForm):
         # Validierung: Organisation prüfen
         organization = cleaned_data.get('organization')
         if organization and self.user:
-            try:
-                user_profile = UserProfile.objects.get(user=self.user)
-                if organization not in user_profile.organizations.all():
-                    raise ValidationError(
-                        f"Sie sind nicht für die Organisation '{organization.name}' freigeschaltet."
-                    )
-            except UserProfile.DoesNotExist:
-                raise ValidationError("Benutzerprofil nicht gefunden.")
+            if not membership.is_member(self.user, organization):
+                raise ValidationError(
+                    f"Sie sind nicht für die Organisation '{organization.name}' freigeschaltet."
+                )
         
         return cleaned_data
 
 
-class EventRegistrationForm(forms.ModelForm):
+class EventRegistrationForm(TracedFormMixin, StyledFormMixin, forms.ModelForm):
+    widget_class = 'form-control'
+
     class Meta:
         model = EventRegistration
-        fields = ['first_name', 'last_name', 'email', 'phone', 'notes']
+        fields = ['first_name', 'last_name', 'email']
         widgets = {
-            'first_name': forms.TextInput(attrs={'class': 'form-control', 'required': True}),
-            'last_name': forms.TextInput(attrs={'class': 'form-control', 'required': True}),
-            'email': forms.EmailInput(attrs={'class': 'form-control', 'required': True}),
-            'phone': forms.TextInput(attrs={'class': 'form-control'}),
-            'notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
+            'first_name': forms.TextInput(attrs={'required': True}),
+            'last_name': forms.TextInput(attrs={'required': True}),
+            'email': forms.EmailInput(attrs={'required': True}),
         }
         labels = {
             'first_name': 'Vorname',
             'last_name': 'Nachname',
             'email': 'E-Mail-Adresse',
-            'phone': 'Telefonnummer',
-            'notes': 'Bemerkungen',
         }
         help_texts = {
             'email': 'Wir verwenden Ihre E-Mail-Adresse für die Anmeldebestätigung.',
-            'phone': 'Optional: Für Rückfragen',
-            'notes': 'Optional: Besondere Anforderungen oder Bemerkungen',
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # Telefon und Notizen optional machen
-        self.fields['phone'].required = False
-        self.fields['notes'].required = False
-
     def clean_email(self):
         email = self.cleaned_data.get('email')
         if email:
@@ -163,11 +144,12 @@ class EventRegistrationForm(forms.ModelForm):
         return email
 
 
-class EmailLookupForm(forms.Form):
+class EmailLookupForm(StyledFormMixin, forms.Form):
+    widget_class = 'form-control'
+
     email = forms.EmailField(
         label='E-Mail-Adresse',
         widget=forms.EmailInput(attrs={
-            'class': 'form-control',
             'placeholder': 'ihre.email@beispiel.de',
             'required': True
         }),
@@ -182,21 +164,34 @@ class EmailLookupForm(forms.Form):
         return email
 
 
-class EventFilterForm(forms.Form):
+class RegistrationImportForm(StyledFormMixin, forms.Form):
+    widget_class = form_styles.INPUT_PLAIN
+
+    csv_file = forms.FileField(
+        label='CSV-Datei',
+        help_text='Spalten: Vorname, Nachname, E-Mail (Trennzeichen Komma oder Semikolon, UTF-8)',
+        widget=forms.ClearableFileInput(attrs={
+            'accept': '.csv,text/csv',
+        }),
+    )
+
+
+class EventFilterForm(TracedFormMixin, StyledFormMixin, forms.Form):
     """Optional: Formular zum Filtern von Events in der Liste"""
+    widget_class = form_styles.INPUT_PLAIN
+    checkbox_class = form_styles.CHECKBOX
+
     organization = forms.ModelChoiceField(
         queryset=Organization.objects.all(),
         required=False,
         empty_label="-- Alle Organisationen --",
-        widget=forms.Select(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'}),
         label='Organisation'
     )
     
     search = forms.CharField(
         required=False,
         widget=forms.TextInput(attrs={
-            'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
-            'placeholder': 'Suche nach Titel oder Beschreibung...'
+            'placeholder': 'Suche nach Titel, Beschreibung oder Ort...'
         }),
         label='Suche'
     )
@@ -205,7 +200,6 @@ class EventFilterForm(forms.Form):
         required=False,
         widget=forms.DateInput(attrs={
             'type': 'date',
-            'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
         }),
         label='Von Datum'
     )
@@ -214,7 +208,6 @@ class EventFilterForm(forms.Form):
         required=False,
         widget=forms.DateInput(attrs={
             'type': 'date',
-            'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
         }),
         label='Bis Datum'
     )
@@ -222,12 +215,37 @@ class EventFilterForm(forms.Form):
     only_public = forms.BooleanField(
         required=False,
         initial=True,
-        widget=forms.CheckboxInput(attrs={'class': 'w-4 h-4 text-blue-600 border-gray-300 rounded focus:ring-blue-500'}),
         label='Nur öffentliche Events'
     )
     
     registration_open = forms.BooleanField(
         required=False,
-        widget=forms.CheckboxInput(attrs={'class': 'w-4 h-4 text-blue-600 border-gray-300 rounded focus:ring-blue-500'}),
         label='Nur Events mit offener Anmeldung'
-    )
\ No newline at end of file
+    )
+
+    def filter_queryset(self, queryset):
+        """Wendet die Filter serverseitig auf ein Event-Queryset an"""
+        if not self.is_valid():
+            # Ungültige Eingaben (z.B. ein falsches Datum) fallen auf die Voreinstellung zurück: nur öffentliche Events
+            return queryset.filter(is_public=True)
+        data = self.cleaned_data
+        
+        if data.get('only_public'):
+            queryset = queryset.filter(is_public=True)
+        # Datumsgrenzen als Zeitpunkte, damit der Index auf start_date greift (kein __date)
+        if data.get('date_from'):
+            queryset = queryset.filter(start_date__gte=self._day_start(data['date_from']))
+        if data.get('date_to'):
+            queryset = queryset.filter(start_date__lt=self._day_start(data['date_to'] + timedelta(days=1)))
+        if data.get('organization'):
+            queryset = queryset.filter(organization=data['organization'])
+        if data.get('search'):
+            queryset = queryset.search(data['search'])
+        if data.get('registration_open'):
+            # Platzzähler statt Count über die Anmeldungen (kein JOIN/GROUP BY)
+            queryset = queryset.filter(registration_required=True).with_free_seat()
+        return queryset
+
+    @staticmethod
+    def _day_start(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
@@ -1,11 +1,14 @@
 # eventapp/forms.py - Korrigierte Version
-from authapp.models import UserProfile
+from authapp import membership
 from django import forms
+from veranstaltungen import form_styles
+from veranstaltungen.form_styles import StyledFormMixin
+from veranstaltungen.tracing import TracedFormMixin, annotate
 
 from .models import EventModel, EventRegistration
 
 
-class EventForm(forms.ModelForm):
+class EventForm(TracedFormMixin, forms.ModelForm):
     class Meta:
         model = EventModel
         fields = ['title','description','location','target_group', 'start_date',
@@ -16,9 +19,7 @@ class EventForm(forms.ModelForm):
         # User aus kwargs extrahieren
         self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
-        
-        # DEBUG: Temporär hinzufügen
-        print(f"DEBUG: User = {self.user}")
+        annotate(user=self.user.pk if self.user else None)
         
         # Felder optional machen
         self.fields['event_url'].required = False
@@ -37,51 +38,47 @@ class EventForm(forms.ModelForm):
         
         # Organisationsauswahl auf berechtigte Organisationen beschränken (NUR EINMAL!)
         if self.user:
-            try:
-                user_profile = UserProfile.objects.get(user=self.user)
-                authorized_orgs = user_profile.organizations.all()
-                
-                # DEBUG: Temporär hinzufügen
-                print(f"DEBUG: UserProfile gefunden: {user_profile}")
-                print(f"DEBUG: Berechtigte Organisationen: {list(authorized_orgs)}")
-                
-                # Queryset für Organization-Field setzen
-                self.fields['organization'].queryset = authorized_orgs
-                
-                if not authorized_orgs.exists():
-                    # Wenn keine Organisationen verfügbar, Hinweis hinzufügen
-                    self.fields['organization'].help_text = (
-                        "Sie sind für keine Organisation freigeschaltet. "
-                        "Beantragen Sie Zugriff über die Organisationsliste."
-                    )
-                    self.fields['organization'].widget.attrs['disabled'] = True
-                
-            except UserProfile.DoesNotExist:
-                # Wenn kein UserProfile existiert, alle Organisationen ausblenden
-                from authapp.models import Organization
-                self.fields['organization'].queryset = Organization.objects.none()
-                self.fields['organization'].help_text = "Bitte vervollständigen Sie zunächst Ihr Profil."
+            authorized_orgs = membership.organizations_for(self.user)
+            annotate(organizations=sorted(membership.organization_ids_for(self.user)))
+            
+            # Queryset für Organization-Field setzen
+            self.fields['organization'].queryset = authorized_orgs
+            
+            if not membership.organization_ids_for(self.user):
+                # Wenn keine Organisationen verfügbar, Hinweis hinzufügen
+                self.fields['organization'].help_text = (
+                    "Sie sind für keine Organisation freigeschaltet. "
+                    "Beantragen Sie Zugriff über die Organisationsliste."
+                )
                 self.fields['organization'].widget.attrs['disabled'] = True
 
 
-class EventRegistrationForm(forms.ModelForm):
+class EventRegistrationForm(TracedFormMixin, StyledFormMixin, forms.ModelForm):
+    widget_class = form_styles.INPUT
+
     class Meta:
         model = EventRegistration
         fields = ['first_name', 'last_name', 'email']
-        
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        for field in self.fields:
-            self.fields[field].widget.attrs.update({
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500'
-            })
 
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email:
+            # E-Mail in Kleinbuchstaben normalisieren - der (event, email)-Constraint unterscheidet Groß/Klein
+            email = email.lower().strip()
+        return email
+
+
+class EmailLookupForm(TracedFormMixin, StyledFormMixin, forms.Form):
+    widget_class = form_styles.INPUT
 
-class EmailLookupForm(forms.Form):
     email = forms.EmailField(
         label='Ihre E-Mail-Adresse',
-        widget=forms.EmailInput(attrs={
-            'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500',
-            'placeholder': 'Ihre E-Mail-Adresse'
-        })
-    )
\ No newline at end of file
+        widget=forms.EmailInput(attrs={'placeholder': 'Ihre E-Mail-Adresse'})
+    )
+
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email:
+            # Wie bei der Anmeldung normalisieren, sonst findet die Abfrage nichts
+            email = email.lower().strip()
+        return email
\ No newline at end of file
@@ -0,0 +1,47 @@
+# eventapp/fragments.py - Versionierter Fragment-Cache für Event-Karten
+from authapp import membership
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+CARD_TEMPLATE = 'eventapp/_event_card.html'
+# Bei Änderungen am Karten-Template erhöhen, damit alte Fragmente nicht mehr greifen
+CARD_TEMPLATE_VERSION = 1
+CARD_TIMEOUT = 24 * 60 * 60
+
+
+def card_cache_key(event, directory_version=None):
+    """
+    Key aus updated_at, registration_version, Berechtigungsstatus und
+    membership.version() (Organisations- und Benutzernamen auf der Karte):
+    Jede Änderung am Event, an seinen Anmeldungen oder an den angezeigten Namen
+    ergibt einen neuen Key, veraltete Fragmente laufen einfach aus.
+    """
+    if directory_version is None:
+        directory_version = membership.version()
+    return (
+        f'eventapp:card:v{CARD_TEMPLATE_VERSION}:{event.pk}:'
+        f'{event.updated_at.timestamp()}:{event.registration_version}:{event.organization_access_status}:'
+        f'{directory_version}'
+    )
+
+
+def prefetch_event_cards(events):
+    """Lädt die Fragmente einer ganzen Seite mit einem cache.get_many"""
+    directory_version = membership.version()
+    keys = {}
+    for event in events:
+        event._card_key = card_cache_key(event, directory_version)
+        keys[event._card_key] = event
+    for key, html in cache.get_many(keys.keys()).items():
+        keys[key]._card_html = html
+    return events
+
+
+def render_event_card(event):
+    """Gibt das gecachte Fragment zurück oder rendert und speichert es"""
+    html = getattr(event, '_card_html', None)
+    if html is None:
+        html = render_to_string(CARD_TEMPLATE, {'event': event})
+        cache.set(getattr(event, '_card_key', None) or card_cache_key(event), html, CARD_TIMEOUT)
+        event._card_html = html
+    return html
@@ -0,0 +1,131 @@
+# eventapp/ical.py - iCalendar-Feeds (alle öffentlichen Events bzw. pro Organisation)
+import hashlib
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+FEED_TIMEOUT = 24 * 60 * 60
+CHUNK_SIZE = 500
+_GENERATION_KEY = 'eventapp:ics:generation'
+
+FEED_COLUMNS = ('id', 'title', 'description', 'location', 'event_url',
+                'start_date', 'end_date', 'updated_at')
+
+
+def _generation():
+    return cache.get_or_set(_GENERATION_KEY, 1, None)
+
+
+def invalidate_feeds():
+    """Macht alle gecachten Feeds ungültig (bei Speichern/Löschen eines Events)"""
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, 1, None)
+
+
+def _escape(text):
+    """Escaping für TEXT-Werte nach RFC 5545"""
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Zeilen länger als 75 Oktette umbrechen (Fortsetzung beginnt mit Leerzeichen)"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return encoded + b'\r\n'
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        # Nicht mitten in einem UTF-8-Zeichen trennen
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append((b' ' if parts else b'') + encoded[:cut])
+        encoded = encoded[cut:]
+    return b'\r\n'.join(parts) + b'\r\n'
+
+
+def _format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event_lines(row, host):
+    event_id, title, description, location, event_url, start_date, end_date, updated_at = row
+    yield 'BEGIN:VEVENT'
+    yield f'UID:event-{event_id}@{host}'
+    yield f'DTSTAMP:{_format_datetime(updated_at)}'
+    yield f'DTSTART:{_format_datetime(start_date)}'
+    if end_date:
+        yield f'DTEND:{_format_datetime(end_date)}'
+    yield f'SUMMARY:{_escape(title)}'
+    if description:
+        yield f'DESCRIPTION:{_escape(description)}'
+    if location:
+        yield f'LOCATION:{_escape(location)}'
+    if event_url:
+        yield f'URL:{event_url}'
+    yield 'END:VEVENT'
+
+
+def feed_queryset(queryset):
+    """Events des Feeds, nach Beginn sortiert (Indizes: event_public_feed_idx bzw. event_org_start_idx)"""
+    return queryset.order_by('start_date', 'id')
+
+
+def generate_feed(queryset, calendar_name, host):
+    """Erzeugt den Feed zeilenweise (bytes) über einen serverseitigen Cursor"""
+    yield _fold('BEGIN:VCALENDAR')
+    yield _fold('VERSION:2.0')
+    yield _fold(f'PRODID:-//{host}//Veranstaltungen//DE')
+    yield _fold('CALSCALE:GREGORIAN')
+    yield _fold(f'X-WR-CALNAME:{_escape(calendar_name)}')
+    rows = feed_queryset(queryset).values_list(*FEED_COLUMNS).iterator(chunk_size=CHUNK_SIZE)
+    for row in rows:
+        yield b''.join(_fold(line) for line in _event_lines(row, host))
+    yield _fold('END:VCALENDAR')
+
+
+def _stream_and_cache(key, chunks):
+    """Reicht die Chunks durch und legt den fertigen Feed samt ETag im Cache ab"""
+    collected = []
+    for chunk in chunks:
+        collected.append(chunk)
+        yield chunk
+    payload = b''.join(collected)
+    etag = '"%s"' % hashlib.md5(payload).hexdigest()
+    cache.set(key, (etag, timezone.now(), payload), FEED_TIMEOUT)
+
+
+def feed_response(request, scope, queryset, calendar_name):
+    """
+    Liefert einen Feed aus dem Cache (mit ETag/Last-Modified und 304-Unterstützung)
+    oder erzeugt ihn als Stream und cacht das Ergebnis für die nächsten Abrufe.
+    """
+    host = request.get_host()
+    key = f'eventapp:ics:{_generation()}:{host}:{scope}'
+    cached = cache.get(key)
+    if cached is not None:
+        etag, generated_at, payload = cached
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=int(generated_at.timestamp())
+        )
+        if not_modified:
+            return not_modified
+        response = HttpResponse(payload, content_type=CONTENT_TYPE)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(generated_at.timestamp())
+    else:
+        response = StreamingHttpResponse(
+            _stream_and_cache(key, generate_feed(queryset, calendar_name, host)),
+            content_type=CONTENT_TYPE,
+        )
+    response['Content-Disposition'] = f'inline; filename="{scope.replace(":", "-")}.ics"'
+    patch_cache_control(response, no_cache=True)
+    return response
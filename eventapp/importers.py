@@ -0,0 +1,176 @@
+# eventapp/importers.py - Streaming-Import von Teilnehmerlisten (CSV)
+import csv
+import io
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EventModel, EventRegistration
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+
+# Akzeptierte Spaltenüberschriften -> Modellfeld
+HEADER_ALIASES = {
+    'first_name': 'first_name',
+    'vorname': 'first_name',
+    'last_name': 'last_name',
+    'nachname': 'last_name',
+    'email': 'email',
+    'e-mail': 'email',
+    'e-mail-adresse': 'email',
+}
+REQUIRED_COLUMNS = ('first_name', 'last_name', 'email')
+
+
+def normalize_email(email):
+    """Wie clean_email der Anmeldeformulare (forms_old.EventRegistrationForm): Kleinbuchstaben, ohne Leerzeichen"""
+    return (email or '').lower().strip()
+
+
+class ImportResult:
+    """Ergebnis eines Imports inkl. zeilenweisem Fehlerbericht"""
+
+    def __init__(self):
+        self.created = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = []  # (Zeilennummer, Meldung), gekappt auf MAX_REPORTED_ERRORS
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    @property
+    def errors_truncated(self):
+        return self.error_count > len(self.errors)
+
+
+def open_text(fileobj, encoding='utf-8-sig'):
+    """Liest eine hochgeladene Datei als Text-Stream, ohne sie komplett zu laden"""
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    return io.TextIOWrapper(getattr(fileobj, 'file', fileobj), encoding=encoding, newline='')
+
+
+def _read_rows(stream, result):
+    """Liefert (Zeilennummer, Daten) für jede gültige Zeile, Fehler landen im Bericht"""
+    sample = stream.read(4096)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(_chain(sample, stream), dialect)
+
+    header = next(reader, None)
+    if header is None:
+        result.add_error(1, 'Die Datei ist leer.')
+        return
+    columns = [HEADER_ALIASES.get(name.strip().lower()) for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        result.add_error(1, f"Fehlende Spalten: {', '.join(missing)}")
+        return
+
+    for row in reader:
+        line = reader.line_num
+        if not any(cell.strip() for cell in row):
+            continue
+        data = {column: value.strip() for column, value in zip(columns, row) if column}
+        data['email'] = normalize_email(data.get('email'))
+
+        if not data.get('first_name') or not data.get('last_name'):
+            result.add_error(line, 'Vor- und Nachname sind erforderlich.')
+            continue
+        try:
+            validate_email(data['email'])
+        except ValidationError:
+            result.add_error(line, f"Ungültige E-Mail-Adresse: '{data['email']}'")
+            continue
+        if len(data['first_name']) > 100 or len(data['last_name']) > 100:
+            result.add_error(line, 'Vor- oder Nachname ist länger als 100 Zeichen.')
+            continue
+        yield line, data
+
+
+def _chain(sample, stream):
+    """Setzt den für den Sniffer gelesenen Anfang wieder vor den restlichen Stream"""
+    buffered = io.StringIO(sample)
+    for line in buffered:
+        if not line.endswith(('\n', '\r')):
+            # Angeschnittene letzte Zeile des Samples mit dem Rest vervollständigen
+            line += stream.readline()
+        yield line
+    yield from stream
+
+
+def _flush(event, chunk, result):
+    """Prüft einen Block gegen vorhandene Anmeldungen und legt den Rest per bulk_create an"""
+    unique = {}
+    for line, data in chunk:
+        if data['email'] in unique:
+            result.duplicates += 1
+            result.add_error(line, f"Doppelte E-Mail-Adresse in der Datei: {data['email']}")
+        else:
+            unique[data['email']] = (line, data)
+
+    # Frühere Blöcke sind bereits gespeichert, daher deckt diese Abfrage auch sie ab.
+    # Gespeicherte Adressen sind normalisiert (Formulare, Migration 0008) - Index (event, email)
+    existing = set(
+        EventRegistration.objects.filter(event=event, email__in=unique.keys()).values_list('email', flat=True)
+    )
+    new_registrations = []
+    for email, (line, data) in unique.items():
+        if email in existing:
+            result.duplicates += 1
+            result.add_error(line, f"Bereits angemeldet: {email}")
+        else:
+            new_registrations.append((line, EventRegistration(event=event, **data)))
+
+    try:
+        with transaction.atomic():
+            EventRegistration.objects.bulk_create(
+                [registration for _, registration in new_registrations], batch_size=CHUNK_SIZE,
+            )
+        result.created += len(new_registrations)
+    except IntegrityError:
+        # Währenddessen hat sich jemand über das Formular angemeldet - den Block zeilenweise speichern
+        for line, registration in new_registrations:
+            try:
+                with transaction.atomic():
+                    registration.save()
+                result.created += 1
+            except IntegrityError:
+                result.duplicates += 1
+                result.add_error(line, f"Bereits angemeldet: {registration.email}")
+
+
+def import_registrations(event, fileobj, chunk_size=CHUNK_SIZE):
+    """
+    Importiert eine CSV-Teilnehmerliste (Vorname, Nachname, E-Mail) für ein Event.
+    Die Datei wird zeilenweise gelesen und blockweise (je eine Transaktion)
+    gespeichert, sodass der Speicherbedarf unabhängig von der Dateigröße bleibt.
+    Fehlerhafte Zeilen werden übersprungen und im Ergebnis gemeldet.
+    Die Teilnehmerbegrenzung wird dabei bewusst nicht geprüft.
+    """
+    result = ImportResult()
+    chunk = []
+    for row in _read_rows(open_text(fileobj), result):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            _flush(event, chunk, result)
+            chunk = []
+    if chunk:
+        _flush(event, chunk, result)
+    # bulk_create umgeht reserve_seat und Signale - Zähler und Version einmalig nachziehen
+    EventModel.objects.filter(pk=event.pk).sync_seat_counters()
+    if result.created:
+        EventModel.objects.filter(pk=event.pk).update(
+            registration_version=F('registration_version') + 1,
+            updated_at=timezone.now(),
+        )
+    return result
@@ -0,0 +1,18 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from eventapp import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Vergleicht den Durchsatz der öffentlichen Event-Seiten bei gleichzeitigen Requests: '
+            'WSGI (sync Views) gegen ASGI (async Views)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16, help='Gleichzeitige Requests')
+        parser.add_argument('--requests', type=int, default=400, help='Requests pro Profil')
+
+    def handle(self, *args, **options):
+        results = benchmark.server_throughput(options['concurrency'], options['requests'])
+        self.stdout.write(json.dumps(results, indent=2))
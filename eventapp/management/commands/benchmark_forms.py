@@ -0,0 +1,16 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from eventapp import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Misst Aufbau- und Renderzeit pro Formular (Registrierung, Events, Organisation) in Mikrosekunden'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+
+    def handle(self, *args, **options):
+        results = benchmark.form_render_timings(options['iterations'])
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from eventapp.importers import CHUNK_SIZE, import_registrations
+from eventapp.models import EventModel
+
+
+class Command(BaseCommand):
+    help = 'Importiert eine CSV-Teilnehmerliste (Vorname, Nachname, E-Mail) in die Anmeldungen eines Events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int, help='ID des Events')
+        parser.add_argument('csv_file', help='Pfad zur CSV-Datei (UTF-8)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Zeilen pro bulk_create-Block')
+
+    def handle(self, *args, **options):
+        try:
+            event = EventModel.objects.get(pk=options['event_id'])
+        except EventModel.DoesNotExist:
+            raise CommandError(f"Event {options['event_id']} existiert nicht.")
+
+        try:
+            with open(options['csv_file'], encoding='utf-8-sig', newline='') as csv_file:
+                result = import_registrations(event, csv_file, chunk_size=options['chunk_size'])
+        except OSError as e:
+            raise CommandError(f"Datei konnte nicht gelesen werden: {e}")
+
+        for line, message in result.errors:
+            self.stderr.write(f'Zeile {line}: {message}')
+        if result.errors_truncated:
+            self.stderr.write(f'... {result.error_count - len(result.errors)} weitere Fehler')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.created} importiert, {result.duplicates} Duplikate, "
+            f"{result.error_count} Zeilen übersprungen."
+        ))
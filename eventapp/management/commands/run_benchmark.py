@@ -0,0 +1,27 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from eventapp import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Misst Latenz (p50/p95/p99) und Abfragen pro Request der wichtigsten Seiten, Ausgabe als JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Messungen pro URL')
+        parser.add_argument('--warmup', type=int, default=5, help='Ungemessene Aufrufe vorab (Caches)')
+        parser.add_argument('--output', help='JSON zusätzlich in diese Datei schreiben')
+
+    def handle(self, *args, **options):
+        if not benchmark.is_seeded():
+            raise CommandError('Keine Benchmark-Daten - zuerst "manage.py seed_benchmark" ausführen.')
+        if options['iterations'] < 2:
+            raise CommandError('Für Perzentile sind mindestens 2 Messungen nötig.')
+
+        report = benchmark.run(iterations=options['iterations'], warmup=options['warmup'])
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from eventapp import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Erzeugt reproduzierbare Testdaten (Organisationen, User, Events, Anmeldungen) für Benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organizations', type=int, default=20)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--events', type=int, default=2000)
+        parser.add_argument('--registrations', type=int, default=20,
+                            help='Maximale Anzahl Anmeldungen pro Event')
+        parser.add_argument('--seed', type=int, default=42, help='Zufalls-Seed (gleicher Seed -> gleiche Daten)')
+        parser.add_argument('--clear', action='store_true',
+                            help='Vorher angelegte Benchmark-Daten zuerst löschen')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            benchmark.clear()
+            self.stdout.write('Vorhandene Benchmark-Daten gelöscht.')
+        elif benchmark.is_seeded():
+            raise CommandError('Es gibt bereits Benchmark-Daten - mit --clear neu erzeugen.')
+
+        counts = benchmark.seed(
+            organizations=options['organizations'],
+            users=options['users'],
+            events=options['events'],
+            registrations=options['registrations'],
+            seed=options['seed'],
+        )
+        for model, count in counts.items():
+            self.stdout.write(f'{model}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Benchmark-Daten angelegt (Login: {benchmark.ADMIN_USERNAME} / {benchmark.ADMIN_PASSWORD}).'
+        ))
@@ -0,0 +1,24 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from eventapp import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Misst Anmeldungen pro Sekunde bei gleichzeitigen Schreibern, '
+            'mit Djangos SQLite-Standard ("vorher") und dem konfigurierten Profil ("nachher")')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0, help='Dauer pro Profil')
+        parser.add_argument('--tuned-only', action='store_true', help='Nur das konfigurierte Profil messen')
+
+    def handle(self, *args, **options):
+        results = {}
+        if not options['tuned_only']:
+            results['baseline'] = benchmark.stress_registrations(
+                options['threads'], options['seconds'], options=benchmark.BASELINE_SQLITE_OPTIONS,
+            )
+        results['tuned'] = benchmark.stress_registrations(options['threads'], options['seconds'])
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from eventapp.models import EventModel
+
+
+class Command(BaseCommand):
+    help = 'Gleicht die Platzzähler (reserved_seats) mit der tatsächlichen Anzahl Anmeldungen ab'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Abweichungen nur anzeigen, nicht korrigieren',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = list(EventModel.objects.with_seat_drift())
+            for event in drifted:
+                self.stdout.write(
+                    f"Event {event.pk} '{event.title}': Zähler {event.reserved_seats}, "
+                    f"Anmeldungen {event.actual_registrations}"
+                )
+            if drifted and not options['dry_run']:
+                EventModel.objects.filter(pk__in=[event.pk for event in drifted]).sync_seat_counters()
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Alle Platzzähler stimmen.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} Event(s) mit abweichendem Zähler.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(drifted)} Platzzähler korrigiert.'))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0001_initial'),
+        ('eventapp', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventmodel',
+            index=models.Index(fields=['-created_at', '-id'], name='event_created_id_idx'),
+        ),
+    ]
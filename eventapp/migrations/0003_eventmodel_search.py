@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_fts_table(apps, schema_editor):
+    # FTS5-Volltextindex gibt es nur unter SQLite
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS eventapp_eventmodel_fts "
+        "USING fts5(title, description, location, tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO eventapp_eventmodel_fts (rowid, title, description, location) "
+        "SELECT id, title, description, location FROM eventapp_eventmodel"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS eventapp_eventmodel_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0001_initial'),
+        ('eventapp', '0002_eventmodel_created_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventmodel',
+            index=models.Index(fields=['is_public', 'start_date'], name='event_public_start_idx'),
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:38
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def backfill_reserved_seats(apps, schema_editor):
+    EventModel = apps.get_model('eventapp', 'EventModel')
+    EventRegistration = apps.get_model('eventapp', 'EventRegistration')
+    counts = (EventRegistration.objects.filter(event=OuterRef('pk'))
+              .values('event').annotate(n=Count('pk')).values('n'))
+    EventModel.objects.update(reserved_seats=Subquery(counts))
+    EventModel.objects.filter(reserved_seats__isnull=True).update(reserved_seats=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventapp', '0003_eventmodel_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventmodel',
+            name='reserved_seats',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Belegte Plätze'),
+        ),
+        migrations.RunPython(backfill_reserved_seats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventapp', '0004_eventmodel_reserved_seats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventmodel',
+            name='registration_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
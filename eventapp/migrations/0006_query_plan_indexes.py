@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0002_query_plan_indexes'),
+        ('eventapp', '0005_eventmodel_registration_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventmodel',
+            index=models.Index(fields=['is_public', '-created_at', '-id'], name='event_public_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventmodel',
+            index=models.Index(fields=['organization', 'start_date'], name='event_org_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventregistration',
+            index=models.Index(fields=['email', 'event'], name='registration_email_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventapp', '0006_query_plan_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=100, verbose_name='Vorname')),
+                ('last_name', models.CharField(max_length=100, verbose_name='Nachname')),
+                ('email', models.EmailField(max_length=254, verbose_name='E-Mail-Adresse')),
+                ('joined_at', models.DateTimeField(auto_now_add=True, verbose_name='Eingetragen am')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='eventapp.eventmodel')),
+            ],
+            options={
+                'verbose_name': 'Wartelisteneintrag',
+                'verbose_name_plural': 'Warteliste',
+                'indexes': [models.Index(fields=['event', 'joined_at', 'id'], name='waitlist_event_joined_idx'), models.Index(fields=['email', 'event'], name='waitlist_email_idx')],
+                'unique_together': {('event', 'email')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:10
+
+from django.db import migrations
+
+
+def normalize_emails(apps, schema_editor):
+    # Anmeldungen wurden bisher mit der E-Mail in Originalschreibweise gespeichert.
+    # Kollidiert die normalisierte Adresse mit einer vorhandenen (doppelte Anmeldung),
+    # bleibt die Zeile unverändert.
+    for model_name in ('EventRegistration', 'WaitlistEntry'):
+        model = apps.get_model('eventapp', model_name)
+        for row in model.objects.only('id', 'event_id', 'email').iterator():
+            email = row.email.lower().strip()
+            if email == row.email:
+                continue
+            if not model.objects.filter(event_id=row.event_id, email=email).exists():
+                model.objects.filter(pk=row.pk).update(email=email)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventapp', '0007_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventapp', '0008_normalize_emails'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventmodel',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['start_date', 'id'], name='event_public_feed_idx'),
+        ),
+    ]
@@ -1,9 +1,70 @@
 # eventapp/models.py - Schritt 1: Nur created_by Feld hinzufügen
+from authapp import membership
 from authapp.models import Organization
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
+from . import ical, search
+
+
+class EventFull(Exception):
+    """Alle Plätze des Events sind vergeben"""
+
+
+class AlreadyRegistered(Exception):
+    """Die E-Mail-Adresse ist für dieses Event bereits angemeldet"""
+
+
+class AlreadyWaiting(Exception):
+    """Die E-Mail-Adresse steht für dieses Event bereits auf der Warteliste"""
+
+
+class EventQuerySet(models.QuerySet):
+    def with_registration_stats(self):
+        """Annotiert Anzahl Anmeldungen, freie Plätze und Ausgebucht-Flag in einer Abfrage"""
+        return self.annotate(
+            registration_count=Count('registrations', distinct=True),
+        ).annotate(
+            free_spots=Case(
+                When(max_participants__isnull=True, then=Value(None)),
+                default=Greatest(F('max_participants') - F('registration_count'), Value(0)),
+                output_field=models.IntegerField(null=True),
+            ),
+            booked_out=Case(
+                When(max_participants__isnull=True, then=Value(False)),
+                When(registration_count__gte=F('max_participants'), then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            ),
+        )
+    
+    def with_free_seat(self):
+        """Events, bei denen laut Platzzähler noch mindestens ein Platz frei ist"""
+        return self.filter(Q(max_participants__isnull=True) | Q(reserved_seats__lt=F('max_participants')))
+    
+    def search(self, text):
+        """Volltextsuche über Titel, Beschreibung und Ort"""
+        return search.search_events(self, text)
+    
+    def with_seat_drift(self):
+        """Events, deren Platzzähler nicht zur tatsächlichen Anzahl Anmeldungen passt"""
+        return self.annotate(
+            actual_registrations=Count('registrations'),
+        ).exclude(reserved_seats=F('actual_registrations'))
+    
+    def sync_seat_counters(self):
+        """Setzt reserved_seats auf die tatsächliche Anzahl Anmeldungen, gibt die korrigierten Events zurück"""
+        drifted = list(self.with_seat_drift())
+        for event in drifted:
+            event.reserved_seats = event.actual_registrations
+        self.model.objects.bulk_update(drifted, ['reserved_seats'])
+        return drifted
+
 
 class EventModel(models.Model):
     title = models.CharField(max_length=100, verbose_name='Titel')
@@ -23,47 +84,124 @@ class EventModel(models.Model):
         verbose_name='Maximale Teilnehmerzahl',
         help_text='Optional: Maximale Anzahl an Teilnehmern für dieses Event'
     )
+    # Denormalisierter Zähler der Anmeldungen (siehe reserve_seat / sync_seat_counters)
+    reserved_seats = models.PositiveIntegerField(default=0, editable=False, verbose_name='Belegte Plätze')
+    # Wird bei jeder neuen/gelöschten Anmeldung erhöht (zusammen mit updated_at) -
+    # Teil der Cache-Keys (Event-Karten) und der ETags
+    registration_version = models.PositiveIntegerField(default=0, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Erstellt am')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Geändert am')
     
+    objects = EventQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Keyset-Pagination der Event-Liste (siehe eventapp/pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='event_created_id_idx'),
+            # Filter "nur öffentliche" + Datumsbereich
+            models.Index(fields=['is_public', 'start_date'], name='event_public_start_idx'),
+            # Standardansicht der Event-Liste: nur öffentliche, neueste zuerst (ohne Sortierschritt)
+            models.Index(fields=['is_public', '-created_at', '-id'], name='event_public_created_idx'),
+            # Organisations-Feed und Registrierungsübersicht einer Organisation
+            models.Index(fields=['organization', 'start_date'], name='event_org_start_idx'),
+            # Öffentlicher iCal-Feed: alle öffentlichen Events nach Beginn, ohne Sortierschritt
+            models.Index(fields=['start_date', 'id'], condition=Q(is_public=True), name='event_public_feed_idx'),
+        ]
+    
     def __str__(self):
         return self.title
     
+    def registered_count(self):
+        """Anzahl Anmeldungen - Annotation aus with_registration_stats() oder der Platzzähler"""
+        if hasattr(self, 'registration_count'):
+            return self.registration_count
+        return self.reserved_seats
+    
+    def reserve_seat(self, registration):
+        """
+        Reserviert atomar einen Platz und speichert die Anmeldung.
+        Ein bedingtes UPDATE auf den Platzzähler verhindert Überbuchung,
+        doppelte Anmeldungen fängt der (event, email)-Unique-Constraint ab.
+        """
+        registration.event = self
+        with transaction.atomic():
+            reserved = EventModel.objects.filter(pk=self.pk).with_free_seat().update(
+                reserved_seats=F('reserved_seats') + 1,
+                registration_version=F('registration_version') + 1,
+                updated_at=timezone.now(),
+            )
+            if not reserved:
+                raise EventFull()
+            # Platz und Version sind schon erhöht - count_seat überspringt diese Anmeldung
+            registration._seat_reserved = True
+            try:
+                with transaction.atomic():
+                    registration.save()
+            except IntegrityError:
+                # Bricht die äußere Transaktion ab, damit der Platz wieder frei wird
+                raise AlreadyRegistered()
+        self.reserved_seats += 1
+        self.registration_version += 1
+        return registration
+    
     def available_spots(self):
         """Berechnet die verfügbaren Plätze"""
         if self.max_participants is None:
             return None
-        registered = self.registrations.count() # type: ignore
-        return max(0, self.max_participants - registered)
+        if hasattr(self, 'free_spots'):
+            return self.free_spots
+        return max(0, self.max_participants - self.registered_count())
     
     def is_full(self):
         """Prüft ob das Event ausgebucht ist"""
         if self.max_participants is None:
             return False
-        return self.registrations.count() >= self.max_participants # type: ignore
+        if hasattr(self, 'booked_out'):
+            return self.booked_out
+        return self.registered_count() >= self.max_participants
     
     def creator_has_organization_access(self):
         """Prüft ob der Ersteller Zugriff auf die gewählte Organisation hat"""
-        if not self.organization:
+        if not self.organization_id:
             return True  # Kein Problem wenn keine Organisation gewählt
-        
-        try:
-            from authapp.models import UserProfile
-            user_profile = UserProfile.objects.get(user=self.created_by)
-            return self.organization in user_profile.organizations.all()
-        except UserProfile.DoesNotExist:
-            return False
+        creator_orgs = membership.organization_ids_for_users([self.created_by_id])
+        return self.organization_id in creator_orgs.get(self.created_by_id, ())
     
     @property
     def organization_access_status(self):
         """Gibt den Status der Organisationsberechtigung zurück"""
-        if not self.organization:
-            return "no_org"  # Keine Organisation gewählt
+        if hasattr(self, '_organization_access_status'):
+            return self._organization_access_status
+        if not self.organization_id:
+            status = "no_org"  # Keine Organisation gewählt
         elif self.creator_has_organization_access():
-            return "authorized"  # Berechtigt
+            status = "authorized"  # Berechtigt
         else:
-            return "unauthorized"  # Nicht berechtigt
+            status = "unauthorized"  # Nicht berechtigt
+        self._organization_access_status = status
+        return status
+    
+    @classmethod
+    def resolve_organization_access(cls, events):
+        """
+        Berechnet organization_access_status für eine ganze Seite von Events.
+        Die Mitgliedschaften aller Ersteller kommen mit einem cache.get_many
+        bzw. höchstens einer Abfrage aus authapp.membership.
+        """
+        events = list(events)
+        memberships = membership.organization_ids_for_users(
+            event.created_by_id for event in events if event.organization_id
+        )
+        
+        for event in events:
+            if not event.organization_id:
+                event._organization_access_status = "no_org"
+            elif event.organization_id in memberships.get(event.created_by_id, ()):
+                event._organization_access_status = "authorized"
+            else:
+                event._organization_access_status = "unauthorized"
+        return events
 
 
 class EventRegistration(models.Model):
@@ -75,6 +213,84 @@ class EventRegistration(models.Model):
     
     class Meta:
         unique_together = ['event', 'email']  # Verhindert doppelte Anmeldungen
+        indexes = [
+            # "Meine Registrierungen" sucht nur nach E-Mail, der unique-Index beginnt mit event
+            models.Index(fields=['email', 'event'], name='registration_email_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.first_name} {self.last_name} - {self.event.title}"
\ No newline at end of file
+        return f"{self.first_name} {self.last_name} - {self.event.title}"
+
+
+class WaitlistEntry(models.Model):
+    """Wartet auf einen Platz in einem ausgebuchten Event (siehe eventapp/waitlist.py)"""
+    event = models.ForeignKey(EventModel, on_delete=models.CASCADE, related_name='waitlist')
+    first_name = models.CharField(max_length=100, verbose_name='Vorname')
+    last_name = models.CharField(max_length=100, verbose_name='Nachname')
+    email = models.EmailField(verbose_name='E-Mail-Adresse')
+    joined_at = models.DateTimeField(auto_now_add=True, verbose_name='Eingetragen am')
+    
+    class Meta:
+        unique_together = ['event', 'email']
+        indexes = [
+            # Nachrücken: der Erste der Warteliste eines Events (und Position in der Warteliste)
+            models.Index(fields=['event', 'joined_at', 'id'], name='waitlist_event_joined_idx'),
+            # "Meine Registrierungen" listet auch Wartelistenplätze
+            models.Index(fields=['email', 'event'], name='waitlist_email_idx'),
+        ]
+        verbose_name = 'Wartelisteneintrag'
+        verbose_name_plural = 'Warteliste'
+    
+    def __str__(self):
+        return f"{self.first_name} {self.last_name} - {self.event.title} (Warteliste)"
+
+
+@receiver(post_save, sender=EventModel)
+def update_event_search_index(sender, instance, **kwargs):
+    """Hält den FTS5-Suchindex beim Speichern synchron"""
+    search.index_event(instance)
+
+
+@receiver(post_delete, sender=EventModel)
+def remove_event_from_search_index(sender, instance, **kwargs):
+    """Entfernt gelöschte Events aus dem FTS5-Suchindex"""
+    search.remove_event(instance.pk)
+
+
+@receiver(post_save, sender=EventModel)
+@receiver(post_delete, sender=EventModel)
+@receiver(post_save, sender=Organization)
+def invalidate_calendar_feeds(sender, **kwargs):
+    """Gecachte iCalendar-Feeds neu erzeugen lassen"""
+    ical.invalidate_feeds()
+
+
+@receiver(post_save, sender=EventRegistration)
+def count_seat(sender, instance, created, **kwargs):
+    """Anmeldungen außerhalb von reserve_seat (z.B. Admin, Shell) belegen ebenfalls einen Platz und erhöhen die Version"""
+    if created and not getattr(instance, '_seat_reserved', False):
+        EventModel.objects.filter(pk=instance.event_id).update(
+            reserved_seats=F('reserved_seats') + 1,
+            registration_version=F('registration_version') + 1,
+            updated_at=timezone.now(),
+        )
+
+
+@receiver(post_delete, sender=EventRegistration)
+def release_seat(sender, instance, **kwargs):
+    """Gibt beim Löschen einer Anmeldung den Platz im Zähler wieder frei"""
+    EventModel.objects.filter(pk=instance.event_id).update(
+        reserved_seats=Greatest(F('reserved_seats') - 1, Value(0)),
+        registration_version=F('registration_version') + 1,
+        updated_at=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=EventRegistration)
+@receiver(post_save, sender=WaitlistEntry)
+def forget_registrations_digest(sender, instance, created, **kwargs):
+    """Neue Anmeldung oder neuer Wartelistenplatz: gemerktes Ergebnis von "Meine Registrierungen" verwerfen"""
+    if created:
+        from . import digests  # digests importiert die Models
+
+        digests.forget(instance.email)
@@ -0,0 +1,111 @@
+# eventapp/pagination.py - Cursor-Pagination (Keyset) über (created_at, id)
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+PAGE_SIZE = 20
+
+
+def encode_cursor(created_at, pk):
+    """Kodiert die Position (created_at, id) als URL-sicheren Cursor"""
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Dekodiert einen Cursor - gibt None zurück, wenn er ungültig ist"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class KeysetPage:
+    """Eine Seite Ergebnisse plus Cursor für die nächste/vorherige Seite"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def keyset_window(queryset, after=None, before=None, page_size=PAGE_SIZE):
+    """
+    Gibt das noch nicht ausgewertete Queryset der Seite (plus eine Zeile zum
+    Erkennen weiterer Seiten) zurück, sortiert in Leserichtung des Cursors.
+    So lässt sich dieselbe Seite z.B. auch für ETag-Berechnungen verwenden.
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before) if not after else None
+
+    if before:
+        created_at, pk = before
+        window = (queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+                  .order_by('created_at', 'id'))
+    else:
+        if after:
+            created_at, pk = after
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        window = queryset.order_by('-created_at', '-id')
+    return window[:page_size + 1], after, before
+
+
+def _model_position(obj):
+    return obj.created_at, obj.pk
+
+
+def paginate_keyset(queryset, after=None, before=None, page_size=PAGE_SIZE, position=_model_position):
+    """
+    Blättert absteigend nach (created_at, id), ohne OFFSET.
+    Jede Seite ist ein Index-Range-Scan ab dem Cursor, daher ist Seite 500
+    genauso schnell wie Seite 1.
+    position liefert (created_at, id) einer Zeile - für values_list()-Querysets anpassen.
+    """
+    window, after, before = keyset_window(queryset, after, before, page_size)
+    return _keyset_page(list(window), after, before, page_size, position)
+
+
+async def apaginate_keyset(queryset, after=None, before=None, page_size=PAGE_SIZE, position=_model_position):
+    """Async-Variante von paginate_keyset() für die ASGI-Views"""
+    window, after, before = keyset_window(queryset, after, before, page_size)
+    rows = [row async for row in window.aiterator()]
+    return _keyset_page(rows, after, before, page_size, position)
+
+
+def _keyset_page(rows, after, before, page_size, position):
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if before:
+        rows = rows[::-1]
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = bool(after), has_more
+
+    if not rows:
+        return KeysetPage(rows)
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(*position(rows[-1])) if has_older else None,
+        previous_cursor=encode_cursor(*position(rows[0])) if has_newer else None,
+    )
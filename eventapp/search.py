@@ -0,0 +1,74 @@
+# eventapp/search.py - Volltextsuche über Titel, Beschreibung und Ort (SQLite FTS5)
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'eventapp_eventmodel_fts'  # angelegt in Migration 0003
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_available(conn=connection):
+    """FTS5 gibt es nur unter SQLite - andere Datenbanken nutzen den icontains-Fallback"""
+    return conn.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """
+    Wandelt Benutzereingaben in einen sicheren FTS5-MATCH-Ausdruck um.
+    Jedes Wort wird als Präfix gesucht, alle Wörter müssen vorkommen.
+    """
+    tokens = _TOKEN_RE.findall(text or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def index_event(event):
+    """Schreibt ein Event (neu) in den Suchindex"""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [event.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, location) VALUES (%s, %s, %s, %s)",
+            [event.pk, event.title, event.description, event.location],
+        )
+
+
+def remove_event(event_id):
+    """Entfernt ein Event aus dem Suchindex"""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [event_id])
+
+
+def rebuild_index(conn=connection):
+    """Baut den Suchindex komplett aus der Event-Tabelle neu auf (z.B. nach bulk_create)"""
+    if not fts_available(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, location) "
+            "SELECT id, title, description, location FROM eventapp_eventmodel"
+        )
+
+
+def search_events(queryset, text):
+    """Filtert ein Event-Queryset nach Suchbegriffen"""
+    match = build_match_query(text)
+    if not match:
+        return queryset
+    if fts_available():
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        )
+
+    # Fallback ohne FTS5
+    for token in _TOKEN_RE.findall(text):
+        queryset = queryset.filter(
+            Q(title__icontains=token) | Q(description__icontains=token) | Q(location__icontains=token)
+        )
+    return queryset
@@ -0,0 +1,18 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..fragments import render_event_card
+
+register = template.Library()
+
+
+@register.simple_tag
+def event_card(event):
+    """
+    Rendert die Event-Karte aus dem Fragment-Cache.
+
+    Verwendung im Template:
+    {% load event_cards %}
+    {% event_card event %}
+    """
+    return mark_safe(render_event_card(event))
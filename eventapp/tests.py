@@ -1,3 +1,953 @@
-from django.test import TestCase
+import csv
+import io
+import re
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from authapp.models import Organization, OrganizationAccessRequest
+from authapp.usernames import matching_users
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from mailapp.models import OutboxMessage
+from veranstaltungen.db_router import PIN_COOKIE
+from veranstaltungen.middleware import SQLBudgetExceeded
+from veranstaltungen.testing import BudgetTestCase
+from veranstaltungen.tracing import recent_traces
+
+from . import benchmark, digests, search, waitlist
+from .exporters import HEADER
+from .forms import EventFilterForm
+from .fragments import card_cache_key
+from .ical import feed_queryset
+from .importers import import_registrations
+from .models import AlreadyRegistered, AlreadyWaiting, EventFull, EventModel, EventRegistration, WaitlistEntry
+from .pagination import decode_cursor, encode_cursor, keyset_window, paginate_keyset
+from .views import event_list_queryset
+
+
+# "SCAN <tabelle>" ohne "USING ... INDEX" ist ein Full Table Scan
+FULL_SCAN = re.compile(r'\bSCAN (?!CONSTANT ROW)\S+(?: AS \S+)?$')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Prüft SQLite-Abfragepläne (EXPLAIN QUERY PLAN)')
+class QueryPlanTests(BudgetTestCase):
+    """Die Hauptabfragen der Views dürfen keine Tabelle vollständig durchsuchen"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('planer', 'planer@example.com', 'geheim')
+        users = User.objects.bulk_create(
+            User(username=f'user{i}', email=f'user{i}@example.com') for i in range(200)
+        )
+        cls.organizations = Organization.objects.bulk_create(
+            Organization(name=f'Verein {i}', city='Berlin') for i in range(10)
+        )
+        OrganizationAccessRequest.objects.bulk_create(
+            OrganizationAccessRequest(
+                user=user,
+                organization=cls.organizations[i % 10],
+                status=('pending', 'approved', 'rejected')[i % 3],
+            )
+            for i, user in enumerate(users)
+        )
+        now = timezone.now()
+        events = EventModel.objects.bulk_create(
+            EventModel(
+                title=f'Event {i}',
+                description='Beschreibung',
+                location='Berlin',
+                start_date=now + timedelta(days=i),
+                created_by=cls.user,
+                organization=cls.organizations[i % 10] if i % 3 else None,
+                is_public=bool(i % 4),
+                max_participants=50,
+            )
+            for i in range(500)
+        )
+        EventRegistration.objects.bulk_create(
+            EventRegistration(
+                event=event,
+                first_name='Max',
+                last_name='Muster',
+                email=f'teilnehmer{j}@example.com',
+            )
+            for event in events[:100]
+            for j in range(20)
+        )
+        WaitlistEntry.objects.bulk_create(
+            WaitlistEntry(
+                event=event,
+                first_name='Erika',
+                last_name='Muster',
+                email=f'wartend{j}@example.com',
+            )
+            for event in events[:20]
+            for j in range(20)
+        )
+        # Statistiken für den Query-Planer wie in einer gefüllten Datenbank
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.event = events[0]
+        cls.organization = cls.organizations[1]
+
+    def assertNoFullScan(self, queryset):
+        plan = queryset.explain()
+        scans = [line for line in plan.splitlines() if FULL_SCAN.search(line.strip())]
+        self.assertFalse(scans, f'Full Table Scan im Abfrageplan:\n{plan}')
+        return plan
+
+    def assertNoSort(self, queryset):
+        plan = self.assertNoFullScan(queryset)
+        # Weder ORDER BY noch GROUP BY/DISTINCT über eine temporäre Sortierung
+        self.assertNotIn('USE TEMP B-TREE', plan, f'Sortierung ohne Index:\n{plan}')
+
+    def _event_list(self, data, **cursor):
+        """Seitenabfrage genau so, wie event_list sie baut"""
+        form = EventFilterForm(data)
+        self.assertTrue(form.is_valid())
+        window, _, _ = keyset_window(event_list_queryset(form), **cursor)
+        return window
+
+    def test_event_list(self):
+        self.assertNoSort(self._event_list({'only_public': True}))
+
+    def test_event_list_next_page(self):
+        cursor = encode_cursor(self.event.created_at, self.event.pk)
+        self.assertNoSort(self._event_list({'only_public': True}, after=cursor))
+
+    def test_event_list_all_events(self):
+        self.assertNoSort(self._event_list({}))
+
+    def test_event_list_registration_open(self):
+        self.assertNoSort(self._event_list({'only_public': True, 'registration_open': True}))
+
+    def test_event_detail(self):
+        self.assertNoFullScan(
+            EventModel.objects.select_related('created_by', 'organization')
+            .with_registration_stats().filter(id=self.event.pk)
+        )
+
+    def test_my_registrations(self):
+        self.assertNoFullScan(
+            EventRegistration.objects.filter(email='teilnehmer3@example.com').select_related('event')
+        )
+
+    def test_my_registrations_waitlist(self):
+        self.assertNoFullScan(
+            WaitlistEntry.objects.filter(email='wartend3@example.com').select_related('event')
+        )
+
+    def test_waitlist_next(self):
+        self.assertNoSort(
+            WaitlistEntry.objects.filter(event=self.event).order_by('joined_at', 'id')[:1]
+        )
+
+    def test_waitlist_position(self):
+        self.assertNoFullScan(waitlist.waiting_before(WaitlistEntry.objects.last()))
+
+    def test_organization_registrations(self):
+        self.assertNoFullScan(
+            EventModel.objects.filter(organization=self.organization).with_registration_stats()
+        )
+
+    def test_public_feed(self):
+        self.assertNoSort(feed_queryset(EventModel.objects.filter(is_public=True)))
+
+    def test_organization_feed(self):
+        self.assertNoFullScan(
+            feed_queryset(EventModel.objects.filter(organization=self.organization, is_public=True))
+        )
+
+    def test_review_access_requests(self):
+        self.assertNoSort(
+            OrganizationAccessRequest.objects.filter(status='pending')
+            .select_related('user', 'organization').order_by('requested_at')
+        )
+
+    def test_check_username(self):
+        self.assertNoFullScan(matching_users('User42'))
+
+
+class EventFilterFormTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        EventModel.objects.create(title='Öffentlich', start_date=timezone.now(), is_public=True)
+        EventModel.objects.create(title='Intern', start_date=timezone.now(), is_public=False)
+
+    def titles(self, data):
+        return set(EventFilterForm(data).filter_queryset(EventModel.objects.all()).values_list('title', flat=True))
+
+    def test_invalid_filter_shows_public_events_only(self):
+        self.assertEqual(self.titles({'date_from': 'gestern'}), {'Öffentlich'})
+        self.assertEqual(self.titles({'date_from': 'gestern', 'only_public': ''}), {'Öffentlich'})
+
+    def test_valid_filter(self):
+        self.assertEqual(self.titles({}), {'Öffentlich', 'Intern'})
+        self.assertEqual(self.titles({'only_public': True}), {'Öffentlich'})
+
+
+class SeatReservationTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = EventModel.objects.create(
+            title='Sommerfest', start_date=timezone.now(), is_public=True,
+            registration_required=True, max_participants=2,
+        )
+
+    def register(self, email):
+        return self.client.post(reverse('eventapp:event_registration', args=[self.event.pk]), {
+            'first_name': 'Anna', 'last_name': 'A', 'email': email,
+        })
+
+    def reserve(self, email):
+        return self.event.reserve_seat(EventRegistration(first_name='Anna', last_name='A', email=email))
+
+    def test_no_overbooking(self):
+        self.reserve('anna@example.com')
+        self.reserve('bernd@example.com')
+        with self.assertRaises(EventFull):
+            self.reserve('clara@example.com')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_seats, 2)
+        self.assertEqual(self.event.registrations.count(), 2)
+
+    def test_duplicate_does_not_take_a_seat(self):
+        self.reserve('anna@example.com')
+        with self.assertRaises(AlreadyRegistered):
+            self.reserve('anna@example.com')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_seats, 1)
+
+    def test_email_case_duplicates(self):
+        self.register('Anna@Example.com')
+        self.register('anna@example.com ')
+        self.assertEqual(list(self.event.registrations.values_list('email', flat=True)), ['anna@example.com'])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_seats, 1)
+
+    def test_registrations_outside_reserve_seat_are_counted(self):
+        registration = EventRegistration.objects.create(
+            event=self.event, first_name='Anna', last_name='A', email='anna@example.com',
+        )
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_seats, 1)
+        registration.delete()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_seats, 0)
+
+
+class RegistrationStatsTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.user = User.objects.create_user('statistik', 'statistik@example.com', 'geheim')
+        event = {'start_date': now, 'is_public': True, 'created_by': cls.user}
+        cls.open = EventModel.objects.create(title='Offen', **event)
+        cls.full = EventModel.objects.create(title='Voll', max_participants=2, **event)
+        cls.partly = EventModel.objects.create(title='Halb', max_participants=3, **event)
+        for event, emails in ((cls.open, 'ab'), (cls.full, 'ab'), (cls.partly, 'a')):
+            for name in emails:
+                EventRegistration.objects.create(event=event, first_name=name, last_name='X', email=f'{name}@example.com')
+
+    def stats(self, event):
+        return EventModel.objects.with_registration_stats().get(pk=event.pk)
+
+    def test_without_limit(self):
+        event = self.stats(self.open)
+        self.assertEqual(event.registration_count, 2)
+        self.assertIsNone(event.free_spots)
+        self.assertFalse(event.booked_out)
+        self.assertIsNone(event.available_spots())
+
+    def test_full(self):
+        event = self.stats(self.full)
+        self.assertEqual(event.free_spots, 0)
+        self.assertTrue(event.booked_out)
+        self.assertTrue(event.is_full())
+
+    def test_partly_full(self):
+        event = self.stats(self.partly)
+        self.assertEqual(event.free_spots, 2)
+        self.assertFalse(event.booked_out)
+        self.assertEqual(event.available_spots(), 2)
+
+    def test_counter_matches_annotation(self):
+        for event in (self.open, self.full, self.partly):
+            annotated, counted = self.stats(event), EventModel.objects.get(pk=event.pk)
+            self.assertEqual(annotated.available_spots(), counted.available_spots())
+            self.assertEqual(annotated.is_full(), counted.is_full())
+
+    def test_event_list_queries_do_not_grow_with_events(self):
+        def list_queries():
+            # Ohne gecachte Karten, sonst würde nur der Cache gemessen
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(reverse('eventapp:event_list')).status_code, 200)
+            return len(queries)
+
+        expected = list_queries()
+        for i in range(10):
+            event = EventModel.objects.create(
+                title=f'Mehr {i}', start_date=timezone.now(), is_public=True, max_participants=5, created_by=self.user,
+            )
+            EventRegistration.objects.create(event=event, first_name='A', last_name='X', email='a@example.com')
+        cache.clear()
+        with self.assertNumQueries(expected):
+            self.client.get(reverse('eventapp:event_list'))
+
+
+class OrganizationAccessTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizations = Organization.objects.bulk_create(
+            Organization(name=f'Verein {i}', city='Berlin') for i in range(3)
+        )
+        cls.creators = [User.objects.create_user(f'ersteller{i}', f'e{i}@example.com', 'geheim') for i in range(3)]
+        for creator, organization in zip(cls.creators, cls.organizations):
+            creator.profile.organizations.add(organization)
+        cls.add_events(cls.creators)
+
+    @classmethod
+    def add_events(cls, creators):
+        # Je Ersteller: ohne Organisation, eigene Organisation, fremde Organisation
+        for i, creator in enumerate(creators):
+            for organization in (None, cls.organizations[i % 3], cls.organizations[(i + 1) % 3]):
+                EventModel.objects.create(
+                    title=f'{creator.username} {organization}', start_date=timezone.now(), is_public=True,
+                    created_by=creator, organization=organization,
+                )
+
+    def statuses(self):
+        events = list(EventModel.objects.all())
+        cache.clear()
+        # Eine Abfrage für die Mitgliedschaften aller Ersteller, egal wie viele
+        with self.assertNumQueries(1):
+            events = EventModel.resolve_organization_access(events)
+        return {event.title: event.organization_access_status for event in events}
+
+    def test_statuses(self):
+        statuses = self.statuses()
+        self.assertEqual(len(statuses), 9)
+        for i, creator in enumerate(self.creators):
+            self.assertEqual(statuses[f'{creator.username} None'], 'no_org')
+            self.assertEqual(statuses[f'{creator.username} Verein {i}'], 'authorized')
+            self.assertEqual(statuses[f'{creator.username} Verein {(i + 1) % 3}'], 'unauthorized')
+
+    def test_matches_single_event_status(self):
+        resolved = {event.pk: event.organization_access_status for event in
+                    EventModel.resolve_organization_access(EventModel.objects.all())}
+        for event in EventModel.objects.all():
+            self.assertEqual(event.organization_access_status, resolved[event.pk])
+
+    def test_event_list_queries_do_not_grow_with_creators(self):
+        def list_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('eventapp:event_list'))
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        expected = list_queries()
+        creators = [User.objects.create_user(f'neu{i}', f'n{i}@example.com', 'geheim') for i in range(3)]
+        for creator, organization in zip(creators, self.organizations):
+            creator.profile.organizations.add(organization)
+        self.add_events(creators)
+        self.assertEqual(list_queries(), expected)
+
+
+class ImportTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = EventModel.objects.create(title='Sommerfest', start_date=timezone.now(), registration_required=True)
+        EventRegistration.objects.create(event=cls.event, first_name='Bernd', last_name='B', email='bernd@example.com')
+
+    def test_dedupe_and_error_report(self):
+        csv_file = io.StringIO(
+            'Vorname;Nachname;E-Mail\n'
+            'Anna;A;Anna@Example.com\n'
+            'Anna;A;anna@example.com\n'
+            'Bernd;B;bernd@example.com\n'
+            ';C;clara@example.com\n'
+            'Dora;D;keine-adresse\n'
+            '\n'
+            'Emil;E;emil@example.com\n'
+        )
+        result = import_registrations(self.event, csv_file)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.duplicates, 2)
+        self.assertEqual(sorted(line for line, _ in result.errors), [3, 4, 5, 6])
+        self.assertIn('Bereits angemeldet', dict(result.errors)[4])
+        self.assertEqual(
+            sorted(self.event.registrations.values_list('email', flat=True)),
+            ['anna@example.com', 'bernd@example.com', 'emil@example.com'],
+        )
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_seats, 3)
+
+    def test_concurrent_registration_skips_row(self):
+        csv_file = io.StringIO('Vorname,Nachname,E-Mail\nAnna,A,anna@example.com\nClara,C,clara@example.com\n')
+        original_filter = EventRegistration.objects.filter
+
+        def register_after_check(*args, **kwargs):
+            queryset = original_filter(*args, **kwargs)
+            if 'email__in' in kwargs:
+                # Anmeldung über das Formular zwischen Duplikatprüfung und bulk_create
+                snapshot = list(queryset.values_list('pk', flat=True))
+                self.event.reserve_seat(EventRegistration(first_name='Clara', last_name='C', email='clara@example.com'))
+                queryset = original_filter(pk__in=snapshot)
+            return queryset
+
+        with mock.patch.object(EventRegistration.objects, 'filter', side_effect=register_after_check):
+            result = import_registrations(self.event, csv_file)
+
+        self.assertEqual((result.created, result.duplicates), (1, 1))
+        self.assertEqual(result.errors, [(3, 'Bereits angemeldet: clara@example.com')])
+        self.assertEqual(self.event.registrations.count(), 3)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_seats, 3)
+
+    def test_missing_columns(self):
+        result = import_registrations(self.event, io.StringIO('name,email\nAnna,anna@example.com\n'))
+        self.assertEqual(result.created, 0)
+        self.assertEqual(result.errors, [(1, 'Fehlende Spalten: first_name, last_name')])
+
+
+class ExportTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = User.objects.create_user('mitglied', 'mitglied@example.com', 'geheim')
+        cls.stranger = User.objects.create_user('fremd', 'fremd@example.com', 'geheim')
+        cls.organization = Organization.objects.create(name='Sportverein', city='Berlin')
+        cls.member.profile.organizations.add(cls.organization)
+        event = EventModel.objects.create(
+            title='Fest; "groß"', start_date=timezone.now(), organization=cls.organization, registration_required=True,
+        )
+        for first_name, last_name, email in (('Anna', 'Müller; Meier', 'anna@example.com'),
+                                             ('Bernd', 'Der "Bär"', 'bernd@example.com'),
+                                             ('Clara', 'Zeile\nUmbruch', 'clara@example.com')):
+            EventRegistration.objects.create(event=event, first_name=first_name, last_name=last_name, email=email)
+        # Fremde Organisation: darf nicht im Export auftauchen
+        EventRegistration.objects.create(
+            event=EventModel.objects.create(title='Anderswo', start_date=timezone.now()),
+            first_name='Dora', last_name='D', email='dora@example.com',
+        )
+        cls.url = reverse('eventapp:organization_registrations_export', args=[cls.organization.pk])
+
+    def test_non_member_is_redirected(self):
+        self.client.force_login(self.stranger)
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('eventapp:event_list'), fetch_redirect_response=False)
+
+    def test_streamed_csv(self):
+        self.client.force_login(self.member)
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn(f'registrierungen-{self.organization.pk}.csv', response['Content-Disposition'])
+
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeff'))
+        rows = list(csv.reader(io.StringIO(content[1:], newline=''), delimiter=';'))
+        self.assertEqual(rows[0], HEADER)
+        self.assertEqual(
+            [(row[0], row[4], row[5]) for row in rows[1:]],
+            [('Fest; "groß"', 'Müller; Meier', 'anna@example.com'),
+             ('Fest; "groß"', 'Der "Bär"', 'bernd@example.com'),
+             ('Fest; "groß"', 'Zeile\nUmbruch', 'clara@example.com')],
+        )
+
+
+class CalendarFeedTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Chor, Berlin', city='Berlin')
+        cls.event = EventModel.objects.create(
+            title='Konzert; Teil 1, Probe', description='Erste Zeile\nZweite Zeile ' + 'ä' * 60,
+            location='Aula', start_date=timezone.now(), is_public=True, organization=cls.organization,
+        )
+        EventModel.objects.create(
+            title='Vorstandssitzung', start_date=timezone.now(), is_public=False, organization=cls.organization,
+        )
+        cls.url = reverse('eventapp:public_events_feed')
+        cls.organization_url = reverse('eventapp:organization_events_feed', args=[cls.organization.pk])
+
+    def setUp(self):
+        cache.clear()
+
+    def feed(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, content.decode('utf-8')
+
+    def unfold(self, content):
+        return content.replace('\r\n ', '')
+
+    def test_content_and_escaping(self):
+        response, content = self.feed(self.url)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertTrue(content.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(content.endswith('END:VCALENDAR\r\n'))
+        self.assertTrue(all(len(line.encode()) <= 75 for line in content.split('\r\n')))
+        unfolded = self.unfold(content)
+        self.assertIn(f'UID:event-{self.event.pk}@testserver\r\n', unfolded)
+        self.assertIn('SUMMARY:Konzert\\; Teil 1\\, Probe\r\n', unfolded)
+        self.assertIn('DESCRIPTION:Erste Zeile\\nZweite Zeile ' + 'ä' * 60 + '\r\n', unfolded)
+        self.assertNotIn('Vorstandssitzung', unfolded)
+
+    def test_cached_feed_and_not_modified(self):
+        first, content = self.feed(self.url)
+        self.assertTrue(first.streaming)
+        with self.assertNumQueries(0):
+            second, cached = self.feed(self.url)
+        self.assertFalse(second.streaming)
+        self.assertEqual(cached, content)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_event_save_invalidates(self):
+        self.feed(self.url)
+        self.event.title = 'Konzert abgesagt'
+        self.event.save()
+        response, content = self.feed(self.url)
+        self.assertTrue(response.streaming)
+        self.assertIn('SUMMARY:Konzert abgesagt', content)
+
+    def test_organization_save_invalidates(self):
+        self.feed(self.organization_url)
+        self.organization.name = 'Kammerchor'
+        self.organization.save()
+        response, content = self.feed(self.organization_url)
+        self.assertTrue(response.streaming)
+        self.assertIn('X-WR-CALNAME:Kammerchor', content)
+
+    def test_organization_feed_only_public_events(self):
+        _, content = self.feed(self.organization_url)
+        content = self.unfold(content)
+        self.assertIn('X-WR-CALNAME:Chor\\, Berlin', content)
+        self.assertEqual(content.count('BEGIN:VEVENT'), 1)
+        self.assertNotIn('Vorstandssitzung', content)
+
+
+class BenchmarkSeedTests(BudgetTestCase):
+
+    def seed(self, *args):
+        out = io.StringIO()
+        call_command('seed_benchmark', '--organizations=2', '--users=5', '--events=12', '--registrations=4', *args,
+                     stdout=out)
+        return out.getvalue()
+
+    def test_seed_and_clear(self):
+        output = self.seed()
+        self.assertIn('events: 12', output)
+        self.assertTrue(benchmark.is_seeded())
+        self.assertEqual(EventModel.objects.count(), 12)
+        self.assertFalse(EventModel.objects.with_seat_drift().exists())
+        self.assertTrue(EventRegistration.objects.exists())
+
+        with self.assertRaises(CommandError):
+            self.seed()
+        self.seed('--clear')
+        self.assertEqual(EventModel.objects.count(), 12)
+        self.assertFalse(EventModel.objects.with_seat_drift().exists())
+
+    @skipUnless(search.fts_available(), 'Suchindex nur unter SQLite (FTS5)')
+    def test_search_index_is_populated(self):
+        self.seed()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {search.FTS_TABLE}')
+            self.assertEqual(cursor.fetchone()[0], EventModel.objects.count())
+        event = EventModel.objects.first()
+        self.assertIn(event, EventModel.objects.search(event.title))
+
+
+class CardCacheKeyTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('anna', first_name='Anna')
+        cls.organization = Organization.objects.create(name='Verein', organization_url='https://verein.de', post_code='12345')
+        cls.event = EventModel.objects.create(
+            title='Sommerfest', start_date=timezone.now(), created_by=cls.user, organization=cls.organization,
+        )
+
+    def key(self):
+        event = EventModel.resolve_organization_access(
+            EventModel.objects.select_related('created_by', 'organization').filter(pk=self.event.pk)
+        )[0]
+        return card_cache_key(event)
+
+    def test_organization_rename(self):
+        before = self.key()
+        self.organization.name = 'Sportverein'
+        self.organization.save()
+        self.assertNotEqual(self.key(), before)
+
+    def test_creator_rename_but_not_login(self):
+        before = self.key()
+        user = User.objects.get(pk=self.user.pk)
+        user.last_login = timezone.now()
+        user.save()
+        self.assertEqual(self.key(), before)
+        user.first_name = 'Anne'
+        user.save()
+        self.assertNotEqual(self.key(), before)
+
+    def test_membership_change(self):
+        before = self.key()
+        self.user.profile.organizations.add(self.organization)
+        self.assertNotEqual(self.key(), before)
+
+
+class ConditionalGetTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('anna')
+        cls.organization = Organization.objects.create(name='Verein', organization_url='https://verein.de', post_code='12345')
+        EventModel.objects.create(
+            title='Sommerfest', start_date=timezone.now(), created_by=cls.user, organization=cls.organization, is_public=True,
+        )
+
+    def get(self, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(reverse('eventapp:event_list'), headers=headers)
+
+    def test_not_modified(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(etag).status_code, 304)
+
+    def test_organization_rename_changes_etag(self):
+        etag = self.get()['ETag']
+        self.organization.name = 'Sportverein'
+        self.organization.save()
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Sportverein')
+
+    def test_new_organization_changes_etag(self):
+        # Neue Auswahl im Filter
+        etag = self.get()['ETag']
+        Organization.objects.create(name='Chor', organization_url='https://chor.de', post_code='12345')
+        self.assertEqual(self.get(etag).status_code, 200)
+
+    def test_membership_approval_changes_etag(self):
+        etag = self.get()['ETag']
+        self.user.profile.organizations.add(self.organization)
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Berechtigt')
+
+
+    def test_api_etag_ignores_memberships(self):
+        url = reverse('api:event_list')
+        etag = self.client.get(url)['ETag']
+        self.user.profile.organizations.add(self.organization)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        # Der Organisationsname steht in der Antwort
+        self.organization.name = 'Sportverein'
+        self.organization.save()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'][0]['organization']['name'], 'Sportverein')
+
+    def test_api_not_found_is_json(self):
+        response = self.client.get(reverse('api:event_detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), {'error': 'Event nicht gefunden'})
+
+
+class KeysetPaginationTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for i in range(5):
+            event = EventModel.objects.create(title=f'Event {i}', start_date=now, is_public=i != 2)
+            # Gleiche Zeitstempel für 3 und 4: die id entscheidet
+            EventModel.objects.filter(pk=event.pk).update(created_at=now - timedelta(hours=min(i, 3)))
+        cls.ids = list(EventModel.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def paginate(self, **cursor):
+        return paginate_keyset(EventModel.objects.all(), page_size=2, **cursor)
+
+    def test_cursor_round_trip(self):
+        first = self.paginate()
+        second = self.paginate(after=first.next_cursor)
+        third = self.paginate(after=second.next_cursor)
+        self.assertEqual([e.id for page in (first, second, third) for e in page], self.ids)
+        self.assertFalse(first.has_previous)
+        self.assertFalse(third.has_next)
+        last = third.object_list[-1]
+        self.assertEqual(decode_cursor(encode_cursor(last.created_at, last.pk)), (last.created_at, last.pk))
+
+    def test_reverse_paging(self):
+        second = self.paginate(after=self.paginate().next_cursor)
+        back = self.paginate(before=second.previous_cursor)
+        self.assertEqual([e.id for e in back], self.ids[:2])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_invalid_cursor_starts_at_first_page(self):
+        self.assertIsNone(decode_cursor('kein-cursor!'))
+        self.assertIsNone(decode_cursor(encode_cursor(timezone.now(), 1)[:-3] + '@@@'))
+        self.assertEqual([e.id for e in self.paginate(after='kein-cursor!')], self.ids[:2])
+
+    def test_event_list_page_does_not_aggregate_registrations(self):
+        # Freie Plätze aus dem Platzzähler: keine Abfrage liest alle Anmeldungen der gefilterten Events
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('eventapp:event_list'), {'only_public': 'on', 'registration_open': 'on'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q['sql'] for q in queries if 'eventapp_eventregistration' in q['sql']])
+
+    def test_api_pages(self):
+        url = reverse('api:event_list')
+        public = [pk for pk in self.ids if EventModel.objects.get(pk=pk).is_public]
+        first = self.client.get(url, {'limit': 2, 'fields': 'title'}).json()
+        self.assertEqual(list(first['data'][0]), ['title'])
+        second = self.client.get(first['next']).json()
+        self.assertIsNone(second['next'])
+        titles = [row['title'] for page in (first, second) for row in page['data']]
+        self.assertEqual(titles, [EventModel.objects.get(pk=pk).title for pk in public])
+        self.assertEqual(self.client.get(second['previous']).json()['data'], first['data'])
+
+    def test_api_rejects_bad_input(self):
+        url = reverse('api:event_list')
+        self.assertEqual(self.client.get(url, {'fields': 'passwort'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'date_from': 'gestern'}).status_code, 400)
+        response = self.client.get(url, {'after': 'kein-cursor!', 'limit': 2})
+        self.assertEqual(len(response.json()['data']), 2)
+        hidden = EventModel.objects.get(title='Event 2')
+        self.assertEqual(self.client.get(reverse('api:event_detail', args=[hidden.pk])).status_code, 404)
+
+
+class WaitlistTests(BudgetTestCase):
+    BASE_URL = 'http://testserver/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = EventModel.objects.create(
+            title='Sommerfest', start_date=timezone.now(), registration_required=True, max_participants=1,
+        )
+        cls.registration = cls.event.reserve_seat(
+            EventRegistration(first_name='Anna', last_name='A', email='anna@example.com')
+        )
+
+    def join(self, email):
+        entry = WaitlistEntry(first_name='Wartend', last_name='W', email=email)
+        return waitlist.join(self.event, entry, self.BASE_URL)
+
+    def test_join_when_full(self):
+        first = self.join('bernd@example.com')
+        second = self.join('clara@example.com')
+        self.assertIsInstance(first, WaitlistEntry)
+        self.assertEqual([waitlist.position(first), waitlist.position(second)], [1, 2])
+        with self.assertRaises(AlreadyWaiting):
+            self.join('bernd@example.com')
+
+    def test_cancel_promotes_first_in_line(self):
+        self.join('bernd@example.com')
+        self.join('clara@example.com')
+
+        promoted = waitlist.cancel(self.registration, self.BASE_URL)
+
+        self.assertEqual([r.email for r in promoted], ['bernd@example.com'])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_seats, 1)
+        self.assertEqual(
+            list(self.event.registrations.values_list('email', flat=True)), ['bernd@example.com']
+        )
+        self.assertEqual(list(self.event.waitlist.values_list('email', flat=True)), ['clara@example.com'])
+        notification = OutboxMessage.objects.get()
+        self.assertEqual(notification.recipients, ['bernd@example.com'])
+        self.assertIn('/event/cancel/', notification.body)
+
+    def test_promotion_is_atomic(self):
+        self.join('bernd@example.com')
+        registration_pk = self.registration.pk
+        with mock.patch('eventapp.waitlist.enqueue_mail', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                waitlist.cancel(self.registration, self.BASE_URL)
+
+        # Abmeldung, Nachrücken und Benachrichtigung: alles zurückgerollt
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_seats, 1)
+        self.assertTrue(EventRegistration.objects.filter(pk=registration_pk).exists())
+        self.assertEqual(list(self.event.waitlist.values_list('email', flat=True)), ['bernd@example.com'])
+
+    def test_cancel_token(self):
+        entry = self.join('bernd@example.com')
+        self.assertEqual(waitlist.load_token(waitlist.cancel_token(entry)), entry)
+        self.assertEqual(waitlist.load_token(waitlist.cancel_token(self.registration)), self.registration)
+        self.assertIsNone(waitlist.load_token('ungueltig'))
+
+
+class DigestTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = EventModel.objects.create(
+            title='Sommerfest', start_date=timezone.now(), registration_required=True, max_participants=2,
+        )
+        cls.event.reserve_seat(EventRegistration(first_name='Anna', last_name='A', email='anna@example.com'))
+
+    def setUp(self):
+        cache.clear()
+
+    def lookup(self, email, ip='10.0.0.1'):
+        return self.client.post(reverse('eventapp:my_registrations'), {'email': email}, REMOTE_ADDR=ip)
+
+    def test_repeat_lookups_are_coalesced(self):
+        self.lookup('anna@example.com')
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+        # Gleiche Adresse im Fenster: keine Abfrage, keine zweite Mail
+        with self.assertNumQueries(0):
+            response = self.lookup('Anna@Example.com ', ip='10.0.0.2')
+        self.assertRedirects(response, reverse('eventapp:event_list'), fetch_redirect_response=False)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_not_found_is_remembered(self):
+        self.lookup('niemand@example.com')
+        with self.assertNumQueries(0):
+            self.lookup('niemand@example.com')
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_lookup_normalizes_email_once(self):
+        # Ohne Formular (clean_email): Cache-Key und Abfrage nutzen dieselbe Adresse
+        self.assertEqual(digests.lookup(' Anna@Example.com', 'http://testserver/'), digests.SENT)
+        self.assertEqual(OutboxMessage.objects.get().recipients, ['anna@example.com'])
+        with self.assertNumQueries(0):
+            self.assertEqual(digests.lookup('anna@example.com', 'http://testserver/'), digests.SENT)
+
+    def test_new_registration_forgets_result(self):
+        self.assertEqual(digests.lookup('bernd@example.com', 'http://testserver/'), digests.NOT_FOUND)
+        self.event.reserve_seat(EventRegistration(first_name='Bernd', last_name='B', email='bernd@example.com'))
+        self.assertEqual(digests.lookup('bernd@example.com', 'http://testserver/'), digests.SENT)
+
+        # Ausgebucht - der Wartelistenplatz gehört ebenfalls in die nächste Übersicht
+        self.assertEqual(digests.lookup('clara@example.com', 'http://testserver/'), digests.NOT_FOUND)
+        waitlist.join(self.event, WaitlistEntry(first_name='Clara', last_name='C', email='clara@example.com'),
+                      'http://testserver/')
+        self.assertEqual(digests.lookup('clara@example.com', 'http://testserver/'), digests.SENT)
+
+    def test_failed_lookup_releases_address(self):
+        with mock.patch('eventapp.digests.enqueue_mail', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.lookup('anna@example.com')
+        self.lookup('anna@example.com')
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_coalesced_lookups_do_not_count_per_address(self):
+        # Wiederholte Anfragen im Fenster (auch von vielen IPs) sperren die Adresse nicht
+        with mock.patch.object(digests, 'LOOKUP_RATE_PER_ADDRESS', '1/d'):
+            for i in range(5):
+                response = self.lookup('anna@example.com', ip=f'10.0.0.{i}')
+                self.assertRedirects(response, reverse('eventapp:event_list'), fetch_redirect_response=False)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    @override_settings(REGISTRATION_DIGEST_WINDOW=0)
+    def test_lookup_limited_per_address(self):
+        with mock.patch.object(digests, 'LOOKUP_RATE_PER_ADDRESS', '2/d'):
+            for ip in ('10.0.0.1', '10.0.0.2'):
+                self.lookup('anna@example.com', ip=ip)
+            with self.assertNumQueries(0):
+                response = self.lookup('Anna@Example.com', ip='10.0.0.3')
+        self.assertRedirects(response, reverse('eventapp:my_registrations'), fetch_redirect_response=False)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+
+
+@override_settings(ROOT_URLCONF='veranstaltungen.asgi_urls')
+class AsyncViewTests(BudgetTestCase):
+    """Die async Views (ASGI-Profil) über AsyncClient, verglichen mit den sync Views"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('anna', first_name='Anna', last_name='A')
+        organization = Organization.objects.create(name='Verein', organization_url='https://verein.de', post_code='12345')
+        cls.event = EventModel.objects.create(
+            title='Sommerfest', description='Grillen', location='Berlin', start_date=timezone.now() + timedelta(days=7),
+            created_by=user, organization=organization, is_public=True, registration_required=True, max_participants=1,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def aget(self, url, **kwargs):
+        return async_to_sync(self.async_client.get)(url, **kwargs)
+
+    def apost(self, url, data, **kwargs):
+        return async_to_sync(self.async_client.post)(url, data, **kwargs)
+
+    def test_list_and_detail_match_sync_views(self):
+        for url in (reverse('eventapp:event_list'), reverse('eventapp:event_detail', args=[self.event.pk])):
+            response = self.aget(url)
+            with override_settings(ROOT_URLCONF='veranstaltungen.urls'):
+                expected = self.client.get(url)
+                # resolver_match wird erst beim Zugriff aufgelöst
+                self.assertFalse(iscoroutinefunction(expected.resolver_match.func))
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(iscoroutinefunction(response.resolver_match.func))
+            self.assertEqual(response.content, expected.content)
+            self.assertEqual(response['ETag'], expected['ETag'])
+
+    def test_not_modified(self):
+        url = reverse('eventapp:event_list')
+        etag = self.aget(url)['ETag']
+        self.assertEqual(self.aget(url, headers={'If-None-Match': etag}).status_code, 304)
+        etag = self.aget(reverse('eventapp:event_detail', args=[self.event.pk]))['ETag']
+        response = self.aget(reverse('eventapp:event_detail', args=[self.event.pk]), headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_register_then_waitlist(self):
+        url = reverse('eventapp:event_registration', args=[self.event.pk])
+        self.assertEqual(self.aget(url).status_code, 200)
+        response = self.apost(url, {'first_name': 'Bernd', 'last_name': 'B', 'email': 'Bernd@Example.com'})
+        self.assertRedirects(response, reverse('eventapp:event_detail', args=[self.event.pk]), fetch_redirect_response=False)
+        self.assertEqual(list(self.event.registrations.values_list('email', flat=True)), ['bernd@example.com'])
+        # Async-Zweig des Replica-Routings: nach dem Schreibzugriff liest der Client von "default"
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        self.apost(url, {'first_name': 'Clara', 'last_name': 'C', 'email': 'clara@example.com'})
+        self.assertEqual(list(self.event.waitlist.values_list('email', flat=True)), ['clara@example.com'])
+
+    def test_my_registrations(self):
+        self.event.reserve_seat(EventRegistration(first_name='Bernd', last_name='B', email='bernd@example.com'))
+        url = reverse('eventapp:my_registrations')
+        self.assertEqual(self.aget(url).status_code, 200)
+        response = self.apost(url, {'email': 'Bernd@Example.com'})
+        self.assertRedirects(response, reverse('eventapp:event_list'), fetch_redirect_response=False)
+        self.assertEqual(OutboxMessage.objects.get().recipients, ['bernd@example.com'])
+
+    def test_tracing_records_async_request(self):
+        response = self.aget(reverse('eventapp:event_list'))
+        trace = recent_traces()[-1]
+        self.assertEqual(trace['trace_id'], response['X-Trace-Id'])
+        names = [span['name'] for span in trace['spans']]
+        self.assertIn('db.query', names)
+        view = next(span for span in trace['spans'] if span['name'] == 'view')
+        self.assertEqual(view['attrs']['view'], 'eventapp:event_list')
+
+    @override_settings(SQL_BUDGETS={'eventapp:event_list': {'queries': 0}})
+    def test_sql_budget_applies_to_async_views(self):
+        with self.assertRaisesRegex(SQLBudgetExceeded, r'eventapp:event_list \(queries=\d+ > 0\)'):
+            self.aget(reverse('eventapp:event_list'))
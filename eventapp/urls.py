@@ -9,8 +9,15 @@ urlpatterns = [
     path('create/', views.create_event, name='create_event'),
     path('<int:event_id>/', views.event_detail, name='event_detail'),
     path('<int:event_id>/register/', views.event_registration, name='event_registration'),
+    path('cancel/<str:token>/', views.cancel_registration, name='cancel_registration'),
+    path('<int:event_id>/registrations/import/', views.event_registration_import, name='registration_import'),
+    path('feed.ics', views.public_events_feed, name='public_events_feed'),
+    path('organization/<int:organization_id>/feed.ics', views.organization_events_feed, name='organization_events_feed'),
     path('my-registrations/', views.my_registrations, name='my_registrations'),
     path('organization/<int:organization_id>/registrations/', 
          views.organization_event_registrations, 
          name='organization_registrations'),
+    path('organization/<int:organization_id>/registrations/export.csv',
+         views.organization_registrations_export,
+         name='organization_registrations_export'),
 ]
\ No newline at end of file
@@ -1,55 +1,95 @@
 # eventapp/views.py - Schritt 2: Erweiterte Version
-from authapp.models import Organization, UserProfile
-from django.conf import settings
+from authapp import membership
+from authapp.models import Organization
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.mail import send_mail
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from . import digests, waitlist
+from .conditional import compute_validators, conditional_response, set_validators
+from .exporters import stream_registrations_csv
+from .forms import EventFilterForm, RegistrationImportForm
 from .forms_old import EmailLookupForm, EventForm, EventRegistrationForm
-from .models import EventModel, EventRegistration
+from .fragments import prefetch_event_cards
+from .ical import feed_response
+from .importers import import_registrations
+from .models import AlreadyRegistered, AlreadyWaiting, EventFull, EventModel, EventRegistration, WaitlistEntry
+from .pagination import keyset_window, paginate_keyset
 
 
 @login_required
 def create_event(request):
-    print(f"DEBUG VIEW: User = {request.user}")  # <-- Diese Zeile hinzufügen
     if request.method == 'POST':
         form = EventForm(request.POST, user=request.user)
-        print(f"DEBUG VIEW: Form erstellt (POST) mit user = {request.user}")
         if form.is_valid():
             event = form.save(commit=False)
             event.created_by = request.user  # Creator setzen
             
             # Zusätzliche Validierung: Prüfen ob User für gewählte Organisation berechtigt ist
-            if event.organization:
-                try:
-                    user_profile, created = UserProfile.objects.get_or_create(user=request.user)
-                    if event.organization not in user_profile.organizations.all():
-                        messages.error(request, 
-                                     f"Sie sind nicht für die Organisation '{event.organization.name}' freigeschaltet.")
-                        return render(request, 'eventapp/event_form.html', {'form': form})
-                except UserProfile.DoesNotExist:
-                    messages.error(request, "Profil nicht gefunden. Bitte vervollständigen Sie zunächst Ihr Profil.")
-                    return render(request, 'eventapp/event_form.html', {'form': form})
+            if event.organization and not membership.is_member(request.user, event.organization):
+                messages.error(request, 
+                             f"Sie sind nicht für die Organisation '{event.organization.name}' freigeschaltet.")
+                return render(request, 'eventapp/event_form.html', {'form': form})
             
             event.save()
             messages.success(request, f"Event '{event.title}' wurde erfolgreich erstellt!")
             return redirect('eventapp:event_list')
     else:
         form = EventForm(user=request.user)
-        print(f"DEBUG VIEW: Form erstellt (GET) mit user = {request.user}") 
     
     return render(request, 'eventapp/event_form.html', {'form': form})
 
 
+def event_list_queryset(filter_form):
+    """
+    Abfrage der Event-Liste (auch für eventapp.async_views und die Abfrageplan-Tests).
+    Freie Plätze und "ausgebucht" kommen aus dem Platzzähler reserved_seats - ein
+    Count über die Anmeldungen würde jede Seite zu JOIN und GROUP BY über alle
+    gefilterten Events zwingen, bevor das LIMIT greift.
+    """
+    return filter_form.filter_queryset(EventModel.objects.all()).select_related('created_by', 'organization')
+
+
 def event_list(request):
-    events = EventModel.objects.select_related('created_by', 'organization').all().order_by('-created_at')
-    return render(request, 'eventapp/event_list.html', {'events': events})
+    # Ohne abgeschickten Filter gelten die Voreinstellungen des Formulars (nur öffentliche Events)
+    filter_submitted = any(name in request.GET for name in EventFilterForm.base_fields)
+    filter_form = EventFilterForm(request.GET if filter_submitted else {'only_public': True})
+    
+    events = event_list_queryset(filter_form)
+    after, before = request.GET.get('after'), request.GET.get('before')
+    
+    # Conditional GET: Validatoren aus einer kleinen Abfrage über die sichtbare Seite
+    window, _, _ = keyset_window(events, after, before)
+    etag, last_modified = compute_validators(request, window)
+    not_modified = conditional_response(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+    
+    page = paginate_keyset(events, after=after, before=before)
+    events = EventModel.resolve_organization_access(page.object_list)
+    prefetch_event_cards(events)
+    response = render(request, 'eventapp/event_list.html', {
+        'events': events,
+        'page': page,
+        'filter_form': filter_form,
+    })
+    return set_validators(response, request, etag, last_modified)
 
 
 def event_detail(request, event_id):
-    event = get_object_or_404(EventModel.objects.select_related('created_by', 'organization'), id=event_id)
-    return render(request, 'eventapp/event_detail.html', {'event': event})
+    validators = EventModel.objects.filter(id=event_id)
+    etag, last_modified = compute_validators(request, validators)
+    not_modified = conditional_response(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+    
+    event = get_object_or_404(
+        EventModel.objects.select_related('created_by', 'organization').with_registration_stats(),
+        id=event_id,
+    )
+    response = render(request, 'eventapp/event_detail.html', {'event': event})
+    return set_validators(response, request, etag, last_modified)
 
 
 def event_registration(request, event_id):
@@ -59,21 +99,17 @@ def event_registration(request, event_id):
         messages.error(request, "Für dieses Event ist keine Anmeldung erforderlich.")
         return redirect('eventapp:event_detail', event_id=event.id)
     
-    if event.is_full():
-        messages.error(request, "Dieses Event ist bereits ausgebucht.")
-        return redirect('eventapp:event_detail', event_id=event.id)
-    
     if request.method == 'POST':
         form = EventRegistrationForm(request.POST)
         if form.is_valid():
-            registration = form.save(commit=False)
-            registration.event = event
-            
-            # Prüfen ob E-Mail bereits registriert ist
-            if EventRegistration.objects.filter(event=event, email=registration.email).exists():
+            try:
+                event.reserve_seat(form.save(commit=False))
+            except EventFull:
+                # Ausgebucht: auf die Warteliste, statt es immer wieder versuchen zu lassen
+                return join_waitlist(request, event, form.cleaned_data)
+            except AlreadyRegistered:
                 messages.error(request, "Diese E-Mail ist bereits für dieses Event registriert.")
             else:
-                registration.save()
                 messages.success(request, "Sie haben sich erfolgreich für das Event angemeldet!")
                 return redirect('eventapp:event_detail', event_id=event.id)
     else:
@@ -85,34 +121,65 @@ def event_registration(request, event_id):
     })
 
 
+def join_waitlist(request, event, data):
+    entry = WaitlistEntry(first_name=data['first_name'], last_name=data['last_name'], email=data['email'])
+    try:
+        entry = waitlist.join(event, entry, request.build_absolute_uri('/'))
+    except AlreadyRegistered:
+        messages.error(request, "Diese E-Mail ist bereits für dieses Event registriert.")
+    except AlreadyWaiting:
+        messages.info(request, "Diese E-Mail steht bereits auf der Warteliste für dieses Event.")
+    else:
+        if isinstance(entry, EventRegistration):
+            messages.success(request, "Gerade ist ein Platz frei geworden - Sie sind angemeldet!")
+        else:
+            messages.success(request, waitlist_message(waitlist.position(entry)))
+    return redirect('eventapp:event_detail', event_id=event.id)
+
+
+def waitlist_message(position):
+    return (f"Das Event ist ausgebucht. Sie stehen auf Platz {position} der Warteliste "
+            "und bekommen eine E-Mail, sobald Sie nachrücken.")
+
+
+def cancel_registration(request, token):
+    entry = waitlist.load_token(token)
+    if entry is None:
+        messages.error(request, "Der Abmelde-Link ist ungültig oder die Anmeldung besteht nicht mehr.")
+        return redirect('eventapp:event_list')
+    
+    on_waitlist = isinstance(entry, WaitlistEntry)
+    # Erst nach Bestätigung per POST abmelden - Links in E-Mails werden z.B. von Virenscannern aufgerufen
+    if request.method == 'POST':
+        waitlist.cancel(entry, request.build_absolute_uri('/'))
+        if on_waitlist:
+            messages.success(request, "Sie wurden von der Warteliste entfernt.")
+        else:
+            messages.success(request, "Sie haben sich von dem Event abgemeldet.")
+        return redirect('eventapp:event_detail', event_id=entry.event_id)
+    
+    return render(request, 'eventapp/cancel_registration.html', {
+        'entry': entry,
+        'event': entry.event,
+        'on_waitlist': on_waitlist,
+    })
+
+
 def my_registrations(request):
     if request.method == 'POST':
         form = EmailLookupForm(request.POST)
         if form.is_valid():
             email = form.cleaned_data['email']
-            registrations = EventRegistration.objects.filter(email=email).select_related('event')
+            try:
+                outcome = digests.lookup(email, request.build_absolute_uri('/'))
+            except digests.Throttled:
+                messages.error(request, "Zu viele Anfragen. Bitte versuchen Sie es später erneut.")
+                return redirect('eventapp:my_registrations')
             
-            if registrations.exists():
-                # E-Mail mit Registrierungen senden
-                event_list = "\n".join([
-                    f"- {reg.event.title} am {reg.event.start_date.strftime('%d.%m.%Y %H:%M')}"
-                    for reg in registrations
-                ])
-                
-                subject = 'Ihre Event-Registrierungen'
-                message = f'''Hallo,\n\nSie haben sich für folgende Events registriert:\n\n{event_list}\n\nMit freundlichen Grüßen\nIhr Veranstaltungsteam'''
-                
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [email],
-                    fail_silently=False,
-                )
-                
-                messages.success(request, "Eine E-Mail mit Ihren Registrierungen wurde an Ihre E-Mail-Adresse gesendet.")
-            else:
+            if outcome == digests.NOT_FOUND:
                 messages.info(request, "Für diese E-Mail-Adresse wurden keine Registrierungen gefunden.")
+            else:
+                messages.success(request, "Eine E-Mail mit Ihren Registrierungen wurde an Ihre E-Mail-Adresse gesendet.")
             
             return redirect('eventapp:event_list')
     else:
@@ -124,18 +191,76 @@ def my_registrations(request):
 @login_required
 def organization_event_registrations(request, organization_id):
     # Prüfen ob User Zugriff auf diese Organisation hat
-    user_profile, created = UserProfile.objects.get_or_create(user=request.user)
     organization = get_object_or_404(Organization, id=organization_id)
     
-    if organization not in user_profile.organizations.all():
+    if not membership.is_member(request.user, organization):
         messages.error(request, "Sie haben keinen Zugriff auf diese Organisation.")
         return redirect('eventapp:event_list')
     
     # Events der Organisation mit Registrierungen
-    events = EventModel.objects.filter(organization=organization).prefetch_related('registrations')
+    events = (EventModel.objects.filter(organization=organization)
+              .with_registration_stats()
+              .prefetch_related('registrations'))
     
     return render(request, 'eventapp/organization_registrations.html', {
         'organization': organization,
         'events': events,
         'title': f'Registrierungen - {organization.name}'
-    })
\ No newline at end of file
+    })
+
+
+@login_required
+def organization_registrations_export(request, organization_id):
+    organization = get_object_or_404(Organization, id=organization_id)
+    
+    if not membership.is_member(request.user, organization):
+        messages.error(request, "Sie haben keinen Zugriff auf diese Organisation.")
+        return redirect('eventapp:event_list')
+    
+    response = StreamingHttpResponse(
+        stream_registrations_csv(organization),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="registrierungen-{organization.pk}.csv"'
+    return response
+
+
+@login_required
+def event_registration_import(request, event_id):
+    event = get_object_or_404(EventModel.objects.select_related('organization'), id=event_id)
+    
+    # Nur Mitglieder der Organisation (bzw. der Ersteller bei Events ohne Organisation)
+    if event.organization_id:
+        allowed = membership.is_member(request.user, event.organization_id)
+    else:
+        allowed = event.created_by_id == request.user.id
+    if not allowed:
+        messages.error(request, "Sie haben keinen Zugriff auf dieses Event.")
+        return redirect('eventapp:event_detail', event_id=event.id)
+    
+    result = None
+    if request.method == 'POST':
+        form = RegistrationImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            result = import_registrations(event, form.cleaned_data['csv_file'])
+            messages.success(request, f"{result.created} Anmeldungen importiert.")
+            form = RegistrationImportForm()
+    else:
+        form = RegistrationImportForm()
+    
+    return render(request, 'eventapp/registration_import.html', {
+        'form': form,
+        'event': event,
+        'result': result,
+    })
+
+
+def public_events_feed(request):
+    events = EventModel.objects.filter(is_public=True)
+    return feed_response(request, 'events', events, 'Veranstaltungen')
+
+
+def organization_events_feed(request, organization_id):
+    organization = get_object_or_404(Organization, id=organization_id)
+    events = EventModel.objects.filter(organization=organization, is_public=True)
+    return feed_response(request, f'organization:{organization.pk}', events, organization.name)
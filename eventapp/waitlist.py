@@ -0,0 +1,132 @@
+# eventapp/waitlist.py - Warteliste für ausgebuchte Events mit automatischem Nachrücken
+"""
+Ist ein Event ausgebucht, landet eine Anmeldung auf der Warteliste (statt dass
+die Seite immer wieder neu geladen wird, bis jemand abspringt).
+Wird durch cancel() ein Platz frei, rückt der/die Erste der Warteliste in
+derselben Transaktion nach: Platz reservieren, Eintrag löschen, Benachrichtigung
+in den E-Mail-Ausgang - alles oder nichts.
+Anmeldungen laufen ohne Benutzerkonto, daher sind die Abmelde-Links signiert.
+"""
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.urls import reverse
+from mailapp.outbox import enqueue_mail
+
+from .models import AlreadyRegistered, AlreadyWaiting, EventFull, EventModel, EventRegistration, WaitlistEntry
+
+TOKEN_SALT = 'eventapp.cancel'
+REGISTRATION = 'r'
+WAITLIST = 'w'
+
+
+def cancel_token(obj):
+    """Signierter Token für den Abmelde-Link einer Anmeldung oder eines Wartelisteneintrags"""
+    kind = WAITLIST if isinstance(obj, WaitlistEntry) else REGISTRATION
+    return signing.dumps([kind, obj.pk, obj.email], salt=TOKEN_SALT)
+
+
+def cancel_url(obj, base_url):
+    return base_url.rstrip('/') + reverse('eventapp:cancel_registration', args=[cancel_token(obj)])
+
+
+def load_token(token):
+    """Anmeldung bzw. Wartelisteneintrag zum Token - None, wenn ungültig oder schon abgemeldet"""
+    try:
+        kind, pk, email = signing.loads(token, salt=TOKEN_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    model = WaitlistEntry if kind == WAITLIST else EventRegistration
+    return model.objects.select_related('event').filter(pk=pk, email=email).first()
+
+
+def waiting_before(entry):
+    """Einträge, die vor entry nachrücken"""
+    return WaitlistEntry.objects.filter(event_id=entry.event_id).filter(
+        Q(joined_at__lt=entry.joined_at) | Q(joined_at=entry.joined_at, id__lt=entry.id)
+    )
+
+
+def position(entry):
+    """Platz auf der Warteliste (1 = rückt als Nächstes nach)"""
+    return waiting_before(entry).count() + 1
+
+
+def join(event, entry, base_url):
+    """
+    Trägt entry in die Warteliste ein. Ist inzwischen doch ein Platz frei,
+    rückt die Warteliste sofort nach - dann wird ggf. die neue EventRegistration
+    statt des Eintrags zurückgegeben.
+    """
+    entry.event = event
+    try:
+        with transaction.atomic():
+            if EventRegistration.objects.filter(event=event, email=entry.email).exists():
+                raise AlreadyRegistered()
+            entry.save()
+    except IntegrityError:
+        raise AlreadyWaiting()
+
+    # Ist seit dem vergeblichen reserve_seat ein Platz frei geworden, nicht auf die nächste Abmeldung warten
+    if EventModel.objects.filter(pk=event.pk).with_free_seat().exists():
+        for registration in promote(event, base_url):
+            if registration.email == entry.email:
+                return registration
+    return entry
+
+
+def promote(event, base_url):
+    """
+    Lässt Wartende nachrücken, solange Plätze frei sind. Jedes Nachrücken ist eine
+    Transaktion aus Platzreservierung (reserve_seat), Löschen des Eintrags und
+    Benachrichtigung. Gibt die neuen Anmeldungen zurück.
+    """
+    promoted = []
+    while True:
+        with transaction.atomic():
+            # skip_locked: parallele Nachrücker (z.B. PostgreSQL) nehmen sich nicht denselben Eintrag
+            entry = (WaitlistEntry.objects.select_for_update(skip_locked=True)
+                     .filter(event=event).order_by('joined_at', 'id').first())
+            if entry is None:
+                return promoted
+            registration = EventRegistration(
+                first_name=entry.first_name, last_name=entry.last_name, email=entry.email,
+            )
+            try:
+                event.reserve_seat(registration)
+            except EventFull:
+                return promoted
+            except AlreadyRegistered:
+                # Inzwischen direkt angemeldet - der Eintrag ist überflüssig
+                entry.delete()
+                continue
+            entry.delete()
+            _notify(event, registration, base_url)
+        promoted.append(registration)
+
+
+def cancel(obj, base_url):
+    """
+    Meldet eine Anmeldung ab (der Platz geht an die Warteliste, in derselben
+    Transaktion) oder entfernt einen Wartelisteneintrag.
+    """
+    with transaction.atomic():
+        # Bei Anmeldungen gibt release_seat den Platz im Zähler frei
+        obj.delete()
+        if isinstance(obj, EventRegistration):
+            return promote(obj.event, base_url)
+    return []
+
+
+def _notify(event, registration, base_url):
+    subject = f'Platz frei geworden: {event.title}'
+    message = (
+        f'Hallo {registration.first_name},\n\n'
+        f'für "{event.title}" am {event.start_date.strftime("%d.%m.%Y %H:%M")} ist ein Platz frei geworden. '
+        f'Sie sind von der Warteliste nachgerückt und jetzt angemeldet.\n\n'
+        f'Falls Sie doch nicht teilnehmen können, melden Sie sich bitte hier ab, '
+        f'damit der Platz weitergegeben werden kann:\n{cancel_url(registration, base_url)}\n\n'
+        f'Mit freundlichen Grüßen\nIhr Veranstaltungsteam'
+    )
+    enqueue_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [registration.email])
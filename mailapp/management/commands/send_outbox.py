@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mailapp.outbox import BATCH_SIZE, deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Stellt ausstehende E-Mails aus dem Ausgang (OutboxMessage) chargenweise zu'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Nachrichten pro Charge und SMTP-Verbindung')
+        parser.add_argument('--loop', action='store_true',
+                            help='Dauerhaft laufen und den Ausgang regelmäßig abarbeiten')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Wartezeit in Sekunden, wenn der Ausgang leer ist (mit --loop)')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = deliver_batch(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'{sent} gesendet, {failed} fehlgeschlagen')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Ausgang leer: {total_sent} gesendet, {total_failed} fehlgeschlagen.'
+        ))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Betreff')),
+                ('body', models.TextField(verbose_name='Nachricht')),
+                ('from_email', models.CharField(blank=True, max_length=254, verbose_name='Absender')),
+                ('recipients', models.JSONField(default=list, verbose_name='Empfänger')),
+                ('status', models.CharField(choices=[('pending', 'Ausstehend'), ('sending', 'Wird gesendet'), ('sent', 'Gesendet'), ('failed', 'Fehlgeschlagen')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Versuche')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Nächster Versuch')),
+                ('claim_token', models.CharField(blank=True, editable=False, max_length=32)),
+                ('claimed_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('last_error', models.TextField(blank=True, verbose_name='Letzter Fehler')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Erstellt am')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Gesendet am')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """
+    Ausgehende E-Mail. Wird in derselben Transaktion wie die auslösende
+    Änderung geschrieben und erst nach dem Commit vom Worker
+    (manage.py send_outbox) zugestellt.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Ausstehend'),
+        (STATUS_SENDING, 'Wird gesendet'),
+        (STATUS_SENT, 'Gesendet'),
+        (STATUS_FAILED, 'Fehlgeschlagen'),
+    ]
+
+    subject = models.CharField(max_length=255, verbose_name='Betreff')
+    body = models.TextField(verbose_name='Nachricht')
+    from_email = models.CharField(max_length=254, blank=True, verbose_name='Absender')
+    recipients = models.JSONField(default=list, verbose_name='Empfänger')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Versuche')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='Nächster Versuch')
+    claim_token = models.CharField(max_length=32, blank=True, editable=False)
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    last_error = models.TextField(blank=True, verbose_name='Letzter Fehler')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Erstellt am')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Gesendet am')
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Worker holt fällige Nachrichten: status='pending' AND next_attempt_at <= now
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
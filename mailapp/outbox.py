@@ -0,0 +1,132 @@
+# mailapp/outbox.py - Transaktionaler E-Mail-Ausgang
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+from veranstaltungen import tracing
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'OUTBOX_BATCH_SIZE', 50)
+MAX_ATTEMPTS = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+RETRY_BASE_SECONDS = getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 60)
+RETRY_MAX_SECONDS = 6 * 60 * 60
+# Nach dieser Zeit gilt eine beanspruchte Nachricht als verwaist (Worker abgestürzt)
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def enqueue_mail(subject, message, from_email, recipient_list):
+    """
+    Ersatz für send_mail() mit gleicher Argumentreihenfolge: legt die Nachricht im Ausgang ab.
+    Innerhalb von transaction.atomic() wird sie erst mit dem Commit sichtbar
+    und bei einem Rollback verworfen.
+    """
+    recipients = list(recipient_list)
+    with tracing.span('mail.enqueue', recipients=len(recipients)):
+        return OutboxMessage.objects.create(
+            subject=subject,
+            body=message,
+            from_email=from_email or '',
+            recipients=recipients,
+        )
+
+
+def retry_delay(attempts):
+    """Exponentielles Backoff: 1, 2, 4, ... Minuten, gedeckelt auf 6 Stunden"""
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """
+    Beansprucht bis zu batch_size fällige Nachrichten mit einem bedingten UPDATE,
+    damit parallel laufende Worker keine Nachricht doppelt senden.
+    """
+    now = timezone.now()
+    due = Q(status=OutboxMessage.STATUS_PENDING, next_attempt_at__lte=now) | Q(
+        status=OutboxMessage.STATUS_SENDING, claimed_at__lt=now - CLAIM_TIMEOUT
+    )
+    ids = list(OutboxMessage.objects.filter(due).order_by('id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    OutboxMessage.objects.filter(due, id__in=ids).update(
+        status=OutboxMessage.STATUS_SENDING, claim_token=token, claimed_at=now
+    )
+    return list(OutboxMessage.objects.filter(claim_token=token, status=OutboxMessage.STATUS_SENDING))
+
+
+def deliver_batch(batch_size=BATCH_SIZE, connection=None):
+    """
+    Stellt eine Charge fälliger Nachrichten über eine gemeinsame SMTP-Verbindung zu.
+    Gibt (gesendet, fehlgeschlagen) zurück.
+    """
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    connection = connection or get_connection()
+    with tracing.trace('outbox.deliver', messages=len(batch)):
+        try:
+            connection.open()
+        except Exception as e:
+            # Server nicht erreichbar: ganze Charge mit Backoff neu einplanen, der Worker läuft weiter
+            logger.warning(f"SMTP-Verbindung fehlgeschlagen, {len(batch)} Nachrichten neu eingeplant: {e}")
+            for outbox_message in batch:
+                _record_failure(outbox_message, e)
+            return 0, len(batch)
+        try:
+            return _send_batch(batch, connection)
+        finally:
+            connection.close()
+
+
+def _send_batch(batch, connection):
+    sent = failed = 0
+    for outbox_message in batch:
+        email = EmailMessage(
+            subject=outbox_message.subject,
+            body=outbox_message.body,
+            from_email=outbox_message.from_email or settings.DEFAULT_FROM_EMAIL,
+            to=outbox_message.recipients,
+            connection=connection,
+        )
+        try:
+            with tracing.span('mail.send', message=outbox_message.pk):
+                email.send(fail_silently=False)
+        except Exception as e:
+            failed += 1
+            logger.warning(f"Outbox-Nachricht {outbox_message.pk} nicht zugestellt: {e}")
+            _record_failure(outbox_message, e)
+        else:
+            sent += 1
+            outbox_message.attempts += 1
+            outbox_message.status = OutboxMessage.STATUS_SENT
+            outbox_message.sent_at = timezone.now()
+            outbox_message.last_error = ''
+            _save(outbox_message)
+    return sent, failed
+
+
+def _record_failure(outbox_message, error):
+    """Zählt den Versuch und plant mit Backoff neu ein - nach MAX_ATTEMPTS endgültig fehlgeschlagen"""
+    outbox_message.attempts += 1
+    outbox_message.last_error = str(error)
+    if outbox_message.attempts >= MAX_ATTEMPTS:
+        outbox_message.status = OutboxMessage.STATUS_FAILED
+    else:
+        outbox_message.status = OutboxMessage.STATUS_PENDING
+        outbox_message.next_attempt_at = timezone.now() + retry_delay(outbox_message.attempts)
+    _save(outbox_message)
+
+
+def _save(outbox_message):
+    outbox_message.claim_token = ''
+    outbox_message.save(update_fields=[
+        'status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'claim_token',
+    ])
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import OutboxMessage
+from .outbox import CLAIM_TIMEOUT, MAX_ATTEMPTS, claim_batch, deliver_batch, enqueue_mail, retry_delay
+
+
+class OutboxTests(TestCase):
+    """Läuft mit dem locmem-Backend des Testrunners (mail.outbox)"""
+
+    def enqueue(self, recipient='anna@example.com'):
+        return enqueue_mail('Betreff', 'Text', 'verein@example.com', [recipient])
+
+    def test_deliver(self):
+        self.enqueue()
+        self.enqueue('bernd@example.com')
+
+        self.assertEqual(deliver_batch(), (2, 0))
+
+        self.assertEqual([m.to for m in mail.outbox], [['anna@example.com'], ['bernd@example.com']])
+        self.assertEqual(mail.outbox[0].from_email, 'verein@example.com')
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxMessage.STATUS_SENT).exists())
+        self.assertEqual(deliver_batch(), (0, 0))
+
+    def test_failed_send_is_retried_with_backoff(self):
+        message = self.enqueue()
+        connection = get_connection()
+        with mock.patch.object(connection, 'send_messages', side_effect=SMTPException('abgelehnt')):
+            self.assertEqual(deliver_batch(connection=connection), (0, 1))
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error),
+                         (OutboxMessage.STATUS_PENDING, 1, 'abgelehnt'))
+        self.assertAlmostEqual(message.next_attempt_at, timezone.now() + retry_delay(1), delta=timedelta(seconds=5))
+        self.assertEqual(retry_delay(3), 4 * retry_delay(1))
+        # Noch nicht fällig
+        self.assertEqual(deliver_batch(), (0, 0))
+
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_batch(), (1, 0))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboxMessage.STATUS_SENT, 2))
+
+    def test_gives_up_after_max_attempts(self):
+        message = self.enqueue()
+        OutboxMessage.objects.update(attempts=MAX_ATTEMPTS - 1)
+        connection = get_connection()
+        with mock.patch.object(connection, 'send_messages', side_effect=SMTPException('abgelehnt')):
+            deliver_batch(connection=connection)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.STATUS_FAILED)
+
+    def test_unreachable_server_reschedules_batch(self):
+        self.enqueue()
+        self.enqueue('bernd@example.com')
+        connection = get_connection()
+        with mock.patch.object(connection, 'open', side_effect=OSError('Connection refused')):
+            self.assertEqual(deliver_batch(connection=connection), (0, 2))
+
+        self.assertEqual(mail.outbox, [])
+        for message in OutboxMessage.objects.all():
+            self.assertEqual((message.status, message.attempts, message.claim_token),
+                             (OutboxMessage.STATUS_PENDING, 1, ''))
+            self.assertGreater(message.next_attempt_at, timezone.now())
+
+    def test_claim(self):
+        self.enqueue()
+        self.enqueue('bernd@example.com')
+
+        self.assertEqual(len(claim_batch(batch_size=1)), 1)
+        # Beanspruchte Nachrichten bekommt kein zweiter Worker
+        self.assertEqual(len(claim_batch()), 1)
+        self.assertEqual(claim_batch(), [])
+
+        # Verwaist (Worker abgestürzt): nach CLAIM_TIMEOUT wieder fällig
+        OutboxMessage.objects.update(claimed_at=timezone.now() - CLAIM_TIMEOUT - timedelta(seconds=1))
+        self.assertEqual(len(claim_batch()), 2)
+
+    def test_rollback_discards_message(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.enqueue()
+            raise RuntimeError()
+        self.assertFalse(OutboxMessage.objects.exists())
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'veranstaltungen.settings')
+# Async Views für die öffentlichen Event-Seiten (siehe SERVER_PROFILE in den Settings)
+os.environ.setdefault('DJANGO_SERVER_PROFILE', 'asgi')
 
 application = get_asgi_application()
@@ -0,0 +1,10 @@
+# veranstaltungen/asgi_urls.py - URLconf des ASGI-Profils (siehe veranstaltungen.asgi)
+from django.urls import include, path
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+# Wie veranstaltungen.urls, nur die Event-Seiten kommen aus eventapp.async_urls
+urlpatterns = [
+    path('event/', include('eventapp.async_urls')) if str(pattern.pattern) == 'event/' else pattern
+    for pattern in wsgi_urlpatterns
+]
@@ -0,0 +1,104 @@
+# veranstaltungen/db_router.py - Lesezugriffe auf Replikate, Schreibzugriffe auf die Primärdatenbank
+"""
+Lesende Abfragen gehen nur dann an ein Replikat (settings.REPLICA_DATABASES),
+wenn der Request es erlaubt: GET/HEAD auf eine View aus settings.REPLICA_VIEWS,
+ohne gesetztes Pin-Cookie. Alles andere - andere Views, Formular-POSTs,
+Transaktionen, Management-Commands - liest von "default".
+
+Schreibt ein Request, bekommt der Client ein Cookie, das ihn für
+REPLICA_PIN_SECONDS an die Primärdatenbank bindet. So sieht z.B. jemand, der
+sich gerade angemeldet hat, seine Anmeldung sofort, auch wenn das Replikat
+noch hinterherhängt.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Sessions werden (fast) bei jedem Request gelesen und nach dem Login sofort gebraucht
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+class _RequestState:
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+_state = ContextVar('db_router_state', default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        # Innerhalb einer Transaktion muss wieder gelesen werden, was geschrieben wurde
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = getattr(settings, 'REPLICA_DATABASES', [])
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Alle Aliase zeigen auf denselben Datenbestand
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """Legt pro Request fest, ob Replikate gelesen werden dürfen, und setzt nach Schreibzugriffen das Pin-Cookie"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = _RequestState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        state = _RequestState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(response, state)
+
+    def pin(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 10),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        state.use_replica = (
+            request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+            and request.resolver_match.view_name in getattr(settings, 'REPLICA_VIEWS', ())
+        )
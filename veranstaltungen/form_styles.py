@@ -0,0 +1,66 @@
+# veranstaltungen/form_styles.py - Tailwind-Klassen für Formular-Widgets, einmal pro Formularklasse
+"""
+Statt die Klassen in jedem Widget (oder in jedem __init__) zu wiederholen,
+geben Formulare sie als Klassenattribute an. StyledFormMixin überträgt sie
+beim ersten Instanziieren einmalig in die base_fields der Klasse; jede
+Instanz bekommt sie danach über Djangos normale Kopie der Felder mit.
+"""
+import copy
+from functools import lru_cache
+
+from django import forms
+
+# Eingabefelder der Registrierung
+INPUT_LARGE = ('w-full px-4 py-2 border-2 border-gray-300 rounded-lg '
+               'focus:ring-2 focus:ring-blue-500 focus:border-blue-500 transition-all')
+# Standard-Eingabefelder (Organisation, Anmeldung)
+INPUT = 'w-full px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500'
+# Eingabefelder ohne Browser-Fokusrahmen (Filter, Import)
+INPUT_PLAIN = 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+CHECKBOX = 'w-4 h-4 text-blue-600 border-gray-300 rounded focus:ring-blue-500'
+
+# Widgets, die keine Eingabefeld-Klassen bekommen
+_CHOICE_LISTS = (forms.CheckboxSelectMultiple, forms.RadioSelect)
+
+
+@lru_cache(maxsize=512)
+def merge_classes(*class_strings):
+    """Fügt Klassen-Strings zusammen, ohne Duplikate, Reihenfolge bleibt erhalten"""
+    return ' '.join(dict.fromkeys(' '.join(class_strings).split()))
+
+
+class StyledFormMixin:
+    """
+    widget_class: Klassen für alle Eingabefelder
+    checkbox_class: Klassen für einzelne Checkboxen
+    widget_classes: Feldname -> Klassen, überschreibt die beiden obigen
+    Vorhandene Klassen der Widgets bleiben erhalten.
+    """
+    widget_class = ''
+    checkbox_class = ''
+    widget_classes = {}
+
+    def __init__(self, *args, **kwargs):
+        if '_widget_styles_resolved' not in type(self).__dict__:
+            type(self)._resolve_widget_styles()
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def _resolve_widget_styles(cls):
+        for name, field in cls.base_fields.items():
+            widget = field.widget
+            if name in cls.widget_classes:
+                css_class = cls.widget_classes[name]
+            elif isinstance(widget, forms.CheckboxInput):
+                css_class = cls.checkbox_class
+            elif isinstance(widget, _CHOICE_LISTS):
+                css_class = ''
+            else:
+                css_class = cls.widget_class
+            if not css_class:
+                continue
+            # Geerbte Felder (z.B. password1 aus UserCreationForm) teilen sich das Widget
+            # mit anderen Formularen - daher auf einer Kopie nur für diese Klasse ändern
+            field = cls.base_fields[name] = copy.deepcopy(field)
+            field.widget.attrs['class'] = merge_classes(field.widget.attrs.get('class', ''), css_class)
+        cls._widget_styles_resolved = True
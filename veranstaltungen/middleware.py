@@ -0,0 +1,135 @@
+# veranstaltungen/middleware.py - Projektweite Middleware
+import logging
+import random
+import re
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .query_hooks import query_hook
+
+logger = logging.getLogger('veranstaltungen.sql')
+
+# Platzhalter-Listen wie "IN (%s, %s, %s)" zusammenfassen, damit gleiche Abfragen
+# mit unterschiedlich vielen Parametern denselben Fingerprint bekommen
+_IN_LIST = re.compile(r'\((?:%s, )*%s\)')
+_WHITESPACE = re.compile(r'\s+')
+
+DEFAULT_BUDGET = {'queries': 30, 'time_ms': 500, 'duplicates': 5}
+
+
+class SQLBudgetExceeded(Exception):
+    """Ein Request hat sein SQL-Budget überschritten (nur wenn SQL_BUDGET_RAISE aktiv ist)"""
+
+
+def fingerprint(sql):
+    return _IN_LIST.sub('(...)', _WHITESPACE.sub(' ', sql.strip()))
+
+
+class _QueryRecorder:
+    """execute_wrapper, der pro Abfrage nur SQL und Dauer merkt - ausgewertet wird erst am Ende"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def report(self, view_name):
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        duplicates = {sql: count for sql, count in counts.most_common() if count > 1}
+        return {
+            'view': view_name,
+            'queries': len(self.queries),
+            'time_ms': round(sum(duration for _, duration in self.queries) * 1000, 2),
+            'duplicates': max(duplicates.values(), default=0),
+            'duplicate_sql': duplicates,
+        }
+
+
+def _budget_for(view_name):
+    budget = dict(getattr(settings, 'SQL_BUDGET_DEFAULT', DEFAULT_BUDGET))
+    budget.update(getattr(settings, 'SQL_BUDGETS', {}).get(view_name, {}))
+    return budget
+
+
+class SQLBudgetMiddleware:
+    """
+    Zählt pro Request Abfragen, DB-Zeit und doppelte SQL-Fingerprints (N+1-Muster)
+    und loggt sie mit dem View-Namen (DEBUG, standardmäßig aus). Überschreitungen des Budgets (SQL_BUDGETS)
+    werden als Warnung geloggt, mit SQL_BUDGET_RAISE (Tests) als Exception
+    (außer reinen Zeitüberschreitungen).
+    Mit SQL_BUDGET_SAMPLE_RATE < 1 wird nur ein Teil der Requests gemessen.
+    Abfragen, die erst beim Ausliefern einer StreamingHttpResponse laufen, fehlen.
+    Unterstützt auch den async Middleware-Pfad (ASGI-Profil).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        recorder = _QueryRecorder()
+        with query_hook(recorder):
+            response = self.get_response(request)
+        self.finish(request, recorder)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        recorder = _QueryRecorder()
+        with query_hook(recorder):
+            response = await self.get_response(request)
+        self.finish(request, recorder)
+        return response
+
+    def sampled(self):
+        sample_rate = getattr(settings, 'SQL_BUDGET_SAMPLE_RATE', 1.0)
+        return sample_rate >= 1 or random.random() < sample_rate
+
+    def finish(self, request, recorder):
+        match = request.resolver_match
+        self.check(recorder.report(match.view_name if match else request.path))
+
+    def check(self, report):
+        budget = _budget_for(report['view'])
+        exceeded = [key for key in ('queries', 'time_ms', 'duplicates') if report[key] > budget[key]]
+        # Statistik pro Request nur, wenn der Logger auf DEBUG steht (siehe LOGGING in settings)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                'SQL view=%s queries=%d time_ms=%.1f duplicates=%d',
+                report['view'], report['queries'], report['time_ms'], report['duplicates'],
+                extra={'sql_report': report},
+            )
+        if not exceeded:
+            return
+        message = 'SQL-Budget überschritten für %s (%s)' % (
+            report['view'],
+            ', '.join(f'{key}={report[key]} > {budget[key]}' for key in exceeded),
+        )
+        if report['duplicate_sql']:
+            message += ': ' + '; '.join(
+                f'{count}x {sql[:200]}' for sql, count in list(report['duplicate_sql'].items())[:3]
+            )
+        # DB-Zeit schwankt mit der Last der Maschine, daher in Tests nur loggen
+        if getattr(settings, 'SQL_BUDGET_RAISE', False) and exceeded != ['time_ms']:
+            raise SQLBudgetExceeded(message)
+        logger.warning(message, extra={'sql_report': report})
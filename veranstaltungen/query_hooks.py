@@ -0,0 +1,43 @@
+# veranstaltungen/query_hooks.py - execute_wrapper für alle Verbindungen, auch in sync_to_async-Threads
+"""
+connection.execute_wrapper() gilt nur für die Verbindung des aktuellen Threads.
+Async Views führen ihre Abfragen aber in Threads von sync_to_async aus, mit
+eigenen Verbindungen. query_hook() legt den Wrapper deshalb in einer ContextVar
+ab; asgiref kopiert den Kontext in diese Threads, und jede Verbindung ruft beim
+Ausführen die Wrapper ihres aktuellen Kontexts auf.
+"""
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_hooks = ContextVar('query_hooks', default=())
+
+
+@contextmanager
+def query_hook(wrapper):
+    """Wie connection.execute_wrapper(wrapper), aber für alle Abfragen im aktuellen Kontext"""
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+    token = _hooks.set(_hooks.get() + (wrapper,))
+    try:
+        yield
+    finally:
+        _hooks.reset(token)
+
+
+def _dispatch(execute, sql, params, many, context):
+    hooks = _hooks.get()
+    # Der zuerst registrierte Wrapper liegt außen, wie bei execute_wrapper()
+    for hook in reversed(hooks):
+        execute = functools.partial(hook, execute)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install(connection, **kwargs):
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch)
@@ -0,0 +1,179 @@
+# veranstaltungen/ratelimit.py - Token-Bucket-Ratenbegrenzung über den Django-Cache
+"""
+Jeder Schlüssel (IP, Benutzer oder Formularfeld) hat einen Eimer mit "rate"
+Token, der gleichmäßig nachgefüllt wird: '10/m' = höchstens 10 am Stück, danach
+eins alle 6 Sekunden. Ist der Eimer leer, gibt es sofort 429 mit Retry-After -
+bevor die View Passwörter hasht, abfragt oder Mails verschickt.
+
+Zwei Wege, dasselbe zu nutzen:
+- @ratelimit('ip', '10/m', methods=['POST']) direkt an der View
+- RateLimitMiddleware mit settings.RATELIMITS (View-Name -> Regeln), praktisch
+  für Views, die es sync und async gibt (eventapp.views / eventapp.async_views)
+
+Die Eimer liegen im Cache ("default"), mit mehreren Workern muss das ein
+gemeinsamer Cache sein (Redis, Memcached). Lesen und Schreiben sind nicht atomar,
+gleichzeitige Requests können also ein paar Token mehr bekommen.
+"""
+import functools
+import hashlib
+import math
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+class HttpResponseTooManyRequests(HttpResponse):
+    status_code = 429
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def key_value(request, key):
+    """
+    Wert, nach dem gezählt wird: 'ip', 'user' (Anonyme nach IP), 'post:<feld>' /
+    'get:<feld>' oder eine Funktion request -> str
+    """
+    if callable(key):
+        return key(request)
+    if key == 'ip':
+        return client_ip(request)
+    if key == 'user':
+        if request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return client_ip(request)
+    source, _, field = key.partition(':')
+    data = request.POST if source == 'post' else request.GET
+    return data.get(field, '').strip().lower()
+
+
+def _cache_key(group, key, value):
+    name = key if isinstance(key, str) else key.__name__
+    return f'ratelimit:{group}:{name}:{hashlib.md5(value.encode()).hexdigest()}'
+
+
+def _take(bucket, now, capacity, period):
+    """Nimmt ein Token aus dem Eimer. Gibt den neuen Eimer und die Wartezeit zurück (0 = erlaubt)"""
+    tokens, last = bucket or (capacity, now)
+    tokens = min(capacity, tokens + (now - last) * capacity / period)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) * period / capacity
+
+
+def check(request, group, rules):
+    """
+    Prüft alle passenden Regeln ({'key', 'rate', 'methods'}) mit einem Cache-Zugriff
+    zum Lesen und einem zum Schreiben. Token werden nur genommen, wenn alle Regeln
+    den Request erlauben. Gibt None oder eine 429-Antwort zurück.
+    """
+    if not getattr(settings, 'RATELIMIT_ENABLED', True):
+        return None
+    buckets = {}
+    for rule in rules:
+        methods = rule.get('methods')
+        if methods and request.method not in methods:
+            continue
+        key = rule['key']
+        buckets[_cache_key(group, key, key_value(request, key))] = parse_rate(rule['rate'])
+    if not buckets:
+        return None
+
+    now = time.time()
+    state = cache.get_many(buckets)
+    updated, wait = {}, 0
+    for cache_key, (capacity, period) in buckets.items():
+        updated[cache_key], bucket_wait = _take(state.get(cache_key), now, capacity, period)
+        wait = max(wait, bucket_wait)
+
+    if wait:
+        # Abgelehnt: kein Eimer wird belastet, auch nicht die, die noch Token hätten
+        response = HttpResponseTooManyRequests('Zu viele Anfragen. Bitte versuchen Sie es später erneut.')
+        response['Retry-After'] = str(math.ceil(wait))
+        return response
+    # Nach einer vollen Periode ist der Eimer ohnehin wieder voll
+    cache.set_many(updated, max(period for _, period in buckets.values()))
+    return None
+
+
+def take(group, key, value, rate):
+    """
+    Nimmt ein Token für einen einzelnen Schlüssel, unabhängig vom Request - für
+    Limits, die nur bestimmte Fälle zählen sollen (z.B. eventapp.digests).
+    Gibt die Wartezeit in Sekunden zurück (0 = erlaubt, dann ist das Token genommen).
+    """
+    if not getattr(settings, 'RATELIMIT_ENABLED', True):
+        return 0
+    capacity, period = parse_rate(rate)
+    cache_key = _cache_key(group, key, value)
+    bucket, wait = _take(cache.get(cache_key), time.time(), capacity, period)
+    if not wait:
+        cache.set(cache_key, bucket, period)
+    return wait
+
+
+def ratelimit(key, rate, methods=None, group=None):
+    """
+    Decorator für Views (sync oder async, bei Klassen per method_decorator).
+    Mehrere Decorators übereinander begrenzen nach mehreren Schlüsseln.
+    """
+    rules = [{'key': key, 'rate': rate, 'methods': methods}]
+
+    def decorator(view):
+        view_group = group or f'{view.__module__}.{view.__qualname__}'
+
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                # request.user und request.POST lesen ggf. Session bzw. Body - nur synchron
+                response = await sync_to_async(check)(request, view_group, rules)
+                return response or await view(request, *args, **kwargs)
+        else:
+            @functools.wraps(view)
+            def wrapper(request, *args, **kwargs):
+                return check(request, view_group, rules) or view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMiddleware:
+    """
+    Begrenzt die Views aus settings.RATELIMITS, z.B.
+    {'eventapp:my_registrations': [{'key': 'ip', 'rate': '5/m', 'methods': ['POST']}]}.
+    Geprüft wird in process_view, also nach dem URL-Resolving und vor der View.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        rules = getattr(settings, 'RATELIMITS', {}).get(view_name)
+        if rules:
+            return check(request, view_name, rules)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,7 @@ INSTALLED_APPS = [
     # eigene Apps
     'authapp.apps.AuthConfig',
     'eventapp.apps.EventappConfig',
+    'mailapp.apps.MailappConfig',
     'startapp',
 ]
 
@@ -54,11 +56,15 @@ INTERNAL_IPS = ["127.0.0.1"]  # Wichtig für django_browser_reload
 
 
 MIDDLEWARE = [
+    'veranstaltungen.tracing.TracingMiddleware',
+    'veranstaltungen.middleware.SQLBudgetMiddleware',
+    'veranstaltungen.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'veranstaltungen.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "django_browser_reload.middleware.BrowserReloadMiddleware",
@@ -66,9 +72,18 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'veranstaltungen.urls'
 
+# Server-Profil: veranstaltungen.asgi setzt DJANGO_SERVER_PROFILE=asgi, dann laufen
+# die öffentlichen Event-Seiten als async Views (eventapp.async_views).
+# Start z.B. mit: uvicorn veranstaltungen.asgi:application --workers 2
+# Vergleich mit WSGI: python manage.py benchmark_asgi
+SERVER_PROFILE = os.environ.get('DJANGO_SERVER_PROFILE', 'wsgi')
+if SERVER_PROFILE == 'asgi':
+    ROOT_URLCONF = 'veranstaltungen.asgi_urls'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates mit Tracing-Spans fürs Rendern (veranstaltungen.tracing)
+        'BACKEND': 'veranstaltungen.tracing.TracedTemplates',
         'DIRS': [BASE_DIR/'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -87,10 +102,67 @@ WSGI_APPLICATION = 'veranstaltungen.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite für gleichzeitige Schreibzugriffe (Anmeldungs-Spitzen):
+# - WAL: Leser blockieren Schreiber nicht mehr (und umgekehrt)
+# - synchronous=NORMAL: in WAL sicher gegen Absturz der Anwendung, nur ein Stromausfall
+#   kann die letzten Transaktionen kosten
+# - busy_timeout: auf die Schreibsperre warten statt sofort "database is locked"
+# - BEGIN IMMEDIATE: Schreibsperre gleich zu Beginn der Transaktion, dadurch kein
+#   Deadlock beim Hochstufen von Lese- auf Schreibsperre (das wartet busy_timeout nicht ab)
+# Vorher/Nachher messen: python manage.py stress_registrations
+SQLITE_OPTIONS = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA busy_timeout=5000;'
+        'PRAGMA mmap_size=134217728;'  # 128 MB
+        'PRAGMA cache_size=-20000;'  # 20 MB
+        'PRAGMA temp_store=MEMORY;'
+    ),
+    'transaction_mode': 'IMMEDIATE',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+    }
+}
+
+# Lese-Replikat (veranstaltungen.db_router). Lokal testbar mit einer Kopie der Datenbank:
+#   cp db.sqlite3 db-replica.sqlite3 && DATABASE_REPLICA=db-replica.sqlite3 python manage.py runserver
+if os.environ.get('DATABASE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / os.environ['DATABASE_REPLICA'],
+        'OPTIONS': SQLITE_OPTIONS,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['veranstaltungen.db_router.ReplicaRouter']
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+# Nur diese Views lesen (bei GET/HEAD) vom Replikat
+REPLICA_VIEWS = [
+    'eventapp:event_list',
+    'eventapp:event_detail',
+    'eventapp:public_events_feed',
+    'eventapp:organization_events_feed',
+    'authapp:organization_list',
+    'api:event_list',
+    'api:event_detail',
+]
+REPLICA_PIN_SECONDS = 10  # so lange liest ein Client nach einem Schreibzugriff von "default"
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMem gilt nur pro Prozess. Mit mehreren Worker-Prozessen einen gemeinsamen
+# Cache (z.B. Redis oder Memcached) eintragen, damit Invalidierungen alle erreichen.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
@@ -147,6 +219,45 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'noreply@pschp.de'
 SERVER_EMAIL = 'server@pschp.de'
 
+# E-Mail-Ausgang (mailapp): Zustellung über "python manage.py send_outbox --loop"
+OUTBOX_BATCH_SIZE = 50  # Nachrichten pro SMTP-Verbindung
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 60  # Backoff: 1, 2, 4, 8 ... Minuten
+
+# "Meine Registrierungen" (eventapp.digests): eine Übersichts-Mail pro Adresse und Fenster
+REGISTRATION_DIGEST_WINDOW = 10 * 60
+
+# SQL-Budget pro Request (veranstaltungen.middleware.SQLBudgetMiddleware)
+# duplicates = wie oft dieselbe Abfrage höchstens wiederholt werden darf (N+1)
+SQL_BUDGET_DEFAULT = {'queries': 30, 'time_ms': 500, 'duplicates': 5}
+SQL_BUDGETS = {
+    'eventapp:event_list': {'queries': 8, 'duplicates': 1},
+    'eventapp:event_detail': {'queries': 8, 'duplicates': 1},
+    'eventapp:event_registration': {'queries': 12, 'duplicates': 2},
+    'eventapp:my_registrations': {'queries': 8, 'duplicates': 1},
+    'eventapp:organization_registrations': {'queries': 8, 'duplicates': 1},
+    'api:event_list': {'queries': 6, 'duplicates': 1},
+    'api:event_detail': {'queries': 6, 'duplicates': 1},
+    'authapp:check_username': {'queries': 2, 'duplicates': 1},
+    'authapp:review_access_requests': {'queries': 6, 'duplicates': 1},
+}
+SQL_BUDGET_SAMPLE_RATE = 1.0  # z.B. 0.1 misst nur jeden zehnten Request
+SQL_BUDGET_RAISE = False  # True: Exception statt Warnung (in Tests per override_settings, siehe eventapp.tests)
+
+# Token-Bucket-Ratenbegrenzung (veranstaltungen.ratelimit), '10/m' = 10 am Stück, dann 1 alle 6 s
+# Login und Benutzernamen-Prüfung sind per @ratelimit in authapp.views begrenzt
+RATELIMIT_ENABLED = True
+RATELIMITS = {
+    'eventapp:event_registration': [{'key': 'ip', 'rate': '10/m', 'methods': ['POST']}],
+    # Pro Adresse begrenzt eventapp.digests (zählt nur Abfragen, die die Datenbank erreichen)
+    'eventapp:my_registrations': [{'key': 'ip', 'rate': '10/h', 'methods': ['POST']}],
+}
+
+# Tracing (veranstaltungen.tracing): Spans pro Request, abrufbar über recent_traces()
+TRACING_ENABLED = True
+TRACING_BUFFER_SIZE = 200  # Ringpuffer der letzten Traces im Speicher
+TRACING_FILE = None  # z.B. BASE_DIR / 'traces.jsonl' für den Export als JSON-Zeilen
+
 LOGIN_URL = 'authapp:login'
 LOGIN_REDIRECT_URL = 'startapp:starting-page'
 LOGOUT_REDIRECT_URL = 'startapp:starting-page'
@@ -155,13 +266,31 @@ LOGOUT_REDIRECT_URL = 'startapp:starting-page'
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'trace_id': {
+            '()': 'veranstaltungen.tracing.TraceIdFilter',
+        },
+    },
+    'formatters': {
+        'trace': {
+            'format': '[%(trace_id)s] %(levelname)s %(name)s: %(message)s',
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
+            'filters': ['trace_id'],
+            'formatter': 'trace',
         },
     },
     'root': {
         'handlers': ['console'],
         'level': 'DEBUG',
     },
+    'loggers': {
+        # Nur Budget-Überschreitungen; 'DEBUG' loggt die SQL-Statistik jedes Requests
+        'veranstaltungen.sql': {
+            'level': 'INFO',
+        },
+    },
 }
\ No newline at end of file
@@ -0,0 +1,7 @@
+# veranstaltungen/testing.py - Gemeinsame Basis für die Tests der Apps
+from django.test import TestCase, override_settings
+
+
+@override_settings(SQL_BUDGET_RAISE=True)
+class BudgetTestCase(TestCase):
+    """Überschreitet ein Request im Test sein SQL-Budget, schlägt der Test fehl statt nur zu warnen"""
@@ -0,0 +1,288 @@
+import sqlite3
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django import forms
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from eventapp.models import EventModel
+
+from . import middleware, ratelimit
+from .form_styles import StyledFormMixin, merge_classes
+from .db_router import PIN_COOKIE
+from .middleware import SQLBudgetExceeded, SQLBudgetMiddleware
+from .testing import BudgetTestCase
+from .tracing import recent_traces
+
+
+class RateLimitTests(BudgetTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(RATELIMITS={'eventapp:my_registrations': [{'key': 'ip', 'rate': '2/m', 'methods': ['POST']}]})
+    def test_middleware_rejects_before_view(self):
+        url = reverse('eventapp:my_registrations')
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {'email': 'anna@example.com'}).status_code, 302)
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {'email': 'anna@example.com'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        # Nur POST ist begrenzt
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_denied_request_is_not_charged(self):
+        rules = [{'key': 'ip', 'rate': '5/m'}, {'key': 'post:email', 'rate': '1/m'}]
+
+        def check(email):
+            return ratelimit.check(RequestFactory().post('/', {'email': email}), 'test', rules)
+
+        self.assertIsNone(check('anna@example.com'))
+        self.assertEqual(check('anna@example.com').status_code, 429)
+        # Die abgelehnte Anfrage hat kein Token der IP verbraucht
+        for i in range(4):
+            self.assertIsNone(check(f'person{i}@example.com'))
+        self.assertEqual(check('bernd@example.com').status_code, 429)
+
+
+class SQLBudgetTests(BudgetTestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('planer', 'planer@example.com', 'geheim')
+        self.event = EventModel.objects.create(
+            title='Sommerfest', description='Grillen', location='Berlin',
+            start_date=timezone.now() + timedelta(days=7), created_by=user, is_public=True,
+        )
+        self.url = reverse('api:event_detail', args=[self.event.pk])
+
+    def run_middleware(self, queries):
+        """Führt die Abfragen wie eine View hinter der Middleware aus (View-Name = Pfad)"""
+        def view(request):
+            for _ in range(queries):
+                list(EventModel.objects.filter(pk=self.event.pk))
+            return HttpResponse()
+        return SQLBudgetMiddleware(view)(RequestFactory().get('/budget/'))
+
+    @override_settings(SQL_BUDGETS={'api:event_detail': {'queries': 0}})
+    def test_query_overrun_raises(self):
+        with self.assertRaisesRegex(SQLBudgetExceeded, r'api:event_detail \(queries=\d+ > 0\)'):
+            self.client.get(self.url)
+
+    @override_settings(SQL_BUDGET_RAISE=False, SQL_BUDGETS={'api:event_detail': {'queries': 0}})
+    def test_query_overrun_warns(self):
+        with self.assertLogs('veranstaltungen.sql', 'WARNING') as logs:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(logs.output[0], r'queries=\d+ > 0')
+
+    def test_within_budget_logs_nothing(self):
+        with mock.patch.object(middleware.logger, 'debug') as debug:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        debug.assert_not_called()
+
+    @override_settings(SQL_BUDGETS={'/budget/': {'duplicates': 2}})
+    def test_duplicate_overrun_raises(self):
+        self.assertEqual(self.run_middleware(2).status_code, 200)
+        with self.assertRaisesRegex(SQLBudgetExceeded, r'duplicates=3 > 2.*3x SELECT'):
+            self.run_middleware(3)
+
+    @override_settings(SQL_BUDGET_RAISE=False, SQL_BUDGETS={'/budget/': {'duplicates': 2}})
+    def test_duplicate_overrun_warns(self):
+        with self.assertLogs('veranstaltungen.sql', 'WARNING') as logs:
+            self.run_middleware(3)
+        self.assertIn('duplicates=3 > 2', logs.output[0])
+
+
+class TracingTests(BudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = EventModel.objects.create(title='Sommerfest', start_date=timezone.now(), is_public=True)
+        cls.url = reverse('eventapp:event_detail', args=[cls.event.pk])
+
+    def test_request_records_spans(self):
+        response = self.client.get(self.url)
+        trace = recent_traces()[-1]
+        self.assertEqual(trace['trace_id'], response['X-Trace-Id'])
+        spans = {span['span_id']: span for span in trace['spans']}
+        root = trace['spans'][0]
+        self.assertEqual((root['name'], root['parent_id'], root['attrs']['status']), ('request', None, 200))
+
+        view = next(span for span in spans.values() if span['name'] == 'view')
+        self.assertEqual(view['attrs']['view'], 'eventapp:event_detail')
+        self.assertEqual(view['parent_id'], root['span_id'])
+
+        def inside_view(span):
+            while span['parent_id']:
+                span = spans[span['parent_id']]
+                if span is view:
+                    return True
+            return False
+
+        queries = [span for span in spans.values() if span['name'] == 'db.query']
+        self.assertTrue(any('eventapp_eventmodel' in span['attrs']['sql'] for span in queries))
+        self.assertTrue(all(inside_view(span) for span in queries))
+        templates = [span['attrs']['template'] for span in spans.values() if span['name'] == 'template.render']
+        self.assertIn('eventapp/event_detail.html', templates)
+
+    @override_settings(TRACING_ENABLED=False)
+    def test_disabled(self):
+        before = recent_traces()[-1:]
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Trace-Id', response)
+        self.assertEqual(recent_traces()[-1:], before)
+
+
+@override_settings(SQL_BUDGET_RAISE=True, REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    "replica" ist eine zweite Verbindung auf die Testdatenbank (TEST MIRROR).
+    TransactionTestCase, da das Replikat nur festgeschriebene Daten sieht.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Erst hier anlegen - der Testrunner richtet nur die Aliase aus settings.DATABASES ein
+        connections.settings['replica'] = {**connections['default'].settings_dict, 'TEST': {'MIRROR': 'default'}}
+        cls.databases = {'default', 'replica'}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        super().tearDownClass()
+
+    def setUp(self):
+        self.event = EventModel.objects.create(
+            title='Sommerfest', start_date=timezone.now() + timedelta(days=7), is_public=True,
+            registration_required=True, max_participants=10,
+        )
+
+    def get(self, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return primary, replica
+
+    def test_replica_views_read_from_replica(self):
+        primary, replica = self.get(reverse('eventapp:event_detail', args=[self.event.pk]))
+        self.assertTrue(replica.captured_queries)
+        self.assertFalse(primary.captured_queries)
+
+    def test_other_views_read_from_primary(self):
+        primary, replica = self.get(reverse('eventapp:event_registration', args=[self.event.pk]))
+        self.assertTrue(primary.captured_queries)
+        self.assertFalse(replica.captured_queries)
+
+    def test_write_goes_to_primary_and_pins_client(self):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.post(reverse('eventapp:event_registration', args=[self.event.pk]), {
+                'first_name': 'Anna', 'last_name': 'A', 'email': 'anna@example.com',
+            })
+        self.assertFalse(replica.captured_queries)
+        self.assertEqual(self.event.registrations.count(), 1)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+
+        # Mit Pin-Cookie liest auch eine Replikat-View von der Primärdatenbank
+        primary, replica = self.get(reverse('eventapp:event_detail', args=[self.event.pk]))
+        self.assertTrue(primary.captured_queries)
+        self.assertFalse(replica.captured_queries)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Prüft die SQLite-Optionen aus settings.SQLITE_OPTIONS')
+class SQLiteOptionsTests(SimpleTestCase):
+    """Die Testdatenbank liegt im Speicher - geprüft wird eine neue Verbindung auf eine Datei"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'optionen.sqlite3'
+        self.wrapper = DatabaseWrapper({**connections.settings['default'], 'NAME': self.path}, alias='optionen')
+        self.addCleanup(self.wrapper.close)
+        # Für transaction.atomic(using=...) nur in diesem Thread bekannt machen
+        connections['optionen'] = self.wrapper
+        self.addCleanup(connections.__delitem__, 'optionen')
+
+    def pragma(self, name):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        self.assertEqual(self.wrapper.settings_dict['OPTIONS'], settings.SQLITE_OPTIONS)
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -20000)
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+
+    def test_transactions_take_write_lock_immediately(self):
+        self.pragma('journal_mode')  # öffnet die Verbindung und legt die Datei an
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        with transaction.atomic(using='optionen'):
+            # Noch nichts geschrieben, trotzdem hält die Transaktion schon die Schreibsperre
+            self.wrapper.cursor().execute('SELECT 1')
+            with self.assertRaisesRegex(sqlite3.OperationalError, 'locked'):
+                other.execute('BEGIN IMMEDIATE')
+
+
+class FormStylesTests(SimpleTestCase):
+
+    class ContactForm(StyledFormMixin, forms.Form):
+        widget_class = 'w-full border'
+        checkbox_class = 'h-4 w-4'
+        widget_classes = {'note': 'h-32 border'}
+
+        name = forms.CharField(widget=forms.TextInput(attrs={'class': 'border font-bold'}))
+        note = forms.CharField(widget=forms.Textarea)
+        newsletter = forms.BooleanField(required=False)
+        topics = forms.MultipleChoiceField(choices=[('a', 'A')], widget=forms.CheckboxSelectMultiple)
+
+    def test_merge_classes(self):
+        self.assertEqual(merge_classes('a b', 'b c', ' a  d'), 'a b c d')
+        self.assertEqual(merge_classes('', ''), '')
+        before = merge_classes.cache_info().hits
+        merge_classes('a b', 'b c', ' a  d')
+        self.assertEqual(merge_classes.cache_info().hits, before + 1)
+
+    def test_widget_classes(self):
+        fields = self.ContactForm().fields
+        self.assertEqual(fields['name'].widget.attrs['class'], 'border font-bold w-full')
+        self.assertEqual(fields['note'].widget.attrs['class'], 'h-32 border')
+        self.assertEqual(fields['newsletter'].widget.attrs['class'], 'h-4 w-4')
+        self.assertNotIn('class', fields['topics'].widget.attrs)
+
+    def test_resolved_once_per_class(self):
+        self.ContactForm()
+        base_fields = dict(self.ContactForm.base_fields)
+        self.ContactForm()
+        self.assertEqual(self.ContactForm.base_fields, base_fields)
+        self.assertTrue(all(self.ContactForm.base_fields[name] is field for name, field in base_fields.items()))
+
+    def test_subclass_does_not_change_parent(self):
+        class PlainForm(forms.Form):
+            name = forms.CharField()
+
+        class StyledForm(StyledFormMixin, PlainForm):
+            widget_class = 'w-full'
+
+        StyledForm()
+        self.assertEqual(StyledForm.base_fields['name'].widget.attrs['class'], 'w-full')
+        self.assertNotIn('class', PlainForm.base_fields['name'].widget.attrs)
+        self.assertNotIn('class', PlainForm().fields['name'].widget.attrs)
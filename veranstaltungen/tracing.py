@@ -0,0 +1,260 @@
+# veranstaltungen/tracing.py - Leichtgewichtige Spans pro Request (View, Formulare, ORM, Templates, Mail)
+"""
+Jeder Request bekommt eine Trace-ID (TracingMiddleware). Innerhalb des Requests
+misst tracing.span() verschachtelte Abschnitte. Am Ende wird der Trace als eine
+JSON-Zeile exportiert: immer in einen Ringpuffer im Speicher (recent_traces()),
+zusätzlich in settings.TRACING_FILE, falls gesetzt.
+Ohne aktiven Trace (z.B. in der Shell) kosten Spans praktisch nichts.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+
+from .query_hooks import query_hook
+
+_trace = ContextVar('trace', default=None)
+_current_span = ContextVar('current_span', default=None)
+_buffer = deque(maxlen=getattr(settings, 'TRACING_BUFFER_SIZE', 200))
+_file_lock = threading.Lock()
+
+SQL_MAX_LENGTH = 300
+
+
+class _Trace:
+    def __init__(self, name, trace_id=None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.name = name
+        self.spans = []
+
+
+class Span:
+    def __init__(self, trace, name, parent, attrs):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms = None
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        self.trace.spans.append(self)
+
+    def as_dict(self):
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': self.duration_ms,
+            'attrs': self.attrs,
+        }
+
+
+def current_trace_id():
+    trace = _trace.get()
+    return trace.trace_id if trace else None
+
+
+@contextmanager
+def span(name, **attrs):
+    """Misst einen Abschnitt als Kind des aktuellen Spans (No-op ohne aktiven Trace)"""
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    current = Span(trace, name, _current_span.get(), attrs)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.attrs['error'] = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+def annotate(**attrs):
+    """Hängt Attribute an den aktuellen Span (No-op ohne aktiven Trace)"""
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+@contextmanager
+def trace(name, trace_id=None, **attrs):
+    """Startet einen neuen Trace mit Wurzel-Span, z.B. für Management-Commands"""
+    current = _Trace(name, trace_id)
+    token = _trace.set(current)
+    try:
+        with query_hook(_trace_query), span(name, **attrs) as root:
+            yield root
+    finally:
+        _trace.reset(token)
+        _export(current)
+
+
+def _trace_query(execute, sql, params, many, context):
+    with span('db.query', sql=sql[:SQL_MAX_LENGTH], alias=context['connection'].alias, many=many):
+        return execute(sql, params, many, context)
+
+
+def _export(finished):
+    spans = sorted(finished.spans, key=lambda s: s.start)
+    record = {
+        'trace_id': finished.trace_id,
+        'name': finished.name,
+        'start': spans[0].start if spans else None,
+        'duration_ms': spans[0].duration_ms if spans else None,
+        'spans': [s.as_dict() for s in spans],
+    }
+    _buffer.append(record)
+    path = getattr(settings, 'TRACING_FILE', None)
+    if path:
+        line = json.dumps(record, default=str, ensure_ascii=False)
+        with _file_lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+def recent_traces():
+    """Die zuletzt beendeten Traces (neueste zuletzt)"""
+    return list(_buffer)
+
+
+class TraceIdFilter(logging.Filter):
+    """Stellt %(trace_id)s für Log-Formate bereit ('-' außerhalb eines Traces)"""
+
+    def filter(self, record):
+        record.trace_id = current_trace_id() or '-'
+        return True
+
+
+class TracingMiddleware:
+    """
+    Ein Trace pro Request. Der View-Span beginnt in process_view (nach dem URL-Resolving)
+    und endet, wenn die Antwort diese Middleware wieder erreicht.
+    Die Trace-ID steht im Response-Header X-Trace-Id.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'TRACING_ENABLED', True):
+            return self.get_response(request)
+        with trace('request', method=request.method, path=request.path) as root:
+            try:
+                response = self.get_response(request)
+            finally:
+                self.finish_view(request)
+            self.finish(root, response)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'TRACING_ENABLED', True):
+            return await self.get_response(request)
+        with trace('request', method=request.method, path=request.path) as root:
+            try:
+                response = await self.get_response(request)
+            finally:
+                self.finish_view(request)
+            self.finish(root, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current = _trace.get()
+        if current is None:
+            return
+        # Kein span(): unter ASGI läuft process_view per sync_to_async in einem kopierten
+        # Kontext, ein Reset-Token daraus wäre im Event-Loop ungültig. Den Wert von
+        # _current_span übernimmt asgiref danach in den Kontext des Requests;
+        # zurückgesetzt wird er mit dem Wurzel-Span.
+        view_span = Span(current, 'view', _current_span.get(), {'view': request.resolver_match.view_name})
+        _current_span.set(view_span)
+        request._trace_view_span = view_span
+
+    def finish_view(self, request):
+        view_span = getattr(request, '_trace_view_span', None)
+        if view_span:
+            view_span.finish()
+
+    def finish(self, root, response):
+        root.attrs['status'] = response.status_code
+        response['X-Trace-Id'] = root.trace.trace_id
+
+
+def _traced_init(init):
+    @functools.wraps(init)
+    def __init__(self, *args, **kwargs):
+        # Nur das äußerste __init__ (der konkreten Formularklasse) misst
+        if self.__dict__.get('_init_traced'):
+            return init(self, *args, **kwargs)
+        self._init_traced = True
+        with span('form.init', form=type(self).__name__):
+            init(self, *args, **kwargs)
+    return __init__
+
+
+class TracedFormMixin:
+    """
+    Spans für Aufbau (__init__) und Validierung (full_clean inkl. clean()) eines Formulars.
+    Eigene __init__ der Unterklassen werden automatisch mitgemessen.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if '__init__' in cls.__dict__:
+            cls.__init__ = _traced_init(cls.__init__)
+
+    @_traced_init
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def full_clean(self):
+        with span('form.clean', form=type(self).__name__):
+            super().full_clean()
+            if self.is_bound:
+                annotate(errors=len(self._errors))
+
+
+class TracedTemplates(DjangoTemplates):
+    """Django-Template-Backend, das das Rendern jedes geladenen Templates als Span misst"""
+
+    def from_string(self, template_code):
+        return _TracedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TracedTemplate(super().get_template(template_name))
+
+
+class _TracedTemplate:
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        with span('template.render', template=self._template.origin.template_name):
+            return self._template.render(context, request)
@@ -22,6 +22,7 @@ urlpatterns = [
     path('__reload__/', include("django_browser_reload.urls")),
     path('auth/', include('authapp.urls')),
     path('event/', include('eventapp.urls')),
+    path('api/v1/', include('eventapp.api_urls')),
     path('', include('startapp.urls') )
    
     #path('event')